@@ -0,0 +1,240 @@
+"""
+Offline benchmark suite for the HumanFaceToolbox extractors.
+
+Times every extractor (and the batch paths) on synthetic and scikit-image bundled
+images across image sizes, batch sizes and key parameters, then writes throughput,
+latency percentiles and peak traced memory as JSON. With ``--baseline`` the results
+are compared against a previous run and regressions are reported (non-zero exit).
+
+Usage:
+    python benchmarks/bench.py --output bench.json
+    python benchmarks/bench.py --quick --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.canny_edge import apply_canny_edge, apply_canny_edge_batch
+from src.gabor_features import GaborBank, extract_gabor_features
+from src.hog_features import extract_hog_features, extract_hog_features_batch, sliding_window_hog
+from src.lbp_features import extract_lbp_features, extract_lbp_features_batch
+from src.wavelet_features import extract_wavelet_features, extract_wavelet_features_batch
+
+
+def make_image(size, source='synthetic', color=False, seed=0):
+    """Returns a uint8 test image of ``size`` x ``size``: smooth noise with edges, or a bundled skimage image."""
+    if source == 'synthetic':
+        rng = np.random.default_rng(seed)
+        coarse = rng.random((max(2, size // 8), max(2, size // 8), 3)) * 255
+        image = cv2.resize(coarse, (size, size), interpolation=cv2.INTER_CUBIC)
+        image = np.clip(image + rng.normal(0, 8, image.shape), 0, 255).astype(np.uint8)
+    else:
+        from skimage import data
+        image = cv2.resize(getattr(data, source)(), (size, size), interpolation=cv2.INTER_AREA)
+        if image.ndim == 2:
+            image = np.dstack([image] * 3)
+    return image if color else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+
+def build_cases(quick=False):
+    """
+    Returns the benchmark cases as (name, params, n_items, make_fn) tuples.
+
+    ``make_fn`` prepares inputs outside the timed region and returns the callable to time.
+    """
+    sizes = [64, 128] if quick else [64, 128, 256, 512]
+    batch_sizes = [8] if quick else [8, 32]
+    sources = ['synthetic'] if quick else ['synthetic', 'astronaut']
+    cases = []
+
+    for source in sources:
+        for size in sizes:
+            params = {'source': source, 'size': size}
+
+            def canny(size=size, source=source):
+                image = make_image(size, source)
+                return lambda: apply_canny_edge(image)
+            cases.append(('canny', params, 1, canny))
+
+            def hog(size=size, source=source):
+                image = make_image(size, source) / 255.0
+                return lambda: extract_hog_features(image)
+            cases.append(('hog', params, 1, hog))
+
+            def hog_sliding_window(size=size, source=source):
+                image = make_image(size, source) / 255.0
+                return lambda: [windows for _, windows, _ in sliding_window_hog(image, window_size=(32, 32))]
+            cases.append(('hog_sliding_window', params, 1, hog_sliding_window))
+
+            def lbp(size=size, source=source):
+                image = make_image(size, source)
+                return lambda: extract_lbp_features(image)
+            cases.append(('lbp', params, 1, lbp))
+
+            for n_thetas in ([8] if quick else [4, 8]):
+                def gabor(size=size, source=source, n_thetas=n_thetas):
+                    image = make_image(size, source).astype(float)
+                    bank = GaborBank(image.shape, thetas=np.arange(0, np.pi, np.pi / n_thetas))
+                    return lambda: extract_gabor_features(image, bank=bank)
+                cases.append(('gabor', dict(params, n_filters=3 * n_thetas), 1, gabor))
+
+                def gabor_pyramid(size=size, source=source, n_thetas=n_thetas):
+                    image = make_image(size, source).astype(float)
+                    bank = GaborBank(image.shape, thetas=np.arange(0, np.pi, np.pi / n_thetas), pyramid=True)
+                    return lambda: extract_gabor_features(image, bank=bank)
+                cases.append(('gabor_pyramid', dict(params, n_filters=3 * n_thetas), 1, gabor_pyramid))
+
+            for level in ([3] if quick else [1, 3, 4]):
+                def wavelet(size=size, source=source, level=level):
+                    image = make_image(size, source, color=True)
+                    return lambda: extract_wavelet_features(image, decomposition_level=level)
+                cases.append(('wavelet', dict(params, level=level), 1, wavelet))
+
+    for size in sizes[:2]:
+        for batch_size in batch_sizes:
+            params = {'source': 'synthetic', 'size': size, 'batch_size': batch_size}
+
+            def stack(size=size, batch_size=batch_size, color=False):
+                return np.stack([make_image(size, seed=i, color=color) for i in range(batch_size)])
+
+            def canny_batch(stack=stack):
+                images = stack()
+                return lambda: apply_canny_edge_batch(images)
+            cases.append(('canny_batch', params, batch_size, canny_batch))
+
+            def hog_batch(stack=stack):
+                images = stack() / 255.0
+                return lambda: extract_hog_features_batch(images)
+            cases.append(('hog_batch', params, batch_size, hog_batch))
+
+            def lbp_batch(stack=stack):
+                images = stack()
+                return lambda: extract_lbp_features_batch(images)
+            cases.append(('lbp_batch', params, batch_size, lbp_batch))
+
+            def wavelet_batch(stack=stack):
+                images = stack(color=True)
+                return lambda: extract_wavelet_features_batch(images)
+            cases.append(('wavelet_batch', params, batch_size, wavelet_batch))
+    return cases
+
+
+def time_case(fn, n_items, repeats, warmup=1):
+    """Times ``fn`` and returns latency percentiles, throughput and peak traced memory."""
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    # Peak memory is measured on a separate run, so tracing does not skew the timings
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = np.array(latencies)
+    return {
+        'latency_p50_ms': float(np.percentile(latencies, 50) * 1e3),
+        'latency_p90_ms': float(np.percentile(latencies, 90) * 1e3),
+        'latency_p99_ms': float(np.percentile(latencies, 99) * 1e3),
+        'throughput_items_per_s': float(n_items * repeats / latencies.sum()),
+        'peak_memory_bytes': int(peak),
+        'repeats': repeats,
+    }
+
+
+def case_key(name, params):
+    return name + '[' + ','.join(f'{k}={params[k]}' for k in sorted(params)) + ']'
+
+
+def run(quick=False, repeats=None, pattern=None):
+    """Runs every (matching) case and returns the JSON-serialisable report."""
+    repeats = repeats or (3 if quick else 10)
+    results = {}
+    for name, params, n_items, make_fn in build_cases(quick):
+        key = case_key(name, params)
+        if pattern and pattern not in key:
+            continue
+        results[key] = dict(time_case(make_fn(), n_items, repeats), name=name, params=params)
+        print(f"{key:70s} p50={results[key]['latency_p50_ms']:9.2f} ms  "
+              f"{results[key]['throughput_items_per_s']:9.1f} items/s", file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Compares a report with a baseline report.
+
+    Returns:
+        list: One entry per case whose p50 latency or peak memory grew by more than ``tolerance``.
+    """
+    regressions = []
+    for key, result in report['results'].items():
+        base = baseline.get('results', {}).get(key)
+        if base is None:
+            continue
+        for metric in ('latency_p50_ms', 'peak_memory_bytes'):
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append({
+                    'case': key,
+                    'metric': metric,
+                    'baseline': base[metric],
+                    'current': result[metric],
+                    'ratio': result[metric] / base[metric],
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='Run a small subset of sizes and parameters.')
+    parser.add_argument('--repeats', type=int, help='Timed runs per case.')
+    parser.add_argument('--filter', help='Only run cases whose key contains this string.')
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout).')
+    parser.add_argument('--baseline', help='Compare against this JSON report and flag regressions.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown (default: 0.2).')
+    args = parser.parse_args(argv)
+
+    report = run(quick=args.quick, repeats=args.repeats, pattern=args.filter)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    for regression in report.get('regressions', []):
+        print(f"REGRESSION {regression['case']} {regression['metric']}: "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} (x{regression['ratio']:.2f})", file=sys.stderr)
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Offline load test for the feature-extraction service.
+
+Starts ``python -m src.service`` in-process on a free local port (or targets a running
+one with ``--port``), then sends requests from many concurrent keep-alive connections
+and reports throughput, client-side latency percentiles and the service metrics.
+
+Usage:
+    python benchmarks/load_test.py --extractor hog --size 128 --concurrency 64 --requests 2000
+    python benchmarks/load_test.py --port 8765 --extractor "lbp?radius=2&histograms=True"
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.service import FeatureServer, FeatureService
+
+
+async def _request(reader, writer, method, path, body=b''):
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _client(port, path, body, n_requests, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, 'POST', path, body)
+            latencies.append(time.perf_counter() - start)
+            errors.append(status != 200)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    server_task = None
+    port = args.port
+    if port is None:
+        port = args.local_port
+        service = FeatureService(args.max_batch_size, args.max_latency_ms / 1000, args.backend, args.workers)
+        server_task = asyncio.create_task(FeatureServer(service).serve('127.0.0.1', port))
+        for _ in range(100):  # wait for the server to listen
+            try:
+                _, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+
+    image = np.random.default_rng(0).integers(0, 256, (args.size, args.size), dtype=np.uint8)
+    buffer = io.BytesIO()
+    np.save(buffer, image)
+    path = '/extract/' + args.extractor
+    per_client = [args.requests // args.concurrency + (i < args.requests % args.concurrency)
+                  for i in range(args.concurrency)]
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(port, path, buffer.getvalue(), n, latencies, errors) for n in per_client))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    _, metrics = await _request(reader, writer, 'GET', '/metrics')
+    writer.close()
+    if server_task is not None:
+        server_task.cancel()
+        await asyncio.gather(server_task, return_exceptions=True)
+
+    p50, p90, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 90, 99])
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'latency_ms': {'p50': p50, 'p90': p90, 'p99': p99},
+        'service': json.loads(metrics),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, help='Port of a running service (default: start one in-process).')
+    parser.add_argument('--local-port', type=int, default=8799, help='Port of the in-process service.')
+    parser.add_argument('--extractor', default='hog', help="Extractor path with query parameters, e.g. 'hog?orientations=12'.")
+    parser.add_argument('--size', type=int, default=128, help='Side of the square test image (default: 128).')
+    parser.add_argument('--concurrency', type=int, default=64, help='Concurrent connections (default: 64).')
+    parser.add_argument('--requests', type=int, default=2000, help='Total requests (default: 2000).')
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-latency-ms', type=float, default=5.0)
+    parser.add_argument('--backend', choices=('threads', 'processes'), default='threads')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,12 @@
 import sys
 import os
 
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils import download_image, plot_images, save_plot_as_image
-from canny_edge import apply_canny_edge
+from src.utils import download_image
+from src.plotting import plot_images, save_plot_as_image
+from src.canny_edge import apply_canny_edge
 
 def main():
     image_url = "https://craftofcoding.wordpress.com/wp-content/uploads/2017/02/lena.jpg"
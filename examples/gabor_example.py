@@ -2,12 +2,13 @@ import sys
 import os
 import numpy as np
 
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils import download_image, plot_images, save_plot_as_image
+from src.utils import download_image
+from src.plotting import plot_images, save_plot_as_image
 # Import the Gabor feature extraction function
-from gabor_features import extract_gabor_features
+from src.gabor_features import extract_gabor_features
 
 def main():
     image_url = "https://craftofcoding.wordpress.com/wp-content/uploads/2017/02/lena.jpg"
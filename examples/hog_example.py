@@ -3,12 +3,13 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils import download_image, plot_images, save_plot_as_image
+from src.utils import download_image
+from src.plotting import plot_images, save_plot_as_image
 # Import the HOG feature extraction function
-from hog_features import extract_hog_features
+from src.hog_features import extract_hog_features
 
 def main():
     image_url = "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcTJHcWBQijdck5GD1-y-nSOFIEUvbrH7SP7Dg&s"
@@ -3,12 +3,13 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils import download_image, plot_images, save_plot_as_image
+from src.utils import download_image
+from src.plotting import plot_images, save_plot_as_image
 # Import the LBP feature extraction function
-from lbp_features import extract_lbp_features
+from src.lbp_features import extract_lbp_features
 
 def main():
     image_url = "https://craftofcoding.wordpress.com/wp-content/uploads/2017/02/lena.jpg"
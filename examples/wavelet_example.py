@@ -3,11 +3,12 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils import download_image, save_plot_as_image
-from wavelet_features import extract_wavelet_features
+from src.utils import download_image
+from src.plotting import save_plot_as_image
+from src.wavelet_features import extract_wavelet_features
 
 def main():
     image_url = "https://i.sstatic.net/3T6Gc.jpg"
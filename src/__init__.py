@@ -1,2 +1,138 @@
-# This file marks the 'src' directory as a Python package.
-# It can be left empty or used to define package-level imports.
+"""
+HumanFaceToolbox: image feature extraction for face analysis.
+
+Importing the package is cheap: extractors and helpers are exposed here but their modules
+(and OpenCV, SciPy, scikit-image, PyWavelets, requests or matplotlib) are only imported
+the first time one of them is used::
+
+    import src
+    features = src.extract_hog_features(image)      # loads hog_features on first use
+    canny = src.get_extractor('canny', 'batch')     # apply_canny_edge_batch
+"""
+import importlib
+
+# Public name -> module, resolved on first attribute access
+_EXPORTS = {
+    'apply_canny_edge': 'canny_edge',
+    'apply_canny_edge_tiled': 'canny_edge',
+    'apply_canny_edge_batch': 'canny_edge',
+    'apply_canny_edge_stream': 'canny_edge',
+    'auto_canny_thresholds': 'canny_edge',
+    'GaborBank': 'gabor_features',
+    'extract_gabor_features': 'gabor_features',
+    'extract_gabor_features_batch': 'gabor_features',
+    'extract_gabor_features_stream': 'gabor_features',
+    'HOGEngine': 'hog_features',
+    'extract_hog_features': 'hog_features',
+    'extract_hog_features_batch': 'hog_features',
+    'extract_hog_features_stream': 'hog_features',
+    'dense_hog_windows': 'hog_features',
+    'sliding_window_hog': 'hog_features',
+    'LBPEngine': 'lbp_features',
+    'extract_lbp_features': 'lbp_features',
+    'extract_lbp_histograms': 'lbp_features',
+    'extract_lbp_features_batch': 'lbp_features',
+    'extract_lbp_features_stream': 'lbp_features',
+    'extract_wavelet_features': 'wavelet_features',
+    'extract_wavelet_features_batch': 'wavelet_features',
+    'extract_wavelet_features_stream': 'wavelet_features',
+    'wavelet_threshold_sweep': 'wavelet_features',
+    'FeaturePipeline': 'pipeline',
+    'FeatureStore': 'feature_store',
+    'ROIPipeline': 'roi',
+    'extract_roi_features': 'roi',
+    'FeatureService': 'service',
+    'GalleryIndex': 'gallery',
+    'process_frames': 'video',
+    'read_frames': 'video',
+    'ImageLoader': 'loading',
+    'decode_image': 'loading',
+    'load_images': 'loading',
+    'download_image': 'utils',
+    'plot_images': 'plotting',
+    'save_plot_as_image': 'plotting',
+    'render_montage': 'montage',
+    'save_montage': 'montage',
+    'get_backend': 'backends',
+    'set_max_workers': 'backends',
+    'record': 'instrumentation',
+    'set_progress': 'instrumentation',
+}
+
+# Extractor name -> variant -> (module, function)
+EXTRACTORS = {
+    'canny': {'single': ('canny_edge', 'apply_canny_edge'),
+              'batch': ('canny_edge', 'apply_canny_edge_batch'),
+              'stream': ('canny_edge', 'apply_canny_edge_stream')},
+    'gabor': {'single': ('gabor_features', 'extract_gabor_features'),
+              'batch': ('gabor_features', 'extract_gabor_features_batch'),
+              'stream': ('gabor_features', 'extract_gabor_features_stream')},
+    'hog': {'single': ('hog_features', 'extract_hog_features'),
+            'batch': ('hog_features', 'extract_hog_features_batch'),
+            'stream': ('hog_features', 'extract_hog_features_stream')},
+    'lbp': {'single': ('lbp_features', 'extract_lbp_features'),
+            'batch': ('lbp_features', 'extract_lbp_features_batch'),
+            'stream': ('lbp_features', 'extract_lbp_features_stream')},
+    'wavelet': {'single': ('wavelet_features', 'extract_wavelet_features'),
+                'batch': ('wavelet_features', 'extract_wavelet_features_batch'),
+                'stream': ('wavelet_features', 'extract_wavelet_features_stream')},
+}
+
+
+def register_extractor(name, variant, module, function):
+    """
+    Registers an extractor so that ``get_extractor`` can find it, without importing it.
+
+    Args:
+        name (str): The extractor name, e.g. 'hog'.
+        variant (str): 'single', 'batch' or 'stream'.
+        module (str): A module of this package (e.g. 'hog_features') or a dotted absolute
+            module path (e.g. 'mypackage.features').
+        function (str): The name of the function in ``module``.
+    """
+    EXTRACTORS.setdefault(name, {})[variant] = (module, function)
+
+
+def available_extractors():
+    """Returns the sorted names of the registered extractors."""
+    return sorted(EXTRACTORS)
+
+
+def get_extractor(name, variant='single'):
+    """
+    Returns an extractor function, importing its module on first use.
+
+    Args:
+        name (str): The extractor name, e.g. 'hog'.
+        variant (str): 'single' for one image, 'batch' or 'stream' for many.
+
+    Returns:
+        callable: The extractor.
+    """
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{name}'. Choose from {available_extractors()}.")
+    if variant not in EXTRACTORS[name]:
+        raise ValueError(f"Extractor '{name}' has no '{variant}' variant. Choose from {sorted(EXTRACTORS[name])}.")
+    module, function = EXTRACTORS[name][variant]
+    return getattr(_import(module), function)
+
+
+def _import(module):
+    if '.' in module:
+        return importlib.import_module(module)
+    return importlib.import_module(f'.{module}', __name__)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(_import(_EXPORTS[name]), name)
+        globals()[name] = value  # later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+__all__ = sorted(_EXPORTS) + ['EXTRACTORS', 'available_extractors', 'get_extractor', 'register_extractor']
@@ -0,0 +1,253 @@
+import os
+import tempfile
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+_max_workers = None
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def set_max_workers(n):
+    """
+    Caps the number of workers used by every backend created afterwards.
+
+    Args:
+        n (int or None): Maximum number of workers. None removes the cap (uses all cores).
+    """
+    global _max_workers
+    _max_workers = n
+
+
+def default_max_workers():
+    """
+    Returns the worker count used when a backend is created without an explicit size.
+
+    Returns:
+        int: The configured cap, or the number of CPU cores if no cap is set.
+    """
+    cpus = os.cpu_count() or 1
+    return min(_max_workers, cpus) if _max_workers else cpus
+
+
+class ThreadBackend:
+    """
+    A persistent thread pool.
+
+    Suited to work that runs inside NumPy/SciPy/OpenCV and releases the GIL, such as
+    the FFTs of a Gabor bank. Tasks share memory with the caller, so nothing is copied.
+
+    Args:
+        max_workers (int, optional): Number of threads. Defaults to ``default_max_workers()``.
+    """
+
+    kind = 'threads'
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or default_max_workers()
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def map(self, fn, *iterables, max_pending=None):
+        """
+        Applies ``fn`` to the items of ``iterables`` on the pool, yielding results in order.
+
+        Args:
+            fn (callable): The task function.
+            *iterables: Iterables of task arguments.
+            max_pending (int, optional): Maximum number of tasks scheduled or finished but not
+                yet consumed. By default every task is submitted at once; with a limit, tasks
+                are submitted as results are consumed, so memory stays bounded when results
+                are large or the consumer is slow.
+
+        Returns:
+            iterator: The results.
+        """
+        if max_pending is None:
+            return self._get_executor().map(fn, *iterables)
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1.")
+        return self._bounded_map(fn, zip(*iterables), max_pending)
+
+    def _bounded_map(self, fn, arguments, max_pending):
+        executor = self._get_executor()
+        pending = deque()
+        try:
+            for args in arguments:
+                pending.append(executor.submit(fn, *args))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Also reached when the consumer stops early
+            for future in pending:
+                future.cancel()
+
+    def submit(self, fn, *args):
+        """Schedules ``fn(*args)`` on the pool and returns its ``concurrent.futures.Future``."""
+        return self._get_executor().submit(fn, *args)
+
+    def close(self):
+        """Shuts down the pool. It is recreated on the next ``map`` call."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class ProcessBackend(ThreadBackend):
+    """
+    A persistent process pool.
+
+    Arrays are handed to the workers through ``SharedArray`` memory maps rather than
+    being pickled per task, so ``fn`` should receive ``SharedArray.descriptor`` paths
+    and open them with ``SharedArray.attach``.
+
+    Args:
+        max_workers (int, optional): Number of processes. Defaults to ``default_max_workers()``.
+    """
+
+    kind = 'processes'
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+
+_BACKEND_TYPES = {
+    'threads': ThreadBackend,
+    'processes': ProcessBackend,
+}
+
+
+def get_backend(backend='threads', max_workers=None):
+    """
+    Returns a persistent, shared backend of the requested kind.
+
+    Backends are cached per (kind, max_workers), so repeated calls reuse the same pool
+    instead of starting a new one per request.
+
+    Args:
+        backend (str or backend): 'threads', 'processes', or an existing backend instance
+            (returned unchanged).
+        max_workers (int, optional): Number of workers. Defaults to ``default_max_workers()``.
+
+    Returns:
+        ThreadBackend or ProcessBackend: The backend.
+    """
+    if not isinstance(backend, str):
+        return backend
+    if backend not in _BACKEND_TYPES:
+        raise ValueError(f"Unknown backend '{backend}'. Choose from {sorted(_BACKEND_TYPES)}.")
+
+    key = (backend, max_workers or default_max_workers())
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = _BACKEND_TYPES[backend](max_workers=key[1])
+        return _backends[key]
+
+
+def shutdown_backends():
+    """Shuts down every cached backend."""
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.close()
+        _backends.clear()
+
+
+def _reset_after_fork():
+    """A forked worker inherits the cached pools but not their threads, so it starts without any."""
+    global _backends_lock
+    _backends.clear()
+    _backends_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class SharedArray:
+    """
+    A NumPy array backed by a memory-mapped file that worker processes can open by name.
+
+    The file lives in ``/dev/shm`` when available, so it stays in RAM. Existing
+    ``numpy.memmap`` arrays can be shared without copying via ``from_array``.
+
+    Args:
+        shape (tuple): Shape of the array.
+        dtype (numpy.dtype): Data type of the array.
+        path (str, optional): Backing file. Defaults to a new temporary file that is
+            removed by ``close``.
+    """
+
+    def __init__(self, shape, dtype=np.float64, path=None):
+        self._owns_file = path is None
+        if path is None:
+            directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+            path = os.path.join(directory, f"hft-{uuid.uuid4().hex}.npy")
+            self.array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=tuple(shape))
+        else:
+            self.array = np.load(path, mmap_mode='r')
+        self.path = path
+
+    @classmethod
+    def from_array(cls, array):
+        """
+        Wraps an array for sharing, copying it only if it is not already a memory-mapped ``.npy`` file.
+
+        Args:
+            array (numpy.ndarray): The array to share.
+
+        Returns:
+            SharedArray: The shared array.
+        """
+        filename = getattr(array, 'filename', None)
+        if isinstance(array, np.memmap) and filename and filename.endswith('.npy'):
+            on_disk = np.load(filename, mmap_mode='r')
+            if (on_disk.shape, on_disk.dtype, on_disk.strides, on_disk.offset) == (array.shape, array.dtype, array.strides, array.offset):
+                return cls(array.shape, array.dtype, path=filename)
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def descriptor(self):
+        """A small picklable handle that ``attach`` turns back into an array."""
+        return self.path
+
+    @staticmethod
+    def attach(descriptor, writable=False):
+        """
+        Opens a shared array from its descriptor, typically inside a worker process.
+
+        Args:
+            descriptor (str): The ``descriptor`` of a ``SharedArray``.
+            writable (bool): If True, the array is opened for writing.
+
+        Returns:
+            numpy.ndarray: A memory-mapped view of the shared array.
+        """
+        return np.load(descriptor, mmap_mode='r+' if writable else 'r')
+
+    def close(self):
+        """Releases the mapping and removes the backing file if this object created it."""
+        array = self.array
+        self.array = None
+        del array
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+def iter_batches(images, batch_size=32):
+    """
+    Groups images into (B, H, W[, C]) batches with bounded memory.
+
+    Args:
+        images (numpy.ndarray or iterable): Either a stack of shape (N, H, W[, C]), which may be a
+            ``numpy.memmap`` larger than RAM, or any iterable/generator of images.
+        batch_size (int): Maximum number of images per batch.
+
+    Yields:
+        numpy.ndarray: Batches of images. Slices of a stack are views, and an empty stack yields
+        one empty batch so that results keep their trailing shape and dtype. For other iterables the
+        batch buffer is reused, so each batch must be consumed before advancing; a new buffer
+        is started whenever the image shape or dtype changes.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    if isinstance(images, np.ndarray):
+        if len(images) == 0:
+            yield images
+            return
+        for start in range(0, len(images), batch_size):
+            yield images[start:start + batch_size]
+        return
+
+    buffer = None
+    count = 0
+    for image in images:
+        image = np.asarray(image)
+        if buffer is not None and (image.shape != buffer.shape[1:] or image.dtype != buffer.dtype):
+            if count:
+                yield buffer[:count]
+            buffer = None
+            count = 0
+        if buffer is None:
+            buffer = np.empty((batch_size,) + image.shape, dtype=image.dtype)
+        buffer[count] = image
+        count += 1
+        if count == batch_size:
+            yield buffer
+            count = 0
+    if count:
+        yield buffer[:count]
+
+
+def collect(batch_results, n_items=None):
+    """
+    Concatenates per-batch results into single arrays.
+
+    Args:
+        batch_results (iterable): Per-batch outputs, each an array with a leading batch axis or a
+            tuple of such arrays.
+        n_items (int, optional): Total number of items, if known. The outputs are then
+            preallocated once and filled in place instead of being concatenated at the end.
+
+    Returns:
+        numpy.ndarray or tuple: The concatenated result(s), matching the structure of each batch.
+
+    Raises:
+        ValueError: If there are no batches at all, so the shape and dtype of the result are unknown.
+            An empty (0, H, W[, C]) array still produces one empty batch (see ``iter_batches``) and
+            hence (0, ...) results.
+    """
+    outputs = None
+    chunks = []
+    is_tuple = False
+    position = 0
+    for result in batch_results:
+        is_tuple = isinstance(result, tuple)
+        parts = result if is_tuple else (result,)
+        if n_items is None:
+            chunks.append(parts)
+            continue
+        if outputs is None:
+            outputs = tuple(np.empty((n_items,) + part.shape[1:], dtype=part.dtype) for part in parts)
+        size = len(parts[0])
+        for out, part in zip(outputs, parts):
+            out[position:position + size] = part
+        position += size
+
+    if not chunks and outputs is None:
+        raise ValueError('No images to process; pass an empty (0, H, W[, C]) array to get empty results')
+    if n_items is None:
+        outputs = tuple(np.concatenate(column) for column in zip(*chunks))
+    return outputs if is_tuple else outputs[0]
+
+
+def batch_length(images):
+    """Returns ``len(images)`` if the input knows its length, otherwise None (e.g. for generators)."""
+    try:
+        return len(images)
+    except TypeError:
+        return None
@@ -1,7 +1,35 @@
 import cv2
 import numpy as np
 
-def apply_canny_edge(image_np, t_lower=50, t_upper=300):
+from .backends import get_backend
+from .batching import batch_length, collect, iter_batches
+from .instrumentation import count, stage
+
+def auto_canny_thresholds(gray_img, sigma=0.33, tile_rows=1024):
+    """
+    Computes median-based Canny thresholds, ``(1 - sigma) * median`` and ``(1 + sigma) * median``.
+
+    The median comes from a 256-bin histogram accumulated over row strips, so it takes a
+    single pass with bounded memory, also for memory-mapped images.
+
+    Args:
+        gray_img (numpy.ndarray): A uint8 grayscale image.
+        sigma (float): Relative spread of the thresholds around the median.
+        tile_rows (int): Number of rows read at a time.
+
+    Returns:
+        tuple: The (lower, upper) thresholds.
+    """
+    histogram = np.zeros(256, dtype=np.int64)
+    for start in range(0, gray_img.shape[0], tile_rows):
+        histogram += np.bincount(np.asarray(gray_img[start:start + tile_rows]).ravel(), minlength=256)
+    median = int(np.searchsorted(np.cumsum(histogram), (histogram.sum() + 1) // 2))
+    t_lower = int(max(0, (1.0 - sigma) * median))
+    t_upper = int(min(255, (1.0 + sigma) * median))
+    return t_lower, t_upper
+
+
+def apply_canny_edge(image_np, t_lower=50, t_upper=300, auto_threshold=False, sigma=0.33):
     """
     Applies Canny Edge Detection to an image.
 
@@ -9,15 +37,234 @@ def apply_canny_edge(image_np, t_lower=50, t_upper=300):
         image_np (numpy.ndarray): The input image as a NumPy array (preferably grayscale).
         t_lower (int): Lower threshold for the Canny algorithm.
         t_upper (int): Upper threshold for the Canny algorithm.
+        auto_threshold (bool): If True, ignore ``t_lower``/``t_upper`` and derive them from the
+            image median with ``auto_canny_thresholds``.
+        sigma (float): Relative threshold spread used when ``auto_threshold`` is True.
 
     Returns:
         numpy.ndarray: The resulting edge map.
     """
-    if image_np.ndim == 3:
-        # Convert to grayscale if it's a color image
-        gray_img = cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY)
-    else:
-        gray_img = image_np
+    with stage('canny.grayscale'):
+        if image_np.ndim == 3:
+            # Convert to grayscale if it's a color image
+            gray_img = cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY)
+        else:
+            gray_img = image_np
+
+    if auto_threshold:
+        t_lower, t_upper = auto_canny_thresholds(gray_img, sigma)
 
-    edge = cv2.Canny(gray_img, t_lower, t_upper)
+    with stage('canny.edges'):
+        edge = cv2.Canny(gray_img, t_lower, t_upper)
     return edge
+
+
+def _canny_tile_task(image_np, out, t_lower, t_upper, rows, cols, halo):
+    """Marks the edge candidates (1) and strong edges (2) of one tile of ``out``, with hysteresis inside the tile."""
+    (r0, r1), (c0, c1) = rows, cols
+    height, width = image_np.shape[:2]
+    hr0, hr1 = max(0, r0 - halo), min(height, r1 + halo)
+    hc0, hc1 = max(0, c0 - halo), min(width, c1 + halo)
+
+    tile = np.ascontiguousarray(image_np[hr0:hr1, hc0:hc1])
+    if tile.ndim == 3:
+        tile = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY)
+
+    # Non-maximum suppression and thresholding are local, so a halo makes them exact.
+    # With equal thresholds cv2.Canny returns exactly the suppressed pixels above that threshold.
+    inner = (slice(r0 - hr0, r1 - hr0), slice(c0 - hc0, c1 - hc0))
+    candidates = cv2.Canny(tile, t_lower, t_lower)[inner]
+    strong = cv2.Canny(tile, t_upper, t_upper)[inner]
+    block = out[r0:r1, c0:c1]
+    np.minimum(candidates, 1, out=block)
+    block[strong > 0] = 2
+    # Hysteresis within the tile; connections across tiles are finished by _tiled_hysteresis
+    _hysteresis_tile_task(out, rows, cols)
+
+
+def _hysteresis_tile_task(out, rows, cols):
+    """Promotes the candidates (1) of one tile that are 8-connected to a strong edge (2) inside the tile."""
+    block = out[rows[0]:rows[1], cols[0]:cols[1]]
+    strong = block == 2
+    if not strong.any():
+        return
+    n_labels, labels = cv2.connectedComponents(np.minimum(block, 1), connectivity=8, ltype=cv2.CV_32S)
+    count('canny.bytes', labels.nbytes)
+    keep = np.zeros(n_labels, dtype=bool)
+    keep[labels[strong]] = True
+    keep[0] = False
+    block[keep[labels]] = 2
+
+
+def _line_seeds(weak, halo, pad_before, pad_after):
+    """Positions of the candidates of ``weak`` that are 8-adjacent to a strong pixel of the parallel ``halo`` line."""
+    strong = np.pad(halo == 2, (pad_before, pad_after))
+    return np.flatnonzero((weak == 1) & (strong[:-2] | strong[1:-1] | strong[2:]))
+
+
+def _halo_seeds(out, rows, cols):
+    """Returns the (x, y) tile coordinates of the candidates touching a strong edge just outside the tile."""
+    (r0, r1), (c0, c1) = rows, cols
+    height, width = out.shape
+    hr0, hr1 = max(0, r0 - 1), min(height, r1 + 1)
+    hc0, hc1 = max(0, c0 - 1), min(width, c1 + 1)
+    col_pads = (int(c0 == 0), int(c1 == width))
+    row_pads = (int(r0 == 0), int(r1 == height))
+    seeds = []
+    if r0 > 0:
+        seeds += [(x, 0) for x in _line_seeds(out[r0, c0:c1], out[r0 - 1, hc0:hc1], *col_pads).tolist()]
+    if r1 < height:
+        seeds += [(x, r1 - r0 - 1) for x in _line_seeds(out[r1 - 1, c0:c1], out[r1, hc0:hc1], *col_pads).tolist()]
+    if c0 > 0:
+        seeds += [(0, y) for y in _line_seeds(out[r0:r1, c0], out[hr0:hr1, c0 - 1], *row_pads).tolist()]
+    if c1 < width:
+        seeds += [(c1 - c0 - 1, y) for y in _line_seeds(out[r0:r1, c1 - 1], out[hr0:hr1, c1], *row_pads).tolist()]
+    return seeds
+
+
+def _tiled_hysteresis(out, tiles):
+    """
+    Finishes hysteresis in place on a stitched candidate map whose tiles are each closed already.
+
+    Strong edges are grown across tile borders with flood fills from the candidates that
+    touch a strong pixel of a neighbouring tile; a tile that changes queues its neighbours
+    for the same check, until nothing changes. Only per-tile fill masks are allocated, so
+    memory stays bounded by the tile size. Finally strong edges become 255 and everything
+    else 0.
+    """
+    starts_r = sorted({rows[0] for rows, _ in tiles})
+    starts_c = sorted({cols[0] for _, cols in tiles})
+    grid = {(starts_r.index(rows[0]), starts_c.index(cols[0])): (rows, cols) for rows, cols in tiles}
+    pending = list(grid)
+    queued = set(pending)
+    while pending:
+        i, j = pending.pop()
+        queued.discard((i, j))
+        rows, cols = grid[i, j]
+        seeds = _halo_seeds(out, rows, cols)
+        if not seeds:
+            continue
+        block = out[rows[0]:rows[1], cols[0]:cols[1]]
+        mask = np.zeros((block.shape[0] + 2, block.shape[1] + 2), dtype=np.uint8)
+        for x, y in seeds:
+            if block[y, x] == 1:
+                # Fills the 8-connected pixels valued 1 or 2 around the seed with 2
+                cv2.floodFill(block, mask, (x, y), 2, 0, 1, 8 | cv2.FLOODFILL_FIXED_RANGE)
+        for neighbour in ((i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)):
+            if neighbour in grid and neighbour not in queued:
+                queued.add(neighbour)
+                pending.append(neighbour)
+
+    for rows, cols in tiles:
+        block = out[rows[0]:rows[1], cols[0]:cols[1]]
+        block[...] = np.where(block == 2, np.uint8(255), np.uint8(0))
+
+
+def apply_canny_edge_tiled(image_np, t_lower=50, t_upper=300, tile_size=1024, backend='threads', max_workers=None,
+                           auto_threshold=False, sigma=0.33, out=None):
+    """
+    Applies Canny Edge Detection to a large image tile by tile on a thread pool.
+
+    Each tile is read with a 2-pixel halo, which makes gradients and non-maximum suppression
+    identical to a whole-image ``cv2.Canny``. Hysteresis is not local (weak edges can chain
+    across tiles): each tile runs it internally, and strong edges are then grown across
+    tile borders, revisiting only the tiles they reach. Apart from ``out``, memory stays
+    bounded by the tile size (one label map per tile in flight). The result is identical to ``apply_canny_edge``.
+
+    Args:
+        image_np (numpy.ndarray): The input image, grayscale or BGR. May be a ``numpy.memmap``;
+            only the tiles in flight are read into memory.
+        t_lower (int): Lower threshold for the Canny algorithm.
+        t_upper (int): Upper threshold for the Canny algorithm.
+        tile_size (int): Side length of the tiles, without the halo.
+        backend (str or backend, optional): 'threads', a backend instance, or None to run serially.
+        max_workers (int, optional): Worker cap when ``backend`` is given by name.
+        auto_threshold (bool): If True, derive the thresholds from the image median (computed once).
+        sigma (float): Relative threshold spread used when ``auto_threshold`` is True.
+        out (numpy.ndarray, optional): A preallocated uint8 array (e.g. a memmap) for the edge map.
+
+    Returns:
+        numpy.ndarray: The resulting edge map.
+    """
+    height, width = image_np.shape[:2]
+    if out is None:
+        out = np.empty((height, width), dtype=np.uint8)
+
+    if auto_threshold:
+        if image_np.ndim == 3:
+            raise ValueError("auto_threshold needs a grayscale image for the tiled mode.")
+        t_lower, t_upper = auto_canny_thresholds(image_np, sigma)
+    if t_lower > t_upper:
+        t_lower, t_upper = t_upper, t_lower
+
+    halo = 2  # 1 pixel for the 3x3 Sobel operator, 1 for non-maximum suppression
+    tiles = [
+        ((r, min(r + tile_size, height)), (c, min(c + tile_size, width)))
+        for r in range(0, height, tile_size)
+        for c in range(0, width, tile_size)
+    ]
+
+    def run(tile):
+        _canny_tile_task(image_np, out, t_lower, t_upper, tile[0], tile[1], halo)
+
+    with stage('canny.tiles', n_tiles=len(tiles)):
+        if backend is None:
+            for tile in tiles:
+                run(tile)
+        else:
+            list(get_backend(backend, max_workers).map(run, tiles))
+
+    with stage('canny.hysteresis', n_tiles=len(tiles)):
+        _tiled_hysteresis(out, tiles)
+    return out
+
+
+def _to_gray_batch(batch):
+    """Converts a (B, H, W, 3) BGR batch to (B, H, W) grayscale with a single cvtColor call."""
+    if batch.ndim == 3:
+        return batch
+    b, h, w, c = batch.shape
+    if b == 0:
+        return np.empty((0, h, w), dtype=batch.dtype)
+    flat = np.ascontiguousarray(batch).reshape(b * h, w, c)
+    return cv2.cvtColor(flat, cv2.COLOR_BGR2GRAY).reshape(b, h, w)
+
+
+def apply_canny_edge_stream(images, t_lower=50, t_upper=300, batch_size=32):
+    """
+    Applies Canny Edge Detection to a stream of images, batch by batch.
+
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W[, C]) stack or any iterable of images.
+        t_lower (int): Lower threshold for the Canny algorithm.
+        t_upper (int): Upper threshold for the Canny algorithm.
+        batch_size (int): Number of images processed per batch.
+
+    Yields:
+        numpy.ndarray: Edge maps of shape (B, H, W) for each batch.
+    """
+    for batch in iter_batches(images, batch_size):
+        with stage('canny.grayscale', batch_size=len(batch)):
+            gray_batch = _to_gray_batch(batch)
+        edges = np.empty(gray_batch.shape, dtype=np.uint8)
+        count('canny.bytes', edges.nbytes)
+        with stage('canny.edges', batch_size=len(batch)):
+            for i in range(len(gray_batch)):
+                cv2.Canny(gray_batch[i], t_lower, t_upper, edges=edges[i])
+        yield edges
+
+
+def apply_canny_edge_batch(images, t_lower=50, t_upper=300, batch_size=32):
+    """
+    Applies Canny Edge Detection to many images.
+
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W[, C]) stack or any iterable of same-sized images.
+        t_lower (int): Lower threshold for the Canny algorithm.
+        t_upper (int): Upper threshold for the Canny algorithm.
+        batch_size (int): Number of images processed per batch.
+
+    Returns:
+        numpy.ndarray: The edge maps, of shape (N, H, W).
+    """
+    return collect(apply_canny_edge_stream(images, t_lower, t_upper, batch_size), batch_length(images))
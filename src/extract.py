@@ -0,0 +1,292 @@
+"""
+Resumable batch feature extraction for image directories and manifests.
+
+Walks directories (or a manifest with one path or URL per line), runs the chosen
+extractors on a process pool and writes one preallocated ``.npy`` array per extractor
+and shard, plus an ``index.json`` describing sources, shapes and parameters. A per-image
+status file is flushed after every chunk, so an interrupted job resumes where it stopped.
+
+Usage:
+    python -m src.extract images/ --output features/ -e hog -e "lbp:radius=2,histograms=True"
+    python -m src.extract --manifest urls.txt --output features/ --size 128 128 -e gabor
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from .backends import get_backend
+from .instrumentation import progress_bar, set_progress
+from .loading import ImageLoader
+from .pipeline import EXTRACTORS, FeaturePipeline
+
+INDEX_FILE = 'index.json'
+STATUS_FILE = 'status.npy'
+
+PENDING, DONE, FAILED = 0, 1, 2
+
+# Extractors that return tuples are stored as one fixed-shape array per image
+_OUTPUTS = {
+    'gabor': lambda result: result[1] if isinstance(result, tuple) else result,  # fused map (or pooled statistics)
+    'wavelet': lambda result: result[0],  # the reconstructed image
+}
+
+
+def parse_extractor(spec):
+    """
+    Parses an extractor spec such as ``'hog'`` or ``'lbp:radius=2,method=uniform'``.
+
+    Values are read as Python literals where possible (numbers, booleans, tuples) and
+    as strings otherwise.
+
+    Returns:
+        tuple: The (name, params) config accepted by ``FeaturePipeline``.
+    """
+    name, _, arguments = spec.partition(':')
+    params = {}
+    for key, value in _split_arguments(arguments):
+        try:
+            params[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{name}'. Choose from {sorted(EXTRACTORS)}.")
+    return name, params
+
+
+def _split_arguments(arguments):
+    """Splits 'a=1,b=(2, 3)' into (key, value) pairs, ignoring commas inside brackets."""
+    depth, start, parts = 0, 0, []
+    for i, char in enumerate(arguments):
+        depth += char in '([{'
+        depth -= char in ')]}'
+        if char == ',' and depth == 0:
+            parts.append(arguments[start:i])
+            start = i + 1
+    parts.append(arguments[start:])
+    for part in parts:
+        if part.strip():
+            key, _, value = part.partition('=')
+            yield key.strip(), value.strip()
+
+
+def list_sources(inputs=(), manifest=None):
+    """
+    Returns the sorted image files of ``inputs`` (directories or files) and the lines of ``manifest``.
+    """
+    loader = ImageLoader()
+    sources = list(loader.expand(inputs))
+    loader.close()
+    if manifest:
+        with open(manifest) as f:
+            sources.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return sources
+
+
+@lru_cache(maxsize=4)
+def _worker_state(config_json):
+    """Builds (and caches, per process) the loader and pipeline of a job."""
+    config = json.loads(config_json)
+    loader = ImageLoader(cache_dir=config['cache_dir'], grayscale=not config['color'])
+    pipeline = FeaturePipeline([tuple(step) for step in config['extractors']])
+    return config, loader, pipeline
+
+
+def load_for_job(loader, source, size):
+    """Loads an image and resizes it to ``size`` (rows, cols) if given."""
+    image = loader.load(source)
+    if size is not None and image.shape[:2] != tuple(size):
+        image = cv2.resize(image, (size[1], size[0]), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def extract_arrays(pipeline, image):
+    """Runs the pipeline and returns one array per extractor key."""
+    features = pipeline.run(image)
+    return {
+        key: np.asarray(_OUTPUTS.get(name, lambda result: result)(features[key]))
+        for key, name, _ in pipeline.steps
+    }
+
+
+def _process_chunk(output_dir, config_json, indices, sources):
+    """Extracts the features of one chunk and writes them into the shard files of ``output_dir``."""
+    config, loader, pipeline = _worker_state(config_json)
+    shard_size = config['shard_size']
+    shards = {}
+    statuses, errors = [], []
+    for index, source in zip(indices, sources):
+        try:
+            image = load_for_job(loader, source, config['size'])
+            arrays = extract_arrays(pipeline, image)
+            shard, row = divmod(index, shard_size)
+            for key, array in arrays.items():
+                if (key, shard) not in shards:
+                    shards[key, shard] = np.load(_shard_path(output_dir, key, shard), mmap_mode='r+')
+                target = shards[key, shard]
+                if array.shape != target.shape[1:]:
+                    raise ValueError(f"Feature shape {array.shape} differs from {target.shape[1:]}; use --size.")
+                target[row] = array
+            statuses.append(DONE)
+        except Exception as exc:  # one bad image must not stop a multi-hour job
+            statuses.append(FAILED)
+            errors.append((source, f'{type(exc).__name__}: {exc}'))
+    for array in shards.values():
+        array.flush()
+    return indices, statuses, errors
+
+
+def _shard_path(output_dir, key, shard):
+    return os.path.join(output_dir, key, f'{shard:05d}.npy')
+
+
+def _create_job(output_dir, sources, config, loader, pipeline):
+    """Probes the first readable image for the feature shapes and preallocates every shard."""
+    for source in sources:
+        try:
+            image = load_for_job(loader, source, config['size'])
+        except (OSError, ValueError):
+            continue
+        probe = extract_arrays(pipeline, image)
+        break
+    else:
+        raise ValueError("None of the input images could be loaded.")
+
+    features = {}
+    n_images, shard_size = len(sources), config['shard_size']
+    for key, array in probe.items():
+        os.makedirs(os.path.join(output_dir, key), exist_ok=True)
+        shards = []
+        for shard, start in enumerate(range(0, n_images, shard_size)):
+            rows = min(shard_size, n_images - start)
+            np.lib.format.open_memmap(_shard_path(output_dir, key, shard), mode='w+', dtype=array.dtype,
+                                      shape=(rows,) + array.shape).flush()
+            shards.append(os.path.join(key, f'{shard:05d}.npy'))
+        features[key] = {'shape': list(array.shape), 'dtype': array.dtype.str, 'shards': shards}
+
+    np.save(os.path.join(output_dir, STATUS_FILE), np.zeros(n_images, dtype=np.uint8))
+    # The probe size is only recorded: workers keep config['size'] (None means no resizing)
+    index = {'config': config, 'sources': sources, 'image_size': list(image.shape[:2]), 'features': features}
+    tmp_path = os.path.join(output_dir, INDEX_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(output_dir, INDEX_FILE))
+    return index
+
+
+def run_job(sources, output_dir, extractors, size=None, color=False, shard_size=1024, chunk_size=32,
+            workers=None, cache_dir=None, retry_failed=False):
+    """
+    Extracts features for many images into sharded arrays, resuming an earlier run of the same job.
+
+    Args:
+        sources (list): Image paths and URLs, in output order.
+        output_dir (str): Directory of the shards, the index and the status file.
+        extractors (list): ``FeaturePipeline`` extractor configs.
+        size (tuple, optional): Resize every image to (rows, cols). By default images are not
+            resized, and those whose features differ in shape from the first image's fail.
+        color (bool): If True, load images as RGB, otherwise as grayscale.
+        shard_size (int): Number of images per shard file.
+        chunk_size (int): Number of images per worker task and checkpoint.
+        workers (int, optional): Number of worker processes. Defaults to all cores.
+        cache_dir (str, optional): Download cache for URL sources.
+        retry_failed (bool): If True, images that failed in an earlier run are retried.
+
+    Returns:
+        dict: Counts of processed and failed images, elapsed seconds and throughput.
+    """
+    extractors = [list(step) for step in FeaturePipeline(extractors).steps]
+    config = {
+        'extractors': extractors, 'size': None if size is None else list(size), 'color': color,
+        'shard_size': shard_size, 'cache_dir': cache_dir,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    index_path = os.path.join(output_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        stored = index['config']
+        if index['sources'] != sources or any(stored[name] != json.loads(json.dumps(config[name]))
+                                              for name in ('extractors', 'size', 'color')):
+            raise ValueError(f"{output_dir} holds a different job; choose another output directory.")
+        config = stored
+    else:
+        _, loader, pipeline = _worker_state(json.dumps(config))
+        index = _create_job(output_dir, sources, config, loader, pipeline)
+
+    status = np.load(os.path.join(output_dir, STATUS_FILE), mmap_mode='r+')
+    pending = np.flatnonzero((status == PENDING) | ((status == FAILED) if retry_failed else False))
+    chunks = [pending[i:i + chunk_size].tolist() for i in range(0, len(pending), chunk_size)]
+    config_json = json.dumps(config)
+
+    start = time.perf_counter()
+    n_done = n_failed = 0
+    bar = progress_bar(len(pending), 'Extracting features')
+    results = get_backend('processes', workers).map(
+        _process_chunk, [output_dir] * len(chunks), [config_json] * len(chunks),
+        chunks, [[sources[i] for i in chunk] for chunk in chunks],
+    )
+    try:
+        for indices, statuses, errors in results:
+            # Checkpoint: features are flushed by the worker before their status is recorded
+            status[indices] = statuses
+            status.flush()
+            n_done += statuses.count(DONE)
+            n_failed += statuses.count(FAILED)
+            for source, message in errors:
+                print(f"Failed {source}: {message}", file=sys.stderr)
+            bar.update(len(indices))
+    finally:
+        bar.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'processed': n_done,
+        'failed': n_failed,
+        'remaining': int(np.count_nonzero(status == PENDING)),
+        'seconds': elapsed,
+        'images_per_second': n_done / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.extract', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='*', help='Image files and directories (searched recursively).')
+    parser.add_argument('--manifest', help='Text file with one image path or URL per line.')
+    parser.add_argument('--output', required=True, help='Output directory; an existing job there is resumed.')
+    parser.add_argument('-e', '--extractor', action='append', required=True, dest='extractors',
+                        help="Extractor spec 'name[:param=value,...]', e.g. 'hog:orientations=12'. Repeatable.")
+    parser.add_argument('--size', type=int, nargs=2, metavar=('ROWS', 'COLS'), help='Resize every image to this size.')
+    parser.add_argument('--color', action='store_true', help='Load images as RGB instead of grayscale.')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (default: all cores).')
+    parser.add_argument('--shard-size', type=int, default=1024, help='Images per shard file (default: 1024).')
+    parser.add_argument('--chunk-size', type=int, default=32, help='Images per task and checkpoint (default: 32).')
+    parser.add_argument('--cache-dir', help='Download cache directory for URL sources.')
+    parser.add_argument('--retry-failed', action='store_true', help='Retry images that failed in an earlier run.')
+    parser.add_argument('--progress', action='store_true', help='Show a progress bar (requires tqdm).')
+    args = parser.parse_args(argv)
+
+    sources = list_sources(args.inputs, args.manifest)
+    if not sources:
+        parser.error('no input images found.')
+    if args.progress:
+        set_progress('tqdm')
+
+    summary = run_job(
+        sources, args.output, [parse_extractor(spec) for spec in args.extractors], size=args.size,
+        color=args.color, shard_size=args.shard_size, chunk_size=args.chunk_size, workers=args.workers,
+        cache_dir=args.cache_dir, retry_failed=args.retry_failed,
+    )
+    print(f"Processed {summary['processed']} images ({summary['failed']} failed, {summary['remaining']} remaining) "
+          f"in {summary['seconds']:.1f} s: {summary['images_per_second']:.1f} images/s", file=sys.stderr)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
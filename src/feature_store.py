@@ -0,0 +1,350 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction is then only serialised within a process
+    fcntl = None
+
+from .instrumentation import count, stage
+
+_LAYOUT_FILE = 'layout.json'
+_LOCK_FILE = '.lock'
+
+# Arguments that only change how a result is computed, not the result itself
+EXECUTION_PARAMS = ('backend', 'max_workers')
+
+
+def _canonical(value):
+    """JSON fallback for parameter values: arrays, NumPy scalars and engines by value, anything else by repr."""
+    if hasattr(value, 'config'):  # e.g. a GaborBank
+        return [type(value).__name__, value.config]
+    if isinstance(value, np.ndarray):
+        return {'dtype': value.dtype.str, 'shape': value.shape, 'data': value.tolist()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
+
+
+def image_digest(image_np):
+    """
+    Returns the SHA-256 hex digest of an image's pixels, shape and dtype.
+
+    Args:
+        image_np (numpy.ndarray): The image.
+
+    Returns:
+        str: The digest.
+    """
+    image_np = np.ascontiguousarray(image_np)
+    digest = hashlib.sha256(f'{image_np.shape}{image_np.dtype.str}'.encode('utf-8'))
+    digest.update(memoryview(image_np).cast('B'))
+    return digest.hexdigest()
+
+
+def _flatten(value, arrays):
+    """Describes ``value`` as JSON, moving its arrays to ``arrays``."""
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("Object arrays cannot be stored.")
+        arrays.append(value)
+        return {'array': len(arrays) - 1}
+    if isinstance(value, (tuple, list)):
+        return {'tuple' if isinstance(value, tuple) else 'list': [_flatten(v, arrays) for v in value]}
+    if isinstance(value, dict):
+        return {'dict': {str(k): _flatten(v, arrays) for k, v in value.items()}}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return {'value': value}
+    raise TypeError(f"Cannot store values of type {type(value).__name__}.")
+
+
+def _unflatten(layout, arrays):
+    if 'array' in layout:
+        return arrays[layout['array']]
+    if 'tuple' in layout:
+        return tuple(_unflatten(v, arrays) for v in layout['tuple'])
+    if 'list' in layout:
+        return [_unflatten(v, arrays) for v in layout['list']]
+    if 'dict' in layout:
+        return {k: _unflatten(v, arrays) for k, v in layout['dict'].items()}
+    return layout['value']
+
+
+def _load_array(path):
+    """Memory-maps a ``.npy`` file read-only (empty arrays cannot be mapped and are read)."""
+    try:
+        return np.load(path, mmap_mode='r', allow_pickle=False)
+    except ValueError:
+        return np.load(path, allow_pickle=False)
+
+
+def _entry_size(path):
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path))
+    return os.path.getsize(path)
+
+
+class FeatureStore:
+    """
+    A persistent on-disk cache of extractor outputs, shared safely between processes.
+
+    Entries are keyed by the SHA-256 of the image pixels plus the extractor name and its
+    full parameter set, and sharded into 256 sub-directories. A single array is stored as
+    one ``.npy`` file; tuples, lists and dicts of arrays (such as the Gabor and wavelet
+    outputs) as a directory of ``.npy`` files plus a small JSON layout. Hits are returned
+    as read-only memory maps, so loading costs little more than opening the files.
+
+    Entries are written to a temporary name and renamed into place, so readers in other
+    processes never see partial entries. When ``max_bytes`` is set, the least recently used
+    entries (by modification time, refreshed on every hit) are evicted under an exclusive
+    file lock once this process's estimate of the store size exceeds it; the limit is
+    therefore soft when many processes write at once. On POSIX systems, arrays already
+    mapped by a reader stay valid after their entry is evicted.
+
+    Args:
+        root (str): Directory of the store. Created if missing.
+        max_bytes (int, optional): Size limit of the store. Defaults to no limit.
+    """
+
+    def __init__(self, root, max_bytes=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = self.size_bytes() if max_bytes is not None else 0
+
+    def key(self, image_np, name, params=None):
+        """
+        Returns the key of an extractor output.
+
+        Args:
+            image_np (numpy.ndarray): The input image.
+            name (str): The extractor name.
+            params (dict, optional): The extractor parameters. Values that are not JSON types
+                are keyed by value for arrays, NumPy scalars and objects with a ``config``
+                (such as a ``GaborBank``), and by ``repr`` otherwise.
+
+        Returns:
+            str: The hex key.
+        """
+        description = json.dumps([name, params or {}], sort_keys=True, default=_canonical)
+        digest = hashlib.sha256(image_digest(image_np).encode('ascii'))
+        digest.update(description.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def __contains__(self, key):
+        path = self._path(key)
+        return os.path.exists(path + '.npy') or os.path.isdir(path)
+
+    def get(self, key):
+        """
+        Loads an entry.
+
+        Args:
+            key (str): A key from ``key``.
+
+        Returns:
+            The stored value with read-only memory-mapped arrays, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            if os.path.exists(path + '.npy'):
+                value = _load_array(path + '.npy')
+                os.utime(path + '.npy')
+            else:
+                with open(os.path.join(path, _LAYOUT_FILE)) as f:
+                    layout = json.load(f)
+                arrays = [_load_array(os.path.join(path, f'{i}.npy')) for i in range(layout['n_arrays'])]
+                value = _unflatten(layout['value'], arrays)
+                os.utime(path)
+        except FileNotFoundError:
+            # A miss, or an entry evicted by another process while it was being read
+            count('store.misses', 1)
+            return None
+        count('store.hits', 1)
+        return value
+
+    def put(self, key, value):
+        """
+        Stores an entry, replacing nothing if another process stored it first.
+
+        Args:
+            key (str): A key from ``key``.
+            value: An array, or (nested) tuples, lists and dicts of arrays and scalars.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        shard = os.path.join(self.root, key[:2])
+        os.makedirs(shard, exist_ok=True)
+        path = self._path(key)
+        replaced = 0
+
+        if isinstance(value, np.ndarray):
+            if value.dtype.hasobject:
+                raise TypeError("Object arrays cannot be stored.")
+            fd, tmp_path = tempfile.mkstemp(dir=shard, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, value, allow_pickle=False)
+            size = os.path.getsize(tmp_path)
+            # Under the lock, so threads overwriting the same entry each subtract their own predecessor
+            with self._lock:
+                try:
+                    replaced = os.path.getsize(path + '.npy')
+                except FileNotFoundError:
+                    pass
+                os.replace(tmp_path, path + '.npy')
+        else:
+            arrays = []
+            layout = {'value': _flatten(value, arrays), 'n_arrays': len(arrays)}
+            tmp_dir = tempfile.mkdtemp(dir=shard, suffix='.tmp')
+            for i, array in enumerate(arrays):
+                np.save(os.path.join(tmp_dir, f'{i}.npy'), array, allow_pickle=False)
+            with open(os.path.join(tmp_dir, _LAYOUT_FILE), 'w') as f:
+                json.dump(layout, f)
+            size = _entry_size(tmp_dir)
+            try:
+                os.rename(tmp_dir, path)
+            except OSError:
+                # Another process stored the same entry first; both are identical
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return 0
+
+        count('store.bytes_written', size)
+        if self.max_bytes is not None:
+            with self._lock:
+                # An overwritten entry no longer takes up space
+                self._size += size - replaced
+                over = self._size > self.max_bytes
+            if over:
+                self.evict()
+        return size
+
+    def _entries(self):
+        """Yields (mtime, size, path) for every entry."""
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    yield entry.stat().st_mtime, _entry_size(entry.path), entry.path
+                except FileNotFoundError:
+                    continue
+
+    def size_bytes(self):
+        """Returns the total size of the stored entries in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_bytes=None):
+        """
+        Removes least recently used entries until the store fits in ``max_bytes``.
+
+        Args:
+            max_bytes (int, optional): The target size. Defaults to 90% of the store limit,
+                so eviction does not run again on the next write.
+
+        Returns:
+            int: The number of bytes removed.
+        """
+        if max_bytes is None:
+            max_bytes = int(0.9 * self.max_bytes) if self.max_bytes is not None else None
+        if max_bytes is None:
+            return 0
+
+        with stage('store.eviction'), open(os.path.join(self.root, _LOCK_FILE), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in entries:
+                if total - removed <= max_bytes:
+                    break
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                removed += size
+            with self._lock:
+                self._size = total - removed
+        return removed
+
+    def clear(self):
+        """Removes every entry."""
+        return self.evict(0)
+
+    def get_or_compute(self, extractor, image_np, name=None, **params):
+        """
+        Returns the cached output of ``extractor(image_np, **params)``, computing and storing it on a miss.
+
+        Args:
+            extractor (callable): The extractor, called with the image as first argument.
+            image_np (numpy.ndarray): The input image.
+            name (str, optional): The extractor name used in the key. Defaults to the
+                extractor's module and qualified name.
+            **params: Keyword arguments of the extractor.
+
+        Returns:
+            The extractor output; read-only memory maps on a hit.
+        """
+        name = name or f'{extractor.__module__}.{extractor.__qualname__}'
+        key = self.key(image_np, name, _key_params(extractor, params))
+        value = self.get(key)
+        if value is None:
+            value = extractor(image_np, **params)
+            self.put(key, value)
+        return value
+
+    def wrap(self, extractor, name=None):
+        """
+        Returns a cached version of an extractor.
+
+        Args:
+            extractor (callable): The extractor, e.g. ``extract_hog_features``.
+            name (str, optional): The extractor name used in the keys.
+
+        Returns:
+            callable: A function with the extractor's signature (keyword parameters only
+            after the image) that reads and fills the store.
+        """
+        @functools.wraps(extractor)
+        def cached(image_np, **params):
+            return self.get_or_compute(extractor, image_np, name, **params)
+        return cached
+
+
+@functools.lru_cache(maxsize=None)
+def _signature(extractor):
+    try:
+        return inspect.signature(extractor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _key_params(extractor, params):
+    """Completes ``params`` with the extractor's defaults and drops execution-only arguments."""
+    signature = _signature(extractor)
+    bound = None if signature is None else signature.bind_partial(None, **params)
+    if bound is not None:
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        params.pop(next(iter(params)))  # the image
+    return {k: v for k, v in params.items() if k not in EXECUTION_PARAMS}
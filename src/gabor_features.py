@@ -1,45 +1,548 @@
+from functools import lru_cache
+
+import cv2
 import numpy as np
-from skimage.filters import gabor
-from joblib import Parallel, delayed
-from tqdm import tqdm
+from scipy import fft as sp_fft
+from skimage.filters import gabor_kernel
+
+from .backends import SharedArray, get_backend
+from .batching import batch_length, collect, iter_batches
+from .instrumentation import count, progress_bar, stage
+
+
+class GaborBank:
+    """
+    A reusable bank of Gabor filters for a fixed image size.
+
+    The real and imaginary kernels for every (theta, freq) pair are built once and
+    stored in the frequency domain. Filtering an image then costs a single forward
+    FFT plus one inverse FFT per filter, instead of two spatial convolutions per
+    filter. Borders are handled by symmetric padding, which matches the
+    ``mode='reflect'`` convolution used by ``skimage.filters.gabor``.
+
+    Args:
+        image_shape (tuple): The (height, width) of the images the bank will be applied to.
+        thetas (list, optional): List of orientations (in radians). Defaults to 8 orientations from 0 to pi.
+        freqs (list, optional): List of frequencies. Defaults to [0.1, 0.4, 0.7].
+        bandwidth (float): Bandwidth of the Gabor kernels, as in ``skimage.filters.gabor_kernel``.
+        n_stds (float): Kernel extent in standard deviations, as in ``skimage.filters.gabor_kernel``.
+        pyramid (bool): If True, low-frequency filters are evaluated at reduced resolution: only
+            the part of the image spectrum around the filter's centre frequency (which holds its
+            whole passband) is transformed back, giving the response on every 2nd or 4th pixel,
+            which is then upsampled with bicubic interpolation. The padded image FFT is shared
+            with the full-resolution filters.
+        max_decimation (int): The largest decimation (1, 2 or 4) used in pyramid mode.
 
-def extract_gabor_features(image_np, thetas=None, freqs=None):
+    In pyramid mode with the default frequencies and ``max_decimation=2``, the 0.1 filters run
+    at half resolution. Measured on noise and smoothed-noise images, their magnitudes differ
+    from the full-resolution ones by about 0.5% of the filter's peak response on average and
+    by up to about 7% at single pixels, and the fused map by about 0.2% of its peak.
+    ``max_decimation=4`` is faster, with errors of about 1.2%, 20% and 1%. These figures are
+    approximate and depend on the image content.
+    """
+
+    def __init__(self, image_shape, thetas=None, freqs=None, bandwidth=1, n_stds=3, pyramid=False, max_decimation=2):
+        if thetas is None:
+            thetas = np.arange(0, np.pi, np.pi / 8)  # 8 orientations
+        if freqs is None:
+            freqs = [0.1, 0.4, 0.7]  # 3 frequencies
+
+        self.image_shape = tuple(image_shape[:2])
+        self.thetas = list(thetas)
+        self.freqs = list(freqs)
+        self.params = [(theta, freq) for theta in self.thetas for freq in self.freqs]
+        # Everything needed to rebuild an identical bank, e.g. inside a worker process
+        self.config = (self.image_shape, tuple(self.thetas), tuple(self.freqs), bandwidth, n_stds, pyramid, max_decimation)
+
+        kernels = [
+            gabor_kernel(freq, theta=theta, bandwidth=bandwidth, n_stds=n_stds)
+            for theta, freq in self.params
+        ]
+        self.decimations = [
+            _decimation(freq, bandwidth, n_stds, max_decimation) if pyramid else 1
+            for _, freq in self.params
+        ]
+        step = max(self.decimations)
+
+        # Pad by the largest kernel half-size so every filter sees reflected borders.
+        # In pyramid mode pads and FFT sizes are multiples of the largest decimation,
+        # so decimated responses sample the image on an aligned grid.
+        self.pad = (
+            -(-max(k.shape[0] // 2 for k in kernels) // step) * step,
+            -(-max(k.shape[1] // 2 for k in kernels) // step) * step,
+        )
+        self.fft_shape = tuple(
+            sp_fft.next_fast_len(-(-(size + 2 * pad) // step)) * step
+            for size, pad in zip(self.image_shape, self.pad)
+        )
+
+        # Place each kernel's centre at the origin so the circular convolution
+        # lines up with the (padded) input without any shifting afterwards.
+        self._kernel_ffts = {}
+        self._windows = {}
+        for i, kernel in enumerate(kernels):
+            embedded = np.zeros(self.fft_shape, dtype=np.complex128)
+            kh, kw = kernel.shape
+            embedded[:kh, :kw] = kernel
+            embedded = np.roll(embedded, (-(kh // 2), -(kw // 2)), axis=(0, 1))
+            kernel_fft = sp_fft.fft2(embedded)
+            if self.decimations[i] == 1:
+                self._kernel_ffts[i] = kernel_fft
+            else:
+                self._windows[i], self._kernel_ffts[i] = _spectral_window(kernel_fft, self.decimations[i])
+
+    def __len__(self):
+        return len(self.params)
+
+    def image_fft(self, image_np):
+        """
+        Computes the padded FFT of an image, shared by every filter in the bank.
+
+        Args:
+            image_np (numpy.ndarray): The input grayscale image, matching ``image_shape``.
+
+        Returns:
+            numpy.ndarray: The complex spectrum of the padded image.
+        """
+        if image_np.shape[:2] != self.image_shape:
+            raise ValueError(
+                f"Image shape {image_np.shape[:2]} does not match bank shape {self.image_shape}."
+            )
+        pad_y, pad_x = self.pad
+        padded = np.pad(image_np.astype(np.float64, copy=False), ((pad_y, pad_y), (pad_x, pad_x)), mode='symmetric')
+        return sp_fft.fft2(padded, s=self.fft_shape)
+
+    def magnitude(self, image_fft, index, upsample=True, out=None):
+        """
+        Computes the magnitude response of a single filter from a precomputed image FFT.
+
+        Args:
+            image_fft (numpy.ndarray): The output of ``image_fft``.
+            index (int): Index of the filter in ``params``.
+            upsample (bool): In pyramid mode, return decimated responses at full resolution
+                (bicubic interpolation). If False they are returned at 1/``decimations[index]``
+                of the resolution, e.g. for pooling.
+            out (numpy.ndarray, optional): A preallocated (height, width) array, e.g. float32,
+                to write a full-resolution response into.
+
+        Returns:
+            numpy.ndarray: The Gabor magnitude response, with the same shape as the input image.
+        """
+        height, width = self.image_shape
+        pad_y, pad_x = self.pad
+        step = self.decimations[index]
+        if step == 1:
+            response = sp_fft.ifft2(image_fft * self._kernel_ffts[index], overwrite_x=True)
+            return np.abs(response[pad_y:pad_y + height, pad_x:pad_x + width], out=out)
+
+        # Only the spectral window around the filter's centre frequency is transformed back,
+        # which yields the (demodulated) response on every step-th pixel.
+        rows, cols = self._windows[index]
+        response = sp_fft.ifft2(image_fft[rows[:, None], cols] * self._kernel_ffts[index], overwrite_x=True)
+        small_height, small_width = -(-height // step), -(-width // step)
+        small = np.abs(response[pad_y // step:pad_y // step + small_height, pad_x // step:pad_x // step + small_width])
+        small /= step * step
+        if not upsample:
+            return small
+        upsampled = cv2.resize(small, (small_width * step, small_height * step), interpolation=cv2.INTER_CUBIC)[:height, :width]
+        if out is None:
+            return upsampled
+        out[...] = upsampled
+        return out
+
+    def magnitudes(self, image_np, out=None):
+        """
+        Computes the magnitude responses of every filter in the bank.
+
+        Args:
+            image_np (numpy.ndarray): The input grayscale image, matching ``image_shape``.
+            out (numpy.ndarray, optional): A preallocated (n_filters, height, width) array to write into.
+
+        Returns:
+            numpy.ndarray: An array of shape (n_filters, height, width) with one magnitude response per filter.
+        """
+        spectrum = self.image_fft(image_np)
+        if out is None:
+            out = np.empty((len(self),) + self.image_shape, dtype=np.float64)
+        for i in range(len(self)):
+            self.magnitude(spectrum, i, out=out[i])
+        return out
+
+
+def _decimation(freq, bandwidth, n_stds, max_decimation):
+    """
+    Returns the largest power-of-two decimation (up to ``max_decimation``) whose spectral window
+    still holds the filter's passband, +-``n_stds`` standard deviations around its centre frequency.
+    """
+    # Spatial sigma as in skimage.filters.gabor_kernel, and the matching frequency-domain sigma
+    sigma = 1.0 / np.pi * np.sqrt(np.log(2) / 2.0) * (2.0 ** bandwidth + 1) / (2.0 ** bandwidth - 1) / freq
+    sigma_freq = 1.0 / (2 * np.pi * sigma)
+    step = 1
+    while step * 2 <= max_decimation and 2 * (step * 2) * n_stds * sigma_freq <= 1:
+        step *= 2
+    return step
+
+
+def _spectral_window(kernel_fft, step):
+    """
+    Cuts the 1/step-sized window around the peak of a kernel spectrum.
+
+    The kernel is shifted by (step - 1) / 2 pixels first, so the decimated response is
+    sampled at the pixel centres ``cv2.resize`` assumes when upsampling it again.
+
+    Returns:
+        tuple: The (rows, cols) indices of the window, in FFT order, and the windowed kernel.
+    """
+    shape = kernel_fft.shape
+    centre = np.unravel_index(np.argmax(np.abs(kernel_fft)), shape)
+    indices = []
+    for size, c in zip(shape, centre):
+        m = size // step
+        indices.append((c + np.fft.fftfreq(m, 1.0 / m).astype(int)) % size)
+    rows, cols = indices
+
+    shift = (step - 1) / 2
+    freq_rows = np.fft.fftfreq(shape[0])[rows]
+    freq_cols = np.fft.fftfreq(shape[1])[cols]
+    phase = np.exp(2j * np.pi * shift * (freq_rows[:, None] + freq_cols[None, :]))
+    return (rows, cols), kernel_fft[rows[:, None], cols] * phase
+
+
+@lru_cache(maxsize=8)
+def _bank_from_config(config):
+    """Rebuilds (and caches, per process) a GaborBank from its ``config``."""
+    image_shape, thetas, freqs, bandwidth, n_stds, pyramid, max_decimation = config
+    return GaborBank(image_shape, thetas=thetas, freqs=freqs, bandwidth=bandwidth, n_stds=n_stds,
+                     pyramid=pyramid, max_decimation=max_decimation)
+
+
+OUTPUTS = ('responses', 'fused', 'pooled')
+
+
+def _cell_starts(size, n_cells):
+    """First pixel and pixel count of each cell; cells are empty where ``size < n_cells``."""
+    if n_cells < 1:
+        raise ValueError(f"Cannot split {size} pixels into {n_cells} cells.")
+    starts = (np.arange(n_cells) * size) // n_cells
+    return starts, np.diff(np.append(starts, size))
+
+
+def pooled_statistics(magnitude, grid=(4, 4)):
+    """
+    Pools a magnitude response over a grid of cells.
+
+    Args:
+        magnitude (numpy.ndarray): A (height, width) magnitude response.
+        grid (tuple): Number of (rows, cols) cells. Cell borders are spread evenly over the image,
+            as for ``LBPEngine`` histograms; when the response has fewer rows or columns than
+            the grid, the empty cells are pooled to 0, like empty LBP cells.
+
+    Returns:
+        numpy.ndarray: Array of shape (grid_rows, grid_cols, 3) holding the mean, variance and
+        energy (mean of squares) of every cell.
+    """
+    height, width = magnitude.shape
+    (rows, row_sizes), (cols, col_sizes) = _cell_starts(height, grid[0]), _cell_starts(width, grid[1])
+    stats = np.zeros((grid[0], grid[1], 3))
+    used_rows, used_cols = row_sizes > 0, col_sizes > 0
+    if not used_rows.any() or not used_cols.any():
+        return stats
+    rows, cols = rows[used_rows], cols[used_cols]
+    sizes = row_sizes[used_rows][:, None] * col_sizes[used_cols][None, :]
+    mean = np.add.reduceat(np.add.reduceat(magnitude, rows, axis=0), cols, axis=1) / sizes
+    energy = np.add.reduceat(np.add.reduceat(np.square(magnitude), rows, axis=0), cols, axis=1) / sizes
+    stats[np.ix_(used_rows, used_cols)] = np.stack([mean, np.maximum(energy - mean ** 2, 0), energy], axis=-1)
+    return stats
+
+
+def _run_filters(bank, spectrum, indices, output, grid, responses=None, progress=None):
+    """
+    Runs the filters ``indices`` on one image spectrum.
+
+    Full responses (output 'responses') or pooled statistics (output 'pooled') are written
+    into ``responses``; the responses are then dropped one at a time, so at most one
+    full-resolution map is alive per call besides the running sum. Float64 ``responses``
+    are filled in place; for other dtypes (e.g. float32) each response is computed in a
+    float64 scratch map, added to the sum and only then rounded into ``responses``, so the
+    sum does not depend on the output dtype.
+
+    Returns:
+        numpy.ndarray or None: The float64 sum of the responses, or None for output 'pooled'.
+    """
+    total = None
+    in_place = responses is not None and responses.dtype == np.float64
+    for i in indices:
+        if output == 'pooled':
+            responses[i] = pooled_statistics(bank.magnitude(spectrum, i, upsample=False), grid)
+        else:
+            magnitude = bank.magnitude(spectrum, i, out=responses[i] if in_place else None)
+            if responses is not None and not in_place:
+                responses[i] = magnitude
+            if total is None:
+                total = magnitude.copy() if in_place else magnitude
+            else:
+                total += magnitude
+        if progress is not None:
+            progress.update(1)
+    return total
+
+
+def _output_shapes(bank, output, grid, n_images=None):
+    """Returns the shapes of the (responses or pooled statistics, fused map) outputs, None where absent."""
+    lead = () if n_images is None else (n_images,)
+    if output == 'pooled':
+        return lead + (len(bank), grid[0], grid[1], 3), None
+    fused = lead + bank.image_shape
+    if output == 'fused':
+        return None, fused
+    return lead + (len(bank),) + bank.image_shape, fused
+
+
+def _attach(path):
+    return None if path is None else SharedArray.attach(path, writable=True)
+
+
+def _filters_task(config, image_path, out_path, indices, output, grid):
+    """Process-pool task: computes a subset of filters for one shared image."""
+    bank = _bank_from_config(config)
+    out = _attach(out_path)
+    spectrum = bank.image_fft(SharedArray.attach(image_path))
+    total = _run_filters(bank, spectrum, indices, output, grid, out)
+    if out is not None:
+        out.flush()
+    return len(indices), total
+
+
+def _image_outputs(bank, image_np, output, grid, responses=None, fused=None):
+    """Computes every filter for one image, writing the responses (or statistics) and fused map in place."""
+    total = _run_filters(bank, bank.image_fft(image_np), range(len(bank)), output, grid, responses)
+    if fused is not None:
+        np.divide(total, len(bank), out=fused)
+
+
+def _images_task(config, images_path, responses_path, fused_path, indices, output, grid):
+    """Process-pool task: computes every filter for a subset of shared images."""
+    bank = _bank_from_config(config)
+    images = SharedArray.attach(images_path)
+    responses, fused = _attach(responses_path), _attach(fused_path)
+    for n in indices:
+        _image_outputs(bank, images[n], output, grid,
+                       None if responses is None else responses[n], None if fused is None else fused[n])
+    for out in (responses, fused):
+        if out is not None:
+            out.flush()
+    return len(indices)
+
+
+def _split(n_items, n_chunks):
+    return [chunk for chunk in np.array_split(np.arange(n_items), max(1, min(n_items, n_chunks))) if len(chunk)]
+
+
+def extract_gabor_features(image_np, thetas=None, freqs=None, bank=None, backend=None, max_workers=None, pyramid=False,
+                           output='responses', dtype=np.float64, grid=(4, 4), out=None):
     """
     Extracts Gabor features from an image.
 
+    The fused map is a running mean, so no stack of responses is built. With output 'fused'
+    or 'pooled' the full-resolution responses are discarded as soon as they are used, which
+    bounds memory to a few image-sized arrays per worker regardless of the number of filters.
+
     Args:
         image_np (numpy.ndarray): The input image as a NumPy array (preferably grayscale).
         thetas (list, optional): List of orientations (in radians). Defaults to 8 orientations from 0 to pi.
         freqs (list, optional): List of frequencies. Defaults to [0.1, 0.4, 0.7].
+        bank (GaborBank, optional): A prebuilt filter bank to reuse across calls. If given,
+            ``thetas`` and ``freqs`` are ignored.
+        backend (str or backend, optional): Runs the filters in parallel on a persistent pool:
+            'threads', 'processes' (image and responses shared through memory maps), or a backend
+            from ``backends.get_backend``. Defaults to None, which runs serially.
+        max_workers (int, optional): Worker cap when ``backend`` is given by name.
+        pyramid (bool): If True, compute low-frequency responses at reduced resolution
+            (see ``GaborBank``). Ignored when ``bank`` is given.
+        output (str): 'responses' for every magnitude response plus the fused map, 'fused' for
+            the fused map only, or 'pooled' for per-filter statistics (see ``pooled_statistics``).
+        dtype (numpy.dtype): Type of the returned arrays, e.g. ``np.float32`` to halve their size.
+            Filtering and fusion always run in float64.
+        grid (tuple): Number of (rows, cols) pooling cells for output 'pooled'.
+        out (numpy.ndarray, optional): A preallocated array for the main output: the
+            (n_filters, H, W) responses, the (H, W) fused map, or the (n_filters, grid_rows,
+            grid_cols, 3) statistics. Its dtype overrides ``dtype``.
 
     Returns:
-        tuple: A tuple containing:
-            - list: A list of individual Gabor magnitude responses.
+        For output 'responses', a tuple containing:
+            - list: A list of individual Gabor magnitude responses (views into one array).
             - numpy.ndarray: The fused feature map (average pooling).
+        For output 'fused', the fused feature map. For output 'pooled', the statistics array.
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output '{output}'. Choose from {OUTPUTS}.")
+    if bank is None:
+        bank = GaborBank(image_np.shape, thetas=thetas, freqs=freqs, pyramid=pyramid)
+    n_filters = len(bank)
+    responses_shape, fused_shape = _output_shapes(bank, output, grid)
+    main_shape = responses_shape if responses_shape is not None else fused_shape
+    if out is None:
+        out = np.empty(main_shape, dtype=dtype)
+    elif out.shape != main_shape:
+        raise ValueError(f"out has shape {out.shape}, expected {main_shape}.")
+    responses = out if responses_shape is not None else None
+    fused = out if output == 'fused' else np.empty(fused_shape, dtype=out.dtype) if fused_shape else None
+    count('gabor.bytes', out.nbytes + (fused.nbytes if fused is not None and fused is not out else 0))
+
+    progress = progress_bar(n_filters, "Processing Gabor Filters")
+    pool = get_backend(backend, max_workers) if backend is not None else None
+
+    with stage('gabor.filtering', n_filters=n_filters):
+        chunks = _split(n_filters, pool.max_workers) if pool is not None else [range(n_filters)]
+        if pool is not None and pool.kind == 'processes':
+            with SharedArray.from_array(image_np) as image:
+                shared = SharedArray(responses.shape, responses.dtype) if responses is not None else None
+                try:
+                    totals = []
+                    out_path = None if shared is None else shared.descriptor
+                    for done, total in pool.map(_filters_task, [bank.config] * len(chunks), [image.descriptor] * len(chunks),
+                                                [out_path] * len(chunks), chunks, [output] * len(chunks), [grid] * len(chunks)):
+                        progress.update(done)
+                        totals.append(total)
+                    if shared is not None:
+                        responses[...] = shared.array
+                finally:
+                    if shared is not None:
+                        shared.close()
+        else:
+            spectrum = bank.image_fft(image_np)
+
+            def run(chunk):
+                return _run_filters(bank, spectrum, chunk, output, grid, responses, progress)
+
+            totals = [run(chunk) for chunk in chunks] if pool is None else list(pool.map(run, chunks))
+    progress.close()
+
+    if output == 'pooled':
+        return out
+
+    # Average fusion of responses, from the per-chunk running sums
+    with stage('gabor.fusion'):
+        total = totals[0]
+        for partial in totals[1:]:
+            total += partial
+        np.divide(total, n_filters, out=fused)
+
+    if output == 'fused':
+        return fused
+    return list(responses), fused
+
+
+def extract_gabor_features_batch(images, thetas=None, freqs=None, bank=None, backend='threads', max_workers=None, batch_size=32,
+                                 pyramid=False, output='responses', dtype=np.float64, grid=(4, 4)):
+    """
+    Extracts Gabor features from many same-sized images, parallelising across images rather than filters.
+
+    Each worker runs every filter of the bank on whole images, which keeps pools busy
+    without the per-filter scheduling of ``extract_gabor_features`` and suits batch jobs.
+
+    Args:
+        images (numpy.ndarray or iterable): A stack of grayscale images of shape (N, H, W), or any
+            iterable of images (processed ``batch_size`` at a time). A ``numpy.memmap`` of a ``.npy``
+            file is shared with process workers without copying.
+        thetas (list, optional): List of orientations (in radians). Defaults to 8 orientations from 0 to pi.
+        freqs (list, optional): List of frequencies. Defaults to [0.1, 0.4, 0.7].
+        bank (GaborBank, optional): A prebuilt filter bank. If given, ``thetas`` and ``freqs`` are ignored.
+        backend (str or backend, optional): 'threads', 'processes', a backend instance, or None for serial.
+        max_workers (int, optional): Worker cap when ``backend`` is given by name.
+        batch_size (int): Number of images per batch when ``images`` is not an array.
+        pyramid (bool): If True, compute low-frequency responses at reduced resolution
+            (see ``GaborBank``). Ignored when ``bank`` is given.
+        output (str): 'responses', 'fused' or 'pooled', as in ``extract_gabor_features``.
+        dtype (numpy.dtype): Type of the returned arrays.
+        grid (tuple): Number of (rows, cols) pooling cells for output 'pooled'.
+
+    Returns:
+        For output 'responses', a tuple containing:
+            - numpy.ndarray: Magnitude responses of shape (N, n_filters, H, W).
+            - numpy.ndarray: The fused feature maps (average pooling) of shape (N, H, W).
+        For output 'fused', the (N, H, W) fused maps. For output 'pooled', the statistics of
+        shape (N, n_filters, grid_rows, grid_cols, 3).
     """
-    # Define filter parameters
-    if thetas is None:
-        thetas = np.arange(0, np.pi, np.pi / 8)  # 8 orientations
-    if freqs is None:
-        freqs = [0.1, 0.4, 0.7]  # 3 frequencies
-    
-    total_filters = len(thetas) * len(freqs)
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output '{output}'. Choose from {OUTPUTS}.")
+    if not isinstance(images, np.ndarray):
+        stream = extract_gabor_features_stream(images, thetas, freqs, bank, backend, max_workers, batch_size,
+                                               pyramid, output, dtype, grid)
+        return collect(stream, batch_length(images))
+
+    if bank is None:
+        bank = GaborBank(images.shape[1:3], thetas=thetas, freqs=freqs, pyramid=pyramid)
+    n_images = len(images)
+    shapes = _output_shapes(bank, output, grid, n_images)
+    count('gabor.bytes', sum(int(np.prod(shape)) for shape in shapes if shape) * np.dtype(dtype).itemsize)
+
+    pool = get_backend(backend, max_workers) if backend is not None else None
+    with stage('gabor.filtering', n_images=n_images, n_filters=len(bank)):
+        responses, fused = _batch_outputs(images, bank, pool, shapes, output, dtype, grid)
+
+    if output == 'responses':
+        return responses, fused
+    return fused if output == 'fused' else responses
 
-    all_params = [(theta, freq) for theta in thetas for freq in freqs]
 
-    def apply_gabor_filter(args, image):
-        theta, freq = args
-        filt_real, filt_imag = gabor(image, frequency=freq, theta=theta)
-        result = np.sqrt(filt_real**2 + filt_imag**2)
-        return result
+def _batch_outputs(images, bank, pool, shapes, output, dtype, grid):
+    """Computes the (responses or statistics, fused) outputs of a stack of images on ``pool`` (or serially)."""
+    n_images = len(images)
+    if pool is not None and pool.kind == 'processes':
+        shared = [None if shape is None else SharedArray(shape, dtype) for shape in shapes]
+        try:
+            with SharedArray.from_array(images) as shared_images:
+                paths = [None if array is None else array.descriptor for array in shared]
+                chunks = _split(n_images, pool.max_workers)
+                list(pool.map(_images_task, [bank.config] * len(chunks), [shared_images.descriptor] * len(chunks),
+                              [paths[0]] * len(chunks), [paths[1]] * len(chunks), chunks,
+                              [output] * len(chunks), [grid] * len(chunks)))
+            return tuple(None if array is None else np.array(array.array) for array in shared)
+        finally:
+            for array in shared:
+                if array is not None:
+                    array.close()
 
-    magnitude_responses = Parallel(n_jobs=-1)(
-        delayed(apply_gabor_filter)((theta, freq), image_np)
-        for theta, freq in tqdm(all_params, desc="Processing Gabor Filters", total=total_filters, ncols=100)
-    )
+    responses, fused = (None if shape is None else np.empty(shape, dtype=dtype) for shape in shapes)
 
-    # Average fusion of responses
-    stacked = np.stack(magnitude_responses, axis=-1)
-    avg_fused = np.mean(stacked, axis=-1)
+    def run(n):
+        _image_outputs(bank, images[n], output, grid,
+                       None if responses is None else responses[n], None if fused is None else fused[n])
 
-    return magnitude_responses, avg_fused
+    if pool is None:
+        for n in range(n_images):
+            run(n)
+    else:
+        list(pool.map(run, range(n_images)))
+    return responses, fused
+
+
+def extract_gabor_features_stream(images, thetas=None, freqs=None, bank=None, backend='threads', max_workers=None, batch_size=32,
+                                  pyramid=False, output='responses', dtype=np.float64, grid=(4, 4)):
+    """
+    Extracts Gabor features from a stream of images, batch by batch, with memory bounded by ``batch_size``.
+
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W) stack or any iterable of grayscale images.
+        thetas (list, optional): List of orientations (in radians). Defaults to 8 orientations from 0 to pi.
+        freqs (list, optional): List of frequencies. Defaults to [0.1, 0.4, 0.7].
+        bank (GaborBank, optional): A prebuilt filter bank. If given, ``thetas`` and ``freqs`` are ignored.
+        backend (str or backend, optional): 'threads', 'processes', a backend instance, or None for serial.
+        max_workers (int, optional): Worker cap when ``backend`` is given by name.
+        batch_size (int): Number of images processed per batch.
+        pyramid (bool): If True, compute low-frequency responses at reduced resolution
+            (see ``GaborBank``). Ignored when ``bank`` is given.
+        output (str): 'responses', 'fused' or 'pooled', as in ``extract_gabor_features``.
+        dtype (numpy.dtype): Type of the returned arrays.
+        grid (tuple): Number of (rows, cols) pooling cells for output 'pooled'.
+
+    Yields:
+        For each batch, the outputs of ``extract_gabor_features_batch``, e.g. the magnitude
+        responses (B, n_filters, H, W) and fused maps (B, H, W).
+    """
+    for batch in iter_batches(images, batch_size):
+        if bank is None or bank.image_shape != batch.shape[1:3]:
+            bank = GaborBank(batch.shape[1:3], thetas=thetas, freqs=freqs, pyramid=pyramid)
+        yield extract_gabor_features_batch(batch, bank=bank, backend=backend, max_workers=max_workers,
+                                           output=output, dtype=dtype, grid=grid)
@@ -0,0 +1,303 @@
+"""
+A nearest-neighbour index over face descriptors (LBP histograms, HOG vectors, ...).
+
+Descriptors are kept in one contiguous float32 array, or as uint8 codes with a
+per-feature scale for large galleries (4x smaller, approximate distances). Queries are
+answered for whole batches of probes at once: the gallery is scanned in blocks, the
+probe-to-block distances are computed with matrix products (L2, cosine) or bounded
+broadcasting (chi-square), and a running top-k is kept with ``argpartition``.
+"""
+import json
+import os
+
+import numpy as np
+
+from .instrumentation import count, stage
+
+METRICS = ('chi2', 'l2', 'cosine')
+
+_DESCRIPTORS_FILE = 'descriptors.npy'
+_IDS_FILE = 'ids.npy'
+_META_FILE = 'meta.json'
+
+# Gallery elements per chi-square sub-block (256 KB of float32, so it stays in cache)
+_CHI2_ELEMENTS = 1 << 16
+
+
+def _block_distances(probes, block, metric):
+    """Returns the (n_probes, n_block) distances between float32 probes and a float32 gallery block."""
+    if metric == 'l2':
+        distances = np.square(probes).sum(axis=1)[:, None] - 2 * (probes @ block.T)
+        distances += np.square(block).sum(axis=1)[None, :]
+        return np.maximum(distances, 0, out=distances)
+    if metric == 'cosine':
+        norms = np.linalg.norm(block, axis=1)
+        norms[norms == 0] = 1
+        return 1 - (probes @ block.T) / norms[None, :]
+
+    # Chi-square: sum((p - g)^2 / (p + g)), with 0/0 taken as 0. Each probe is compared
+    # with cache-sized sub-blocks, which is several times faster than one large broadcast.
+    distances = np.empty((len(probes), len(block)), dtype=np.float32)
+    rows = max(1, _CHI2_ELEMENTS // block.shape[1])
+    tiny = np.float32(np.finfo(np.float32).tiny)
+    for start in range(0, len(block), rows):
+        sub = block[start:start + rows]
+        for i, probe in enumerate(probes):
+            total = probe + sub
+            total += tiny
+            terms = probe - sub
+            terms *= terms
+            terms /= total
+            distances[i, start:start + rows] = terms.sum(axis=1)
+    return distances
+
+
+def _write_atomic(filename, write):
+    """Calls ``write`` on a temporary binary file, then renames it to ``filename``."""
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as f:
+        write(f)
+    os.replace(tmp_filename, filename)
+
+
+class GalleryIndex:
+    """
+    A growable gallery of descriptors with batched top-k search.
+
+    Every descriptor gets a stable integer id (and an optional label). Removed entries are
+    masked out of searches at once and dropped from storage by ``compact`` (or ``save``).
+
+    Args:
+        n_features (int): Length of the descriptors.
+        metric (str): Default distance, 'chi2' (for histograms such as LBP), 'l2' or 'cosine'.
+        dtype (numpy.dtype): Storage type, float32 (exact) or uint8 (quantised: each feature
+            is stored as ``round(value / scale * 255)``, which makes distances approximate).
+        scale (array-like, optional): Per-feature (or scalar) maximum of the values for uint8
+            storage, e.g. 1 for normalised LBP histograms. Defaults to the per-feature maximum
+            of the first descriptors added; larger values added later are clipped.
+    """
+
+    def __init__(self, n_features, metric='chi2', dtype=np.float32, scale=None):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Choose from {METRICS}.")
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.uint8):
+            raise ValueError("dtype must be float32 or uint8.")
+        self.n_features = n_features
+        self.metric = metric
+        self.dtype = dtype
+        self.scale = None if scale is None else np.broadcast_to(np.asarray(scale, dtype=np.float32), (n_features,)).copy()
+        self._data = np.empty((0, n_features), dtype=dtype)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._active = np.empty(0, dtype=bool)
+        self._labels = []
+        self._size = 0
+        self._next_id = 0
+
+    def __len__(self):
+        """Number of descriptors, not counting removed ones."""
+        return int(np.count_nonzero(self._active[:self._size]))
+
+    @property
+    def descriptors(self):
+        """The stored descriptors (including removed ones until ``compact``), as a read-only view."""
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def ids(self):
+        """The ids of the stored descriptors (including removed ones until ``compact``)."""
+        return self._ids[:self._size]
+
+    def _quantize(self, descriptors):
+        if self.scale is None:
+            self.scale = np.maximum(descriptors.max(axis=0), np.finfo(np.float32).tiny)
+        codes = np.rint(descriptors * (255 / self.scale))
+        return np.clip(codes, 0, 255, out=codes).astype(np.uint8)
+
+    def _dequantize(self, block):
+        if self.dtype == np.uint8:
+            return block.astype(np.float32) * (self.scale / 255)
+        return block
+
+    def _reserve(self, n_rows):
+        """Grows the storage (by doubling) to hold ``n_rows`` rows; a memory-mapped gallery is copied to memory."""
+        if n_rows <= len(self._data) and self._data.flags.writeable:
+            return
+        capacity = max(n_rows, 2 * len(self._data), 1024)
+        data = np.empty((capacity, self.n_features), dtype=self.dtype)
+        count('gallery.bytes', data.nbytes)
+        data[:self._size] = self._data[:self._size]
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        active = np.zeros(capacity, dtype=bool)
+        active[:self._size] = self._active[:self._size]
+        self._data, self._ids, self._active = data, ids, active
+
+    def add(self, descriptors, labels=None):
+        """
+        Adds descriptors to the gallery.
+
+        Args:
+            descriptors (numpy.ndarray): An (n_features,) descriptor or (N, n_features) batch.
+            labels (list, optional): A JSON-serialisable label (e.g. a person id) per descriptor.
+
+        Returns:
+            numpy.ndarray: The ids of the new entries.
+        """
+        descriptors = np.asarray(descriptors, dtype=np.float32).reshape(-1, self.n_features)
+        n_new = len(descriptors)
+        if labels is not None and len(labels) != n_new:
+            raise ValueError(f"Got {len(labels)} labels for {n_new} descriptors.")
+
+        self._reserve(self._size + n_new)
+        rows = slice(self._size, self._size + n_new)
+        self._data[rows] = self._quantize(descriptors) if self.dtype == np.uint8 else descriptors
+        ids = np.arange(self._next_id, self._next_id + n_new, dtype=np.int64)
+        self._ids[rows] = ids
+        self._active[rows] = True
+        self._labels.extend([None] * n_new if labels is None else list(labels))
+        self._size += n_new
+        self._next_id += n_new
+        return ids
+
+    def remove(self, ids):
+        """
+        Removes entries by id; they are excluded from searches immediately.
+
+        Args:
+            ids (array-like): Ids returned by ``add``.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        rows = np.flatnonzero(np.isin(self._ids[:self._size], np.asarray(ids, dtype=np.int64)) & self._active[:self._size])
+        self._active[rows] = False
+        return len(rows)
+
+    def compact(self):
+        """Drops removed entries from storage."""
+        keep = np.flatnonzero(self._active[:self._size])
+        if len(keep) == self._size:
+            return
+        self._data = self._data[keep]
+        self._ids = self._ids[keep]
+        self._active = np.ones(len(keep), dtype=bool)
+        self._labels = [self._labels[i] for i in keep]
+        self._size = len(keep)
+
+    def labels(self, ids):
+        """
+        Returns the labels of entries.
+
+        Args:
+            ids (array-like): Ids, e.g. from ``search``; -1 (no result) gives None.
+
+        Returns:
+            list: The labels, in the shape of ``ids`` (nested lists for 2-D input).
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        flat = ids.ravel()
+        if not self._size:
+            return np.full(ids.shape, None, dtype=object).tolist()
+        # Ids are assigned in increasing order and compaction keeps that order
+        stored = self._ids[:self._size]
+        rows = np.minimum(np.searchsorted(stored, flat), self._size - 1)
+        found = (flat >= 0) & (stored[rows] == flat)
+        labels = [self._labels[row] if ok else None for row, ok in zip(rows.tolist(), found.tolist())]
+        return np.array(labels, dtype=object).reshape(ids.shape).tolist()
+
+    def search(self, probes, k=1, metric=None, block_size=16384):
+        """
+        Finds the k nearest gallery entries of every probe.
+
+        Args:
+            probes (numpy.ndarray): An (n_features,) probe or (P, n_features) batch.
+            k (int): Number of neighbours per probe.
+            metric (str, optional): 'chi2', 'l2' or 'cosine'. Defaults to the index metric.
+            block_size (int): Gallery rows compared per step, which bounds the temporary
+                memory to about P * block_size distances.
+
+        Returns:
+            tuple: (distances, ids), both of shape (P, k) and sorted by distance. L2 distances
+            are squared. Missing neighbours (fewer than k entries) have distance inf and id -1.
+        """
+        metric = metric or self.metric
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Choose from {METRICS}.")
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, self.n_features)
+        if metric == 'cosine':
+            norms = np.linalg.norm(probes, axis=1, keepdims=True)
+            probes = probes / np.where(norms == 0, 1, norms)
+
+        n_probes = len(probes)
+        best_distances = np.full((n_probes, k), np.inf, dtype=np.float32)
+        best_rows = np.full((n_probes, k), -1, dtype=np.int64)
+        with stage('gallery.search', n_probes=n_probes, n_gallery=self._size, metric=metric):
+            for start in range(0, self._size, block_size):
+                stop = min(start + block_size, self._size)
+                distances = _block_distances(probes, self._dequantize(self._data[start:stop]), metric)
+                distances = distances.astype(np.float32, copy=False)
+                distances[:, ~self._active[start:stop]] = np.inf
+
+                candidates = np.concatenate([best_distances, distances], axis=1)
+                rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, stop), distances.shape)], axis=1)
+                if candidates.shape[1] > k:
+                    keep = np.argpartition(candidates, k - 1, axis=1)[:, :k]
+                    candidates = np.take_along_axis(candidates, keep, axis=1)
+                    rows = np.take_along_axis(rows, keep, axis=1)
+                best_distances, best_rows = candidates, rows
+
+        order = np.argsort(best_distances, axis=1, kind='stable')
+        best_distances = np.take_along_axis(best_distances, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        found = np.isfinite(best_distances)
+        ids = np.where(found, self._ids[np.maximum(best_rows, 0)] if self._size else -1, -1)
+        return best_distances, ids
+
+    def save(self, path):
+        """
+        Compacts the gallery and saves it to a directory (descriptors, ids and metadata).
+
+        Every file is written next to its destination and then renamed over it, so saving
+        a gallery back to the directory it was memory-mapped from is safe.
+
+        Args:
+            path (str): The directory. Created if missing.
+        """
+        self.compact()
+        os.makedirs(path, exist_ok=True)
+        meta = {
+            'n_features': self.n_features, 'metric': self.metric, 'dtype': self.dtype.str,
+            'scale': None if self.scale is None else self.scale.tolist(),
+            'next_id': self._next_id, 'labels': self._labels,
+        }
+        _write_atomic(os.path.join(path, _DESCRIPTORS_FILE), lambda f: np.save(f, self._data[:self._size]))
+        _write_atomic(os.path.join(path, _IDS_FILE), lambda f: np.save(f, self._ids[:self._size]))
+        _write_atomic(os.path.join(path, _META_FILE), lambda f: f.write(json.dumps(meta).encode()))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a gallery saved with ``save``.
+
+        Args:
+            path (str): The directory.
+            mmap (bool): If True, descriptors are memory-mapped read-only, so opening a large
+                gallery is instant and its pages are shared between processes. Adding
+                descriptors then copies the gallery into memory.
+
+        Returns:
+            GalleryIndex: The gallery.
+        """
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        index = cls(meta['n_features'], meta['metric'], np.dtype(meta['dtype']), meta['scale'])
+        index._data = np.load(os.path.join(path, _DESCRIPTORS_FILE), mmap_mode='r' if mmap else None)
+        index._ids = np.load(os.path.join(path, _IDS_FILE))
+        index._size = len(index._ids)
+        index._active = np.ones(index._size, dtype=bool)
+        index._labels = meta['labels']
+        index._next_id = meta['next_id']
+        return index
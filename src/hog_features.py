@@ -1,6 +1,184 @@
+from functools import lru_cache
+
+import cv2
 import numpy as np
 from skimage import color, feature, exposure
 
+from .batching import batch_length, collect, iter_batches
+from .instrumentation import count, stage
+
+_BLOCK_NORMS = ('L1', 'L1-sqrt', 'L2', 'L2-Hys')
+
+
+class HOGEngine:
+    """
+    A vectorised HOG engine for a fixed image shape and parameter set.
+
+    The cell each pixel votes into and the cells that make up each block are computed
+    once at construction. Descriptors for a whole batch are then produced with a few
+    NumPy passes (gradients, one ``bincount`` for all cell histograms, one vectorised
+    block normalisation), following the same binning and normalisation as
+    ``skimage.feature.hog``.
+
+    Args:
+        image_shape (tuple): The (height, width) of the grayscale images.
+        orientations (int): Number of gradient orientations.
+        pixels_per_cell (tuple): Size (in pixels) of a cell.
+        cells_per_block (tuple): Number of cells in each block.
+        block_norm (str): Normalisation method for blocks ('L1', 'L1-sqrt', 'L2' or 'L2-Hys').
+        dtype (numpy.dtype): Data type of the returned descriptors. Defaults to float32.
+    """
+
+    def __init__(self, image_shape, orientations=9, pixels_per_cell=(8, 8), cells_per_block=(2, 2), block_norm='L2-Hys', dtype=np.float32):
+        if block_norm not in _BLOCK_NORMS:
+            raise ValueError('Selected block normalization method is invalid.')
+
+        self.image_shape = tuple(image_shape[:2])
+        self.orientations = orientations
+        self.pixels_per_cell = tuple(pixels_per_cell)
+        self.cells_per_block = tuple(cells_per_block)
+        self.block_norm = block_norm
+        self.dtype = dtype
+
+        c_row, c_col = self.pixels_per_cell
+        b_row, b_col = self.cells_per_block
+        self.n_cells = (self.image_shape[0] // c_row, self.image_shape[1] // c_col)
+        self.n_blocks = (self.n_cells[0] - b_row + 1, self.n_cells[1] - b_col + 1)
+        if self.n_blocks[0] <= 0 or self.n_blocks[1] <= 0:
+            raise ValueError(
+                'The input image is too small given the values of '
+                'pixels_per_cell and cells_per_block. '
+                f'It should have at least: {b_row * c_row} rows and {b_col * c_col} cols.'
+            )
+        # Only whole cells contribute, as in skimage
+        self.crop = (self.n_cells[0] * c_row, self.n_cells[1] * c_col)
+
+        # Cell id of every pixel in the cropped region
+        rows = np.arange(self.crop[0]) // c_row
+        cols = np.arange(self.crop[1]) // c_col
+        self._pixel_cells = (rows[:, None] * self.n_cells[1] + cols[None, :]).ravel()
+
+        # Cell ids of every block, in (block_row, block_col, cell_row, cell_col) order
+        block_rows = np.arange(self.n_blocks[0])[:, None, None, None] + np.arange(b_row)[None, None, :, None]
+        block_cols = np.arange(self.n_blocks[1])[None, :, None, None] + np.arange(b_col)[None, None, None, :]
+        self._block_cells = (block_rows * self.n_cells[1] + block_cols).reshape(-1)
+
+        # Orientation bin edges, computed exactly as skimage compares them
+        step = 180. / orientations
+        self._bin_edges = step * np.arange(1, orientations)
+
+    @property
+    def n_features(self):
+        """Length of one descriptor."""
+        return self.n_blocks[0] * self.n_blocks[1] * self.cells_per_block[0] * self.cells_per_block[1] * self.orientations
+
+    def cell_histograms(self, images):
+        """
+        Computes the orientation histogram of every cell for a batch of images.
+
+        Args:
+            images (numpy.ndarray): Grayscale images of shape (B, H, W) matching ``image_shape``.
+
+        Returns:
+            numpy.ndarray: Cell histograms of shape (B, n_cells_row, n_cells_col, orientations).
+        """
+        images = np.asarray(images, dtype=np.float64)
+        if images.shape[1:] != self.image_shape:
+            raise ValueError(f"Image shape {images.shape[1:]} does not match engine shape {self.image_shape}.")
+        n_images = len(images)
+        height, width = self.crop
+
+        # Central differences with zero gradient on the image border
+        g_row = np.zeros((n_images, height, width))
+        g_col = np.zeros((n_images, height, width))
+        count('hog.bytes', 2 * g_row.nbytes)
+        last_row = min(height, self.image_shape[0] - 1)
+        last_col = min(width, self.image_shape[1] - 1)
+        g_row[:, 1:last_row, :] = images[:, 2:last_row + 1, :width] - images[:, :last_row - 1, :width]
+        g_col[:, :, 1:last_col] = images[:, :height, 2:last_col + 1] - images[:, :height, :last_col - 1]
+
+        magnitude = np.hypot(g_col, g_row)
+        orientation = np.rad2deg(np.arctan2(g_row, g_col)) % 180
+        bins = np.searchsorted(self._bin_edges, orientation, side='right')
+
+        n_cells = self.n_cells[0] * self.n_cells[1]
+        index = bins.reshape(n_images, height * width)
+        index += self._pixel_cells * self.orientations
+        index += (np.arange(n_images) * n_cells * self.orientations)[:, None]
+        histograms = np.bincount(index.ravel(), weights=magnitude.ravel(), minlength=n_images * n_cells * self.orientations)
+        histograms = histograms.astype(np.float64, copy=False)  # bincount of an empty batch is int64
+        histograms /= self.pixels_per_cell[0] * self.pixels_per_cell[1]
+        return histograms.reshape(n_images, self.n_cells[0], self.n_cells[1], self.orientations)
+
+    def normalize_blocks(self, histograms):
+        """
+        Groups cell histograms into blocks and normalises them.
+
+        Args:
+            histograms (numpy.ndarray): Cell histograms as returned by ``cell_histograms``.
+
+        Returns:
+            numpy.ndarray: Descriptors of shape (B, n_features).
+        """
+        return self.block_grid(histograms).reshape(len(histograms), self.n_features)
+
+    def block_grid(self, histograms):
+        """
+        Groups cell histograms into normalised blocks, keeping the blocks' spatial layout.
+
+        Args:
+            histograms (numpy.ndarray): Cell histograms as returned by ``cell_histograms``.
+
+        Returns:
+            numpy.ndarray: Blocks of shape (B, n_blocks_row, n_blocks_col, block_features),
+            each block flattened in (cell_row, cell_col, orientation) order.
+        """
+        n_images = len(histograms)
+        block_features = self.cells_per_block[0] * self.cells_per_block[1] * self.orientations
+        cells = histograms.reshape(n_images, self.n_cells[0] * self.n_cells[1], self.orientations)
+        blocks = cells[:, self._block_cells].reshape(n_images, self.n_blocks[0] * self.n_blocks[1], block_features)
+
+        eps = 1e-5
+        if self.block_norm == 'L1':
+            blocks = blocks / (np.abs(blocks).sum(axis=-1, keepdims=True) + eps)
+        elif self.block_norm == 'L1-sqrt':
+            blocks = np.sqrt(blocks / (np.abs(blocks).sum(axis=-1, keepdims=True) + eps))
+        else:
+            blocks = blocks / np.sqrt((blocks ** 2).sum(axis=-1, keepdims=True) + eps ** 2)
+            if self.block_norm == 'L2-Hys':
+                np.minimum(blocks, 0.2, out=blocks)
+                blocks /= np.sqrt((blocks ** 2).sum(axis=-1, keepdims=True) + eps ** 2)
+
+        return blocks.reshape(n_images, self.n_blocks[0], self.n_blocks[1], block_features).astype(self.dtype, copy=False)
+
+    def compute_batch(self, images):
+        """
+        Computes HOG descriptors for a batch of grayscale images.
+
+        Args:
+            images (numpy.ndarray): Grayscale images of shape (B, H, W) matching ``image_shape``.
+
+        Returns:
+            numpy.ndarray: Descriptors of shape (B, n_features).
+        """
+        with stage('hog.histograms', batch_size=len(images)):
+            histograms = self.cell_histograms(images)
+        with stage('hog.normalization', batch_size=len(images)):
+            return self.normalize_blocks(histograms)
+
+    def compute(self, image_gray):
+        """
+        Computes the HOG descriptor of a single grayscale image.
+
+        Args:
+            image_gray (numpy.ndarray): A grayscale image matching ``image_shape``.
+
+        Returns:
+            numpy.ndarray: The HOG feature vector.
+        """
+        return self.compute_batch(image_gray[None])[0]
+
+
 def extract_hog_features(image_np, orientations=9, pixels_per_cell=(8, 8), cells_per_block=(2, 2), visualize=False, block_norm='L2-Hys'):
     """
     Extracts HOG (Histogram of Oriented Gradients) features from an image.
@@ -18,24 +196,188 @@ def extract_hog_features(image_np, orientations=9, pixels_per_cell=(8, 8), cells
             - numpy.ndarray: The HOG feature vector.
             - numpy.ndarray (optional): The HOG image (if visualize is True).
     """
-    if image_np.ndim == 3:
-        # Convert to grayscale if it's a color image
-        image_gray = color.rgb2gray(image_np)
-    else:
-        image_gray = image_np
+    with stage('hog.grayscale'):
+        if image_np.ndim == 3:
+            # Convert to grayscale if it's a color image
+            image_gray = color.rgb2gray(image_np)
+        else:
+            image_gray = image_np
 
-    features, hog_image = feature.hog(
-        image_gray,
-        orientations=orientations,
-        pixels_per_cell=pixels_per_cell,
-        cells_per_block=cells_per_block,
-        visualize=visualize,
-        block_norm=block_norm
-    )
+    with stage('hog.descriptor'):
+        result = feature.hog(
+            image_gray,
+            orientations=orientations,
+            pixels_per_cell=pixels_per_cell,
+            cells_per_block=cells_per_block,
+            visualize=visualize,
+            block_norm=block_norm
+        )
 
     if visualize:
+        features, hog_image = result
         # Rescale HOG image for better visualization
         hog_image_rescaled = exposure.rescale_intensity(hog_image, in_range=(0, 10))
         return features, hog_image_rescaled
     else:
-        return features
+        return result
+
+
+def extract_hog_features_stream(images, orientations=9, pixels_per_cell=(8, 8), cells_per_block=(2, 2), block_norm='L2-Hys', batch_size=32):
+    """
+    Extracts HOG features from a stream of images, batch by batch.
+
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W[, C]) stack or any iterable of images.
+        orientations (int): Number of gradient orientations.
+        pixels_per_cell (tuple): Size (in pixels) of a cell.
+        cells_per_block (tuple): Number of cells in each block.
+        block_norm (str): Normalisation method for blocks.
+        batch_size (int): Number of images processed per batch.
+
+    Yields:
+        numpy.ndarray: float32 HOG feature vectors of shape (B, n_features) for each batch,
+        computed with a ``HOGEngine``.
+    """
+    engine = None
+    for batch in iter_batches(images, batch_size):
+        # Grayscale conversion runs once over the whole batch
+        with stage('hog.grayscale', batch_size=len(batch)):
+            gray_batch = color.rgb2gray(batch) if batch.ndim == 4 else batch
+        if engine is None or engine.image_shape != gray_batch.shape[1:]:
+            engine = HOGEngine(gray_batch.shape[1:], orientations, pixels_per_cell, cells_per_block, block_norm)
+        yield engine.compute_batch(gray_batch)
+
+
+def extract_hog_features_batch(images, orientations=9, pixels_per_cell=(8, 8), cells_per_block=(2, 2), block_norm='L2-Hys', batch_size=32):
+    """
+    Extracts HOG features from many same-sized images.
+
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W[, C]) stack or any iterable of images.
+        orientations (int): Number of gradient orientations.
+        pixels_per_cell (tuple): Size (in pixels) of a cell.
+        cells_per_block (tuple): Number of cells in each block.
+        block_norm (str): Normalisation method for blocks.
+        batch_size (int): Number of images processed per batch.
+
+    Returns:
+        numpy.ndarray: The float32 HOG feature vectors, of shape (N, n_features).
+    """
+    stream = extract_hog_features_stream(images, orientations, pixels_per_cell, cells_per_block, block_norm, batch_size)
+    return collect(stream, batch_length(images))
+
+
+@lru_cache(maxsize=32)
+def _dense_engine(image_shape, orientations, pixels_per_cell, cells_per_block, block_norm):
+    """Engines for the pyramid levels, reused across frames of the same size."""
+    return HOGEngine(image_shape, orientations, pixels_per_cell, cells_per_block, block_norm)
+
+
+def _in_cells(size, pixels_per_cell, name):
+    cells, rest = np.divmod(size, pixels_per_cell)
+    if np.any(rest) or np.any(cells <= 0):
+        raise ValueError(f"{name} {tuple(size)} must be a positive multiple of pixels_per_cell {tuple(pixels_per_cell)}.")
+    return tuple(int(c) for c in cells)
+
+
+def dense_hog_windows(image_gray, window_size=(64, 64), stride=(8, 8), orientations=9, pixels_per_cell=(8, 8),
+                      cells_per_block=(2, 2), block_norm='L2-Hys'):
+    """
+    Computes the HOG descriptors of every sliding window of a grayscale image at once.
+
+    Gradients, cell histograms and block normalisation are computed once for the whole
+    image; the window descriptors are then a zero-copy view of the normalised blocks.
+    A window's descriptor has the layout of ``HOGEngine`` on the cropped window. Its
+    values only differ along the window border, where the gradient uses the neighbouring
+    pixels instead of being zero.
+
+    Args:
+        image_gray (numpy.ndarray): A grayscale image (H, W).
+        window_size (tuple): Window (rows, cols) in pixels; a multiple of ``pixels_per_cell``.
+        stride (tuple): Window step (rows, cols) in pixels; a multiple of ``pixels_per_cell``.
+        orientations (int): Number of gradient orientations.
+        pixels_per_cell (tuple): Size (in pixels) of a cell.
+        cells_per_block (tuple): Number of cells in each block.
+        block_norm (str): Normalisation method for blocks.
+
+    Returns:
+        numpy.ndarray: A read-only float32 view of shape (n_rows, n_cols, window_blocks_row,
+        window_blocks_col, block_features). Window (i, j) starts at pixel
+        (i * stride[0], j * stride[1]); ``windows[i, j].ravel()`` (or
+        ``windows.reshape(n_rows, n_cols, -1)`` for all windows) gives flat descriptors.
+    """
+    pixels_per_cell = tuple(pixels_per_cell)
+    cells_per_block = tuple(cells_per_block)
+    window_cells = _in_cells(window_size, pixels_per_cell, 'window_size')
+    step = _in_cells(stride, pixels_per_cell, 'stride')
+    window_blocks = (window_cells[0] - cells_per_block[0] + 1, window_cells[1] - cells_per_block[1] + 1)
+    if min(window_blocks) <= 0:
+        raise ValueError(f"window_size {tuple(window_size)} is smaller than one block.")
+
+    image_gray = np.asarray(image_gray)
+    if image_gray.shape[0] < window_size[0] or image_gray.shape[1] < window_size[1]:
+        raise ValueError(f"Image shape {image_gray.shape} is smaller than window_size {tuple(window_size)}.")
+    engine = _dense_engine(image_gray.shape, orientations, pixels_per_cell, cells_per_block, block_norm)
+    with stage('hog.histograms', dense=True):
+        histograms = engine.cell_histograms(image_gray[None])
+    with stage('hog.normalization', dense=True):
+        blocks = engine.block_grid(histograms)[0]
+    windows = np.lib.stride_tricks.sliding_window_view(blocks, window_blocks, axis=(0, 1))
+    return np.moveaxis(windows, 2, -1)[::step[0], ::step[1]]
+
+
+def sliding_window_hog(image_np, window_size=(64, 64), stride=(8, 8), scale=1.25, max_levels=None, orientations=9,
+                       pixels_per_cell=(8, 8), cells_per_block=(2, 2), block_norm='L2-Hys'):
+    """
+    Scans an image pyramid with a sliding window, yielding dense HOG descriptors per level.
+
+    Each level is the image downscaled by a further factor of ``scale`` (with ``cv2.resize``),
+    until the window no longer fits. The descriptors of every level come from
+    ``dense_hog_windows``, so overlapping windows share their gradients and histograms.
+
+    Args:
+        image_np (numpy.ndarray): The input image, grayscale (H, W) or RGB (H, W, 3).
+        window_size (tuple): Window (rows, cols) in pixels; a multiple of ``pixels_per_cell``.
+        stride (tuple): Window step (rows, cols) in pixels at each level; a multiple of
+            ``pixels_per_cell``.
+        scale (float): Downscaling factor between pyramid levels, greater than 1.
+        max_levels (int, optional): Maximum number of levels. Defaults to all that fit.
+        orientations (int): Number of gradient orientations.
+        pixels_per_cell (tuple): Size (in pixels) of a cell.
+        cells_per_block (tuple): Number of cells in each block.
+        block_norm (str): Normalisation method for blocks.
+
+    Yields:
+        tuple: (factor, windows, boxes) for each level, where ``factor`` is the level's
+        downscaling factor, ``windows`` the view returned by ``dense_hog_windows`` and
+        ``boxes`` an int array of shape (n_rows, n_cols, 4) with the (top, left, bottom,
+        right) of every window in the coordinates of ``image_np``.
+    """
+    if scale <= 1:
+        raise ValueError("scale must be greater than 1.")
+    with stage('hog.grayscale'):
+        image_gray = color.rgb2gray(image_np) if image_np.ndim == 3 else np.asarray(image_np, dtype=np.float64)
+
+    level, factor = 0, 1.0
+    while max_levels is None or level < max_levels:
+        shape = (int(round(image_gray.shape[0] / factor)), int(round(image_gray.shape[1] / factor)))
+        if shape[0] < window_size[0] or shape[1] < window_size[1]:
+            break
+        with stage('hog.pyramid'):
+            resized = image_gray if level == 0 else cv2.resize(image_gray, shape[::-1], interpolation=cv2.INTER_AREA)
+        windows = dense_hog_windows(resized, window_size, stride, orientations, pixels_per_cell, cells_per_block,
+                                    block_norm)
+
+        # Map window corners back to the original image, using the level's exact scale
+        level_scale = (image_gray.shape[0] / shape[0], image_gray.shape[1] / shape[1])
+        tops = np.arange(windows.shape[0]) * stride[0]
+        lefts = np.arange(windows.shape[1]) * stride[1]
+        boxes = np.empty(windows.shape[:2] + (4,), dtype=np.int64)
+        boxes[..., 0] = np.rint(tops * level_scale[0])[:, None]
+        boxes[..., 1] = np.rint(lefts * level_scale[1])[None, :]
+        boxes[..., 2] = np.rint((tops + window_size[0]) * level_scale[0])[:, None]
+        boxes[..., 3] = np.rint((lefts + window_size[1]) * level_scale[1])[None, :]
+        yield factor, windows, boxes
+
+        level += 1
+        factor *= scale
@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_listeners = ()
+_listeners_lock = threading.Lock()
+_progress_factory = None
+
+
+class _NullStage:
+    """Shared no-op context manager returned by ``stage`` when nothing is listening."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'tags', 'start')
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        emit('stage', self.name, time.perf_counter() - self.start, self.tags)
+        return False
+
+
+def add_listener(listener):
+    """
+    Registers a listener for instrumentation events from every module of the toolbox.
+
+    Args:
+        listener (callable): Called as ``listener(event, name, value, tags)``, where ``event`` is
+            'stage' (``value`` in seconds) or 'count' (e.g. bytes allocated), ``name`` is a dotted
+            stage/counter name such as 'gabor.filtering', and ``tags`` is a dict.
+    """
+    global _listeners
+    with _listeners_lock:
+        _listeners = _listeners + (listener,)
+
+
+def remove_listener(listener):
+    """Unregisters a listener added with ``add_listener``."""
+    global _listeners
+    with _listeners_lock:
+        _listeners = tuple(l for l in _listeners if l is not listener)
+
+
+def enabled():
+    """Returns True if at least one listener is registered."""
+    return bool(_listeners)
+
+
+def emit(event, name, value, tags=None):
+    """Sends an event to every listener."""
+    for listener in _listeners:
+        listener(event, name, value, tags or {})
+
+
+def stage(name, **tags):
+    """
+    Times a block of code as a named stage.
+
+    When no listener is registered this returns a shared no-op context manager, so
+    instrumented code costs one global lookup.
+
+    Args:
+        name (str): The stage name, e.g. 'wavelet.decomposition'.
+        **tags: Extra fields passed to the listeners.
+
+    Returns:
+        A context manager.
+    """
+    if not _listeners:
+        return _NULL_STAGE
+    return _Stage(name, tags)
+
+
+def count(name, value, **tags):
+    """
+    Adds ``value`` to a named counter, e.g. ``count('gabor.bytes', out.nbytes)``.
+
+    Does nothing when no listener is registered.
+    """
+    if _listeners:
+        emit('count', name, value, tags)
+
+
+class Recorder:
+    """
+    A listener that aggregates stage timings and counters in memory.
+
+    Attributes:
+        stages (dict): For each stage name, its number of calls and total seconds.
+        counters (dict): For each counter name, its total.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = defaultdict(lambda: {'calls': 0, 'seconds': 0.0})
+        self.counters = defaultdict(float)
+
+    def __call__(self, event, name, value, tags):
+        with self._lock:
+            if event == 'stage':
+                self.stages[name]['calls'] += 1
+                self.stages[name]['seconds'] += value
+            else:
+                self.counters[name] += value
+
+    def summary(self):
+        """Returns the aggregated stages and counters as plain dicts."""
+        with self._lock:
+            return {
+                'stages': {name: dict(values) for name, values in self.stages.items()},
+                'counters': dict(self.counters),
+            }
+
+
+@contextmanager
+def record(listener=None):
+    """
+    Registers a listener for the duration of a ``with`` block.
+
+    Args:
+        listener (callable, optional): A listener as accepted by ``add_listener``.
+            Defaults to a new ``Recorder``.
+
+    Yields:
+        The listener, e.g. the ``Recorder`` to read the summary from.
+    """
+    listener = Recorder() if listener is None else listener
+    add_listener(listener)
+    try:
+        yield listener
+    finally:
+        remove_listener(listener)
+
+
+class _NullProgress:
+    __slots__ = ()
+
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+_NULL_PROGRESS = _NullProgress()
+
+
+def set_progress(factory):
+    """
+    Enables or disables progress reporting for long-running loops.
+
+    Args:
+        factory (callable, str or None): Called as ``factory(total=..., desc=...)`` and must
+            return an object with ``update(n)`` and ``close()`` methods, such as ``tqdm.tqdm``.
+            'tqdm' selects tqdm (which must be installed). None disables progress reporting,
+            which is the default.
+    """
+    global _progress_factory
+    if factory == 'tqdm':
+        from tqdm import tqdm
+        factory = tqdm
+    _progress_factory = factory
+
+
+def progress_bar(total, desc):
+    """
+    Returns a progress reporter for ``total`` steps; a no-op unless ``set_progress`` was called.
+    """
+    if _progress_factory is None:
+        return _NULL_PROGRESS
+    return _progress_factory(total=total, desc=desc)
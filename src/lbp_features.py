@@ -1,7 +1,259 @@
+from functools import lru_cache
+
 import numpy as np
 from skimage.feature import local_binary_pattern
 from skimage import color
 
+from .batching import batch_length, collect, iter_batches
+from .instrumentation import count, stage
+
+_LBP_METHODS = ('default', 'ror', 'uniform', 'nri_uniform')
+# Largest number of sampling points for which the code mapping is stored as a lookup table
+_MAX_LUT_POINTS = 16
+# Largest number of bins per cell histogram ('default' and 'ror' have 2 ** n_points)
+_MAX_HISTOGRAM_BINS = 1 << 16
+# Number of set bits of every byte value, for NumPy versions without bitwise_count
+_BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _n_bins(n_points, method):
+    """Number of distinct codes produced by ``method``."""
+    if method == 'uniform':
+        return n_points + 2
+    if method == 'nri_uniform':
+        return n_points * (n_points - 1) + 3
+    return 2 ** n_points
+
+
+def _code_dtype(n_bins):
+    """Smallest unsigned integer type that can hold ``n_bins`` codes."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n_bins - 1 <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def _popcount(values):
+    """Number of set bits of every element of an unsigned integer array, as uint8."""
+    if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+        return np.bitwise_count(values)
+    counts = np.zeros(values.shape, dtype=np.uint8)
+    for shift in range(0, 8 * values.dtype.itemsize, 8):
+        counts += _BYTE_COUNTS[(values >> shift) & 255]
+    return counts
+
+
+def _map_codes(codes, n_points, method):
+    """
+    Maps raw ('default') LBP codes to the codes of ``method``, as skimage's local_binary_pattern does.
+
+    Works element-wise on an integer array of any shape, with bit operations on the
+    codes themselves, so no per-point temporary is needed.
+    """
+    if method == 'default':
+        return codes
+    if method == 'ror':
+        # Minimum over all right rotations of the P-bit pattern
+        best = codes.copy()
+        rotated = codes.copy()
+        for _ in range(1, n_points):
+            rotated = (rotated >> 1) | ((rotated & 1) << (n_points - 1))
+            np.minimum(best, rotated, out=best)
+        return best
+
+    codes = codes.astype(np.uint32, copy=False)
+    # skimage counts transitions between consecutive points without wrapping around
+    changes = _popcount((codes ^ (codes >> 1)) & ((1 << (n_points - 1)) - 1))
+    n_ones = _popcount(codes)
+    if method == 'uniform':
+        return np.where(changes <= 2, n_ones, n_points + 1)
+
+    # nri_uniform: one code per (number of ones, rotation) of each uniform pattern.
+    # x & -x isolates the lowest set bit and ~x & (x + 1) the lowest zero bit.
+    n_ones = n_ones.astype(np.int64)
+    first_one = _popcount((codes & -codes) - 1).astype(np.int64)
+    first_zero = _popcount((~codes & (codes + 1)) - 1).astype(np.int64)
+    rot_index = np.where(first_one == 0, n_ones - first_zero, n_points - first_one)
+    mapped = 1 + (n_ones - 1) * n_points + rot_index
+    mapped = np.where(n_ones == 0, 0, mapped)
+    mapped = np.where(n_ones == n_points, n_points * (n_points - 1) + 1, mapped)
+    return np.where(changes <= 2, mapped, n_points * (n_points - 1) + 2)
+
+
+def _as_index(positions, pad):
+    """Turns integer-valued float positions into padded indices, as a slice when they are contiguous."""
+    index = positions.astype(np.intp) + pad
+    if np.all(np.diff(index) == 1):
+        return slice(index[0], index[-1] + 1)
+    return index
+
+
+def _lerp(a, b, weight):
+    """Bilinear interpolation step in skimage's operation order; ``weight`` None means 0."""
+    if weight is None:
+        return a
+    return (1 - weight) * a + weight * b
+
+
+@lru_cache(maxsize=16)
+def _code_lut(n_points, method):
+    """Lookup table from every raw P-bit code to the code of ``method``."""
+    raw = np.arange(2 ** n_points, dtype=np.uint32)
+    return _map_codes(raw, n_points, method).astype(_code_dtype(_n_bins(n_points, method)))
+
+
+class LBPEngine:
+    """
+    A lookup-table LBP engine for a fixed image shape.
+
+    The sampling offsets and bilinear weights of every neighbour on the circle are
+    precomputed once, the P comparisons are accumulated into a raw code with vectorised
+    NumPy over a whole batch, and the 'ror', 'uniform' and 'nri_uniform' mappings are
+    applied through a lookup table (for up to 16 points; larger P, such as the default
+    24, are mapped with popcounts on the raw codes). Codes are written as the smallest unsigned integer type that fits,
+    e.g. uint8 for 'uniform', and match ``skimage.feature.local_binary_pattern`` on the
+    same input values. The engine also builds concatenated per-cell histograms directly.
+
+    Args:
+        image_shape (tuple): The (height, width) of the grayscale images.
+        radius (int): Radius of circle (spatial resolution of the operator).
+        n_points (int, optional): Number of sampling points on the circle. Defaults to 8 * radius.
+        method (str): 'default', 'ror', 'uniform' or 'nri_uniform'.
+        grid (tuple): Number of (rows, cols) of cells used by ``histograms``.
+    """
+
+    def __init__(self, image_shape, radius=3, n_points=None, method='uniform', grid=(8, 8)):
+        if method not in _LBP_METHODS:
+            raise ValueError(f"Unsupported LBP method '{method}'. Choose from {_LBP_METHODS}.")
+        if n_points is None:
+            n_points = 8 * radius
+        if n_points > 32:
+            raise ValueError("LBPEngine supports at most 32 sampling points.")
+
+        self.image_shape = tuple(image_shape[:2])
+        self.radius = radius
+        self.n_points = n_points
+        self.method = method
+        self.grid = tuple(grid)
+        self.n_bins = _n_bins(n_points, method)
+        self.dtype = _code_dtype(self.n_bins)
+        self._lut = _code_lut(n_points, method) if method != 'default' and n_points <= _MAX_LUT_POINTS else None
+
+        height, width = self.image_shape
+        self._pad = int(np.ceil(radius)) + 1
+        rp = np.round(-radius * np.sin(2 * np.pi * np.arange(n_points) / n_points), 5)
+        cp = np.round(radius * np.cos(2 * np.pi * np.arange(n_points) / n_points), 5)
+
+        # Per neighbour: padded row/col indices of the 2x2 interpolation support and the
+        # fractional weights, computed from (r + rp) exactly as skimage does per pixel
+        self._neighbours = []
+        for dr, dc in zip(rp, cp):
+            r = np.arange(height) + dr
+            c = np.arange(width) + dc
+            r0, c0 = np.floor(r), np.floor(c)
+            wr, wc = r - r0, c - c0
+            self._neighbours.append((
+                _as_index(r0, self._pad), _as_index(np.ceil(r), self._pad), wr[:, None] if wr.any() else None,
+                _as_index(c0, self._pad), _as_index(np.ceil(c), self._pad), wc[None, :] if wc.any() else None,
+            ))
+
+        # Cell id of every pixel for the histogram grid
+        row_cells = np.searchsorted((np.arange(1, self.grid[0]) * height) // self.grid[0], np.arange(height), side='right')
+        col_cells = np.searchsorted((np.arange(1, self.grid[1]) * width) // self.grid[1], np.arange(width), side='right')
+        self._pixel_cells = (row_cells[:, None] * self.grid[1] + col_cells[None, :]).ravel()
+        self._cell_sizes = np.bincount(self._pixel_cells, minlength=self.grid[0] * self.grid[1])
+
+    def codes(self, images):
+        """
+        Computes LBP codes for one image or a batch of images.
+
+        Args:
+            images (numpy.ndarray): A grayscale image (H, W) or batch (B, H, W) matching ``image_shape``.
+
+        Returns:
+            numpy.ndarray: The LBP codes, with the same shape as ``images`` and dtype ``self.dtype``.
+        """
+        images = np.asarray(images)
+        single = images.ndim == 2
+        batch = images[None] if single else images
+        if batch.shape[1:] != self.image_shape:
+            raise ValueError(f"Image shape {batch.shape[1:]} does not match engine shape {self.image_shape}.")
+
+        with stage('lbp.codes', batch_size=len(batch)):
+            center = batch.astype(np.float64, copy=False)
+            pad = self._pad
+            padded = np.pad(center, ((0, 0), (pad, pad), (pad, pad)))
+            raw_dtype = np.uint32 if self.n_points > 16 else np.uint16 if self.n_points > 8 else np.uint8
+            raw = np.zeros(batch.shape, dtype=raw_dtype)
+            count('lbp.bytes', padded.nbytes + raw.nbytes)
+            for p, (r0, r1, wr, c0, c1, wc) in enumerate(self._neighbours):
+                # Zero weights are skipped: (1 - 0) * a + 0 * b == a, so the result is unchanged
+                top = _lerp(padded[:, r0, c0], padded[:, r0, c1], wc)
+                texture = top if wr is None else _lerp(top, _lerp(padded[:, r1, c0], padded[:, r1, c1], wc), wr)
+                raw |= (texture >= center).astype(raw_dtype) << raw_dtype(p)
+
+            if self.method == 'default':
+                codes = raw
+            elif self._lut is not None:
+                codes = self._lut[raw]
+            else:
+                codes = _map_codes(raw, self.n_points, self.method).astype(self.dtype)
+        return codes[0] if single else codes
+
+    def histograms(self, images, normalize=True):
+        """
+        Computes concatenated per-cell LBP histograms for one image or a batch of images.
+
+        Args:
+            images (numpy.ndarray): A grayscale image (H, W) or batch (B, H, W) matching ``image_shape``.
+            normalize (bool): If True, each cell histogram sums to 1.
+
+        Returns:
+            numpy.ndarray: float32 descriptors of length grid_rows * grid_cols * n_bins,
+            of shape (n_features,) for one image or (B, n_features) for a batch.
+        """
+        self.check_histograms()
+        codes = self.codes(images)
+        single = codes.ndim == 2
+        n_images, n_cells = 1 if single else len(codes), len(self._cell_sizes)
+        codes = codes.reshape(n_images, len(self._pixel_cells))
+
+        with stage('lbp.histograms', batch_size=n_images):
+            index = codes.astype(np.int64)
+            index += self._pixel_cells * self.n_bins
+            index += (np.arange(n_images) * n_cells * self.n_bins)[:, None]
+            hist = np.bincount(index.ravel(), minlength=n_images * n_cells * self.n_bins).astype(np.float32)
+            hist = hist.reshape(n_images, n_cells, self.n_bins)
+            if normalize:
+                hist /= np.maximum(self._cell_sizes, 1)[None, :, None]
+        hist = hist.reshape(n_images, n_cells * self.n_bins)
+        return hist[0] if single else hist
+
+    def check_histograms(self):
+        """Raises ValueError if per-cell histograms of this engine would be too large to build."""
+        if self.n_bins > _MAX_HISTOGRAM_BINS:
+            raise ValueError(
+                f"LBP histograms with method '{self.method}' and {self.n_points} points would have "
+                f"{self.n_bins} bins per cell (limit {_MAX_HISTOGRAM_BINS}). Use method 'uniform' or "
+                f"'nri_uniform', or at most 16 points.")
+
+
+def _to_uint8_gray(images, is_color):
+    """
+    Converts an image or batch to the uint8 grayscale all LBP functions compute codes on.
+
+    Color input goes through ``rgb2gray``; float values in [0, 1] are scaled by 255 and
+    truncated, so every API sees the same gray levels.
+    """
+    if is_color:
+        # Convert to grayscale if it's a color image
+        images = color.rgb2gray(images)
+    # Convert to uint8 for LBP compatibility if not already
+    if images.dtype != np.uint8:
+        images = (images * 255).astype(np.uint8)
+    return images
+
+
 def extract_lbp_features(image_np, radius=3, n_points=None, method='uniform'):
     """
     Extracts LBP (Local Binary Pattern) features from an image.
@@ -15,18 +267,100 @@ def extract_lbp_features(image_np, radius=3, n_points=None, method='uniform'):
     Returns:
         numpy.ndarray: The LBP image.
     """
-    if image_np.ndim == 3:
-        # Convert to grayscale if it's a color image
-        image_gray = color.rgb2gray(image_np)
-    else:
-        image_gray = image_np
-    
-    # Convert to uint8 for LBP compatibility if not already
-    if image_gray.dtype != np.uint8:
-        image_gray = (image_gray * 255).astype(np.uint8)
+    image_gray = _to_uint8_gray(image_np, image_np.ndim == 3)
 
     if n_points is None:
         n_points = 8 * radius
 
     lbp_image = local_binary_pattern(image_gray, n_points, radius, method)
     return lbp_image
+
+
+def extract_lbp_histograms(image_np, radius=3, n_points=None, method='uniform', grid=(8, 8), normalize=True):
+    """
+    Extracts a spatial LBP histogram descriptor from an image.
+
+    The image is split into a ``grid`` of cells and the LBP code histograms of all cells
+    are concatenated, which is the usual face-recognition descriptor. Codes are computed
+    by ``LBPEngine`` on the same uint8 grayscale as ``extract_lbp_features``, without a
+    float64 code image.
+
+    Args:
+        image_np (numpy.ndarray): The input image as a NumPy array.
+        radius (int): Radius of circle (spatial resolution of the operator).
+        n_points (int, optional): Number of sampling points on the circle. Defaults to 8 * radius.
+        method (str): 'default', 'ror', 'uniform' or 'nri_uniform'.
+        grid (tuple): Number of (rows, cols) of cells.
+        normalize (bool): If True, each cell histogram sums to 1.
+
+    Returns:
+        numpy.ndarray: The float32 descriptor of length grid_rows * grid_cols * n_bins.
+    """
+    image_gray = _to_uint8_gray(image_np, image_np.ndim == 3)
+    engine = LBPEngine(image_gray.shape, radius, n_points, method, grid)
+    return engine.histograms(image_gray, normalize=normalize)
+
+
+def extract_lbp_features_stream(images, radius=3, n_points=None, method='uniform', batch_size=32, histograms=False, grid=(8, 8)):
+    """
+    Extracts LBP features from a stream of images, batch by batch.
+
+    Images are converted to uint8 grayscale exactly as in ``extract_lbp_features``, so both
+    APIs give the same codes. Except for ``method='var'``, codes are computed by ``LBPEngine``
+    and returned as compact integer codes.
+
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W[, C]) stack or any iterable of images.
+        radius (int): Radius of circle (spatial resolution of the operator).
+        n_points (int, optional): Number of sampling points on the circle. Defaults to 8 * radius.
+        method (str): Method for computing LBP. E.g., 'default', 'ror', 'uniform', 'nri_uniform', 'var'.
+        batch_size (int): Number of images processed per batch.
+        histograms (bool): If True, yield concatenated per-cell histograms instead of code images.
+        grid (tuple): Number of (rows, cols) of cells used when ``histograms`` is True.
+
+    Yields:
+        numpy.ndarray: LBP images of shape (B, H, W), or float32 histograms of shape
+        (B, n_features) if ``histograms`` is True, for each batch.
+    """
+    if n_points is None:
+        n_points = 8 * radius
+    if method == 'var' and histograms:
+        raise ValueError("Histograms are not available for method 'var'.")
+
+    engine = None
+    for batch in iter_batches(images, batch_size):
+        # Grayscale conversion runs once over the whole batch
+        with stage('lbp.grayscale', batch_size=len(batch)):
+            gray_batch = _to_uint8_gray(batch, batch.ndim == 4)
+
+        if method == 'var':
+            lbp_batch = np.empty(gray_batch.shape, dtype=np.float64)
+            for i, image_gray in enumerate(gray_batch):
+                lbp_batch[i] = local_binary_pattern(image_gray, n_points, radius, method)
+            yield lbp_batch
+            continue
+
+        if engine is None or engine.image_shape != gray_batch.shape[1:]:
+            engine = LBPEngine(gray_batch.shape[1:], radius, n_points, method, grid)
+        yield engine.histograms(gray_batch) if histograms else engine.codes(gray_batch)
+
+
+def extract_lbp_features_batch(images, radius=3, n_points=None, method='uniform', batch_size=32, histograms=False, grid=(8, 8)):
+    """
+    Extracts LBP features from many same-sized images.
+
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W[, C]) stack or any iterable of images.
+        radius (int): Radius of circle (spatial resolution of the operator).
+        n_points (int, optional): Number of sampling points on the circle. Defaults to 8 * radius.
+        method (str): Method for computing LBP. E.g., 'default', 'ror', 'uniform', 'nri_uniform', 'var'.
+        batch_size (int): Number of images processed per batch.
+        histograms (bool): If True, return concatenated per-cell histograms instead of code images.
+        grid (tuple): Number of (rows, cols) of cells used when ``histograms`` is True.
+
+    Returns:
+        numpy.ndarray: The LBP images, of shape (N, H, W), or float32 histograms of shape
+        (N, n_features) if ``histograms`` is True.
+    """
+    stream = extract_lbp_features_stream(images, radius, n_points, method, batch_size, histograms, grid)
+    return collect(stream, batch_length(images))
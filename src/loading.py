@@ -0,0 +1,234 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+IMAGE_EXTENSIONS = ('.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff', '.webp')
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+}
+
+_GRAY_FLAGS = {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+_COLOR_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+
+def _is_url(source):
+    return isinstance(source, str) and source.startswith(('http://', 'https://'))
+
+
+def decode_image(data, grayscale=True, reduce=1):
+    """
+    Decodes encoded image bytes straight to a NumPy array with ``cv2.imdecode``.
+
+    Args:
+        data (bytes): The encoded image (JPEG, PNG, ...).
+        grayscale (bool): If True, decode to a 2-D uint8 grayscale image, otherwise to RGB.
+        reduce (int): Decode at 1/reduce of the resolution (1, 2, 4 or 8). JPEG decoding
+            at reduced resolution skips most of the work.
+
+    Returns:
+        numpy.ndarray: The decoded image.
+    """
+    flags = _GRAY_FLAGS if grayscale else _COLOR_FLAGS
+    if reduce not in flags:
+        raise ValueError(f"reduce must be one of {sorted(flags)}.")
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags[reduce])
+    if image is None:
+        raise ValueError("Could not decode image data.")
+    if not grayscale:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return image
+
+
+class ImageLoader:
+    """
+    Loads images from URLs, local files and directories through one interface.
+
+    URLs are fetched with a pooled ``requests.Session`` (keep-alive, timeout and retries
+    with backoff) and stored in an optional on-disk cache keyed by the SHA-256 of the URL,
+    so later runs read them from disk. ``load_many`` fetches and decodes on a bounded
+    thread pool while yielding images in input order.
+
+    Args:
+        cache_dir (str, optional): Directory of the download cache. Defaults to no cache.
+        max_concurrency (int): Maximum number of images fetched and decoded at once.
+        timeout (float): Timeout in seconds of each HTTP request.
+        retries (int): Number of retries for connection errors and 429/5xx responses.
+        grayscale (bool): If True, decode to grayscale uint8, otherwise to RGB.
+        reduce (int): Decode at 1/reduce of the resolution (1, 2, 4 or 8).
+        headers (dict, optional): HTTP headers. Defaults to a browser-like User-Agent.
+    """
+
+    def __init__(self, cache_dir=None, max_concurrency=8, timeout=10, retries=3, grayscale=True, reduce=1, headers=None):
+        self.cache_dir = cache_dir
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.grayscale = grayscale
+        self.reduce = reduce
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def cache_path(self, url):
+        """Returns the cache file of ``url``, or None if caching is disabled."""
+        if self.cache_dir is None:
+            return None
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, source):
+        """
+        Returns the encoded bytes of a URL (through the cache) or of a local file.
+
+        Args:
+            source (str): A URL or a file path.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        if not _is_url(source):
+            with open(source, 'rb') as f:
+                return f.read()
+
+        path = self.cache_path(source)
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+
+        response = self.session.get(source, timeout=self.timeout)
+        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+        data = response.content
+
+        if path is not None:
+            # Write to a temporary file and rename, so concurrent readers never see partial files
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return data
+
+    def load(self, source):
+        """
+        Loads and decodes one image.
+
+        Args:
+            source (str): A URL or a file path.
+
+        Returns:
+            numpy.ndarray: The decoded image.
+        """
+        return decode_image(self.fetch(source), grayscale=self.grayscale, reduce=self.reduce)
+
+    def expand(self, sources):
+        """
+        Expands directories into their image files (sorted, recursively); URLs and files pass through.
+
+        Args:
+            sources (str or iterable): A single source or an iterable of sources.
+
+        Yields:
+            str: Individual URLs and file paths.
+        """
+        if isinstance(sources, (str, os.PathLike)):
+            sources = [sources]
+        for source in sources:
+            source = os.fspath(source)
+            if not _is_url(source) and os.path.isdir(source):
+                for root, dirs, files in os.walk(source):
+                    dirs.sort()
+                    for name in sorted(files):
+                        if name.lower().endswith(IMAGE_EXTENSIONS):
+                            yield os.path.join(root, name)
+            else:
+                yield source
+
+    def load_many(self, sources, errors='raise'):
+        """
+        Loads many images concurrently, yielding them in input order.
+
+        At most ``2 * max_concurrency`` images are in flight at a time, so memory stays bounded
+        for arbitrarily long inputs.
+
+        Args:
+            sources (str or iterable): URLs, file paths and directories.
+            errors (str): 'raise' to propagate the first failure, or 'skip' to leave out
+                images that cannot be fetched or decoded.
+
+        Yields:
+            tuple: (source, image) for every loaded image.
+        """
+        if errors not in ('raise', 'skip'):
+            raise ValueError("errors must be 'raise' or 'skip'.")
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+        pending = deque()
+        for source in self.expand(sources):
+            pending.append((source, self._executor.submit(self.load, source)))
+            if len(pending) >= 2 * self.max_concurrency:
+                yield from self._next_result(pending, errors)
+        while pending:
+            yield from self._next_result(pending, errors)
+
+    @staticmethod
+    def _next_result(pending, errors):
+        source, future = pending.popleft()
+        try:
+            image = future.result()
+        except (OSError, ValueError, requests.RequestException):
+            if errors == 'raise':
+                raise
+            return
+        yield source, image
+
+    def close(self):
+        """Closes the HTTP session and the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_images(sources, cache_dir=None, max_concurrency=8, grayscale=True, reduce=1, errors='raise'):
+    """
+    Loads images from URLs, files and directories, yielding them in order.
+
+    A convenience wrapper around ``ImageLoader.load_many``.
+
+    Args:
+        sources (str or iterable): URLs, file paths and directories.
+        cache_dir (str, optional): Directory of the download cache. Defaults to no cache.
+        max_concurrency (int): Maximum number of images fetched and decoded at once.
+        grayscale (bool): If True, decode to grayscale uint8, otherwise to RGB.
+        reduce (int): Decode at 1/reduce of the resolution (1, 2, 4 or 8).
+        errors (str): 'raise' or 'skip'.
+
+    Yields:
+        tuple: (source, image) for every loaded image.
+    """
+    with ImageLoader(cache_dir, max_concurrency, grayscale=grayscale, reduce=reduce) as loader:
+        yield from loader.load_many(sources, errors=errors)
@@ -0,0 +1,184 @@
+"""
+Headless montage rendering for QA sheets of images and feature maps.
+
+Images are converted to uint8 (with optional normalisation and colormaps for feature
+maps), tiled into one preallocated RGB canvas with NumPy and encoded straight to
+PNG or JPEG with OpenCV. Nothing here needs matplotlib or a display.
+"""
+import os
+
+import cv2
+import numpy as np
+
+NORMALIZATIONS = ('auto', 'minmax', 'percentile', None)
+
+
+def _colormap(name):
+    code = getattr(cv2, 'COLORMAP_' + name.upper(), None)
+    if code is None:
+        raise ValueError(f"Unknown colormap '{name}'; use an OpenCV colormap such as 'viridis', 'jet' or 'magma'.")
+    return code
+
+
+def to_uint8(image, normalize='auto', cmap=None, percentiles=(1, 99)):
+    """
+    Converts an image or feature map to a displayable uint8 image.
+
+    Args:
+        image (numpy.ndarray): A grayscale (H, W) or (H, W, 1), RGB (H, W, 3) or RGBA
+            (H, W, 4) image, of any dtype. The alpha channel is dropped.
+        normalize (str or None): How values map to [0, 255]:
+
+            - 'auto': uint8 is kept, booleans become 0/255, floats within [0, 1] are
+              scaled by 255, and anything else (e.g. Gabor responses or wavelet
+              coefficients) is min-max scaled.
+            - 'minmax': min-max scaling.
+            - 'percentile': ``percentiles`` are mapped to 0 and 255, which keeps a few
+              extreme values from washing out the rest.
+            - None: values are clipped to [0, 255].
+        cmap (str, optional): An OpenCV colormap name (e.g. 'viridis', 'jet', 'magma')
+            applied to grayscale images.
+        percentiles (tuple): The low and high percentiles for 'percentile'.
+
+    Returns:
+        numpy.ndarray: A uint8 image, RGB if ``cmap`` is given or the input is RGB.
+    """
+    if normalize not in NORMALIZATIONS:
+        raise ValueError(f"Unknown normalization '{normalize}'. Choose from {NORMALIZATIONS}.")
+    image = np.asarray(image)
+    if image.ndim == 3 and image.shape[2] in (1, 4):
+        image = image[..., 0] if image.shape[2] == 1 else image[..., :3]
+    if image.ndim not in (2, 3) or (image.ndim == 3 and image.shape[2] != 3):
+        raise ValueError(f"Expected a grayscale, RGB or RGBA image, got shape {image.shape}.")
+    if image.dtype == bool:
+        image = image.astype(np.uint8) * 255
+    elif image.dtype != np.uint8 or normalize in ('minmax', 'percentile'):
+        values = image.astype(np.float32, copy=False)
+        if normalize == 'auto':
+            low, high = float(values.min()), float(values.max())
+            if image.dtype.kind == 'f' and low >= 0 and high <= 1:
+                low, high = 0.0, 1.0
+            elif image.dtype.kind in 'iu' and low >= 0 and high <= 255:
+                low, high = 0.0, 255.0
+        elif normalize == 'minmax':
+            low, high = float(values.min()), float(values.max())
+        elif normalize == 'percentile':
+            low, high = (float(v) for v in np.percentile(values, percentiles))
+        else:
+            low, high = 0.0, 255.0
+        scale = 255.0 / (high - low) if high > low else 0.0
+        image = np.clip((values - low) * scale, 0, 255).astype(np.uint8)
+
+    if cmap is not None and image.ndim == 2:
+        return cv2.cvtColor(cv2.applyColorMap(image, _colormap(cmap)), cv2.COLOR_BGR2RGB)
+    return image
+
+
+def _fit(image, tile_size):
+    """Resizes an image to fit in ``tile_size`` (rows, cols), keeping its aspect ratio."""
+    height, width = image.shape[:2]
+    factor = min(tile_size[0] / height, tile_size[1] / width)
+    if factor == 1:
+        return image
+    size = (max(1, int(round(width * factor))), max(1, int(round(height * factor))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA if factor < 1 else cv2.INTER_NEAREST)
+
+
+def render_montage(images, labels=None, columns=None, tile_size=None, padding=4, background=255, cmap=None,
+                   normalize='auto', font_scale=0.4):
+    """
+    Tiles images into one RGB canvas, optionally with a label under each tile.
+
+    Args:
+        images (list or numpy.ndarray): Grayscale, RGB or RGBA images, or an (N, H, W[, C]) stack.
+        labels (list, optional): A text label per image, drawn with ``cv2.putText``.
+        columns (int, optional): Tiles per row. Defaults to a roughly square grid.
+        tile_size (tuple, optional): The (rows, cols) of every tile. Defaults to the
+            largest image size. Images are scaled to fit and centred.
+        padding (int): Pixels between tiles and around the canvas.
+        background (int): Gray level of the background.
+        cmap (str, optional): OpenCV colormap for grayscale images, see ``to_uint8``.
+        normalize (str or None): Value normalisation per image, see ``to_uint8``.
+        font_scale (float): Size of the label font.
+
+    Returns:
+        numpy.ndarray: The (H, W, 3) uint8 RGB canvas.
+    """
+    n_images = len(images)
+    if n_images == 0:
+        raise ValueError("No images to render.")
+    if labels is not None and len(labels) != n_images:
+        raise ValueError(f"Got {len(labels)} labels for {n_images} images.")
+    if columns is None:
+        columns = int(np.ceil(np.sqrt(n_images)))
+    rows = -(-n_images // columns)
+    if tile_size is None:
+        tile_size = (max(image.shape[0] for image in images), max(image.shape[1] for image in images))
+
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    label_height = 0
+    if labels is not None:
+        (_, text_height), baseline = cv2.getTextSize('Ag', font, font_scale, 1)
+        label_height = text_height + baseline + 2
+    cell_height = tile_size[0] + label_height + padding
+    cell_width = tile_size[1] + padding
+
+    canvas = np.full((rows * cell_height + padding, columns * cell_width + padding, 3), background, dtype=np.uint8)
+    color = (0, 0, 0) if background > 127 else (255, 255, 255)
+    for i, image in enumerate(images):
+        tile = _fit(to_uint8(image, normalize, cmap), tile_size)
+        top = padding + (i // columns) * cell_height
+        left = padding + (i % columns) * cell_width
+        y = top + (tile_size[0] - tile.shape[0]) // 2
+        x = left + (tile_size[1] - tile.shape[1]) // 2
+        # Grayscale tiles are broadcast over the three channels
+        canvas[y:y + tile.shape[0], x:x + tile.shape[1]] = tile if tile.ndim == 3 else tile[..., None]
+
+        if labels is not None:
+            text = str(labels[i])
+            while text and cv2.getTextSize(text, font, font_scale, 1)[0][0] > tile_size[1]:
+                text = text[:-1]  # clip long labels to the tile width
+            cv2.putText(canvas, text, (left, top + tile_size[0] + label_height - baseline), font, font_scale, color, 1,
+                        cv2.LINE_AA)
+    return canvas
+
+
+def encode_montage(canvas, ext='.png', quality=90):
+    """
+    Encodes an RGB canvas as PNG or JPEG bytes.
+
+    Args:
+        canvas (numpy.ndarray): A uint8 RGB or grayscale image, e.g. from ``render_montage``.
+        ext (str): '.png' or '.jpg'.
+        quality (int): JPEG quality (0-100); ignored for PNG.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    if canvas.ndim == 3:
+        canvas = cv2.cvtColor(canvas, cv2.COLOR_RGB2BGR)
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext.lower() in ('.jpg', '.jpeg') else []
+    ok, data = cv2.imencode(ext, canvas, params)
+    if not ok:
+        raise ValueError(f"Cannot encode images as '{ext}'.")
+    return data.tobytes()
+
+
+def save_montage(filename, images, labels=None, quality=90, **kwargs):
+    """
+    Renders a montage and writes it as PNG or JPEG, chosen by the file extension.
+
+    Args:
+        filename (str): The output path, e.g. 'qa_sheet.png' or 'qa_sheet.jpg'.
+        images (list or numpy.ndarray): The images, see ``render_montage``.
+        labels (list, optional): A text label per image.
+        quality (int): JPEG quality (0-100).
+        **kwargs: Further arguments of ``render_montage``.
+
+    Returns:
+        numpy.ndarray: The rendered canvas.
+    """
+    canvas = render_montage(images, labels, **kwargs)
+    with open(filename, 'wb') as f:
+        f.write(encode_montage(canvas, os.path.splitext(filename)[1] or '.png', quality))
+    return canvas
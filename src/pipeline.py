@@ -0,0 +1,257 @@
+import threading
+
+import cv2
+import numpy as np
+
+from .instrumentation import stage
+
+# The extractor modules are imported by the steps that use them, so a pipeline only
+# loads the dependencies (SciPy, scikit-image, PyWavelets) of its own extractors.
+
+
+class SharedIntermediates:
+    """
+    Per-image intermediates that several extractors need, each computed at most once.
+
+    Args:
+        image_np (numpy.ndarray): The input image, grayscale (H, W) or color (H, W, 3).
+        color_order (str): Channel order of color input, 'rgb' or 'bgr'.
+    """
+
+    def __init__(self, image_np, color_order='rgb'):
+        self.image = image_np
+        self.color_order = color_order
+        self._cache = {}
+
+    def _get(self, name, compute):
+        if name not in self._cache:
+            with stage('pipeline.shared.' + name):
+                self._cache[name] = compute()
+        return self._cache[name]
+
+    @property
+    def gray(self):
+        """The grayscale image as uint8, converted once with ``cv2.cvtColor``."""
+        return self._get('gray', self._compute_gray)
+
+    @property
+    def gray_float(self):
+        """The grayscale image as float64 normalised to [0, 1]."""
+        return self._get('gray_float', lambda: self.gray * (1.0 / 255))
+
+    @property
+    def sobel(self):
+        """The (dx, dy) int16 Sobel derivatives of ``gray``, with the borders ``cv2.Canny`` uses."""
+        def compute():
+            dx = cv2.Sobel(self.gray, cv2.CV_16S, 1, 0, ksize=3, borderType=cv2.BORDER_REPLICATE)
+            dy = cv2.Sobel(self.gray, cv2.CV_16S, 0, 1, ksize=3, borderType=cv2.BORDER_REPLICATE)
+            return dx, dy
+        return self._get('sobel', compute)
+
+    def _compute_gray(self):
+        image = self.image
+        if image.ndim == 3:
+            if image.dtype != np.uint8:
+                image = _to_uint8(image)
+            code = cv2.COLOR_RGB2GRAY if self.color_order == 'rgb' else cv2.COLOR_BGR2GRAY
+            return cv2.cvtColor(image, code)
+        if image.dtype == np.uint8:
+            return image
+        return _to_uint8(image)
+
+
+class EngineCache:
+    """
+    Extractor engines (``HOGEngine``, ``LBPEngine``, ``GaborBank``) keyed by shape and parameters.
+
+    Engines are read-only once built, so one cache can serve several threads running the
+    same pipeline at once, as ``process_frames`` does; a lock ensures each engine is built
+    only once.
+    """
+
+    def __init__(self):
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Returns the engine stored under ``key``, calling ``build()`` to create it if needed."""
+        engine = self._engines.get(key)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(key)
+                if engine is None:
+                    engine = self._engines[key] = build()
+        return engine
+
+
+def _to_uint8(image):
+    """Converts a float image in [0, 1] (or an integer image in [0, 255]) to uint8."""
+    scale = 255.0 if image.dtype.kind == 'f' and image.max() <= 1 else 1.0
+    return np.clip(np.rint(image * scale), 0, 255).astype(np.uint8)
+
+
+def _run_canny(shared, engines, t_lower=50, t_upper=300):
+    dx, dy = shared.sobel
+    return cv2.Canny(dx, dy, t_lower, t_upper)
+
+
+def _run_hog(shared, engines, orientations=9, pixels_per_cell=(8, 8), cells_per_block=(2, 2), block_norm='L2-Hys'):
+    from .hog_features import HOGEngine
+
+    gray = shared.gray_float
+    key = ('hog', gray.shape, orientations, tuple(pixels_per_cell), tuple(cells_per_block), block_norm)
+    engine = engines.get(key, lambda: HOGEngine(gray.shape, orientations, pixels_per_cell, cells_per_block, block_norm))
+    return engine.compute(gray)
+
+
+def _run_lbp(shared, engines, radius=3, n_points=None, method='uniform', histograms=False, grid=(8, 8)):
+    from .lbp_features import LBPEngine
+
+    gray = shared.gray
+    key = ('lbp', gray.shape, radius, n_points, method, tuple(grid))
+    engine = engines.get(key, lambda: LBPEngine(gray.shape, radius, n_points, method, grid))
+    return engine.histograms(gray) if histograms else engine.codes(gray)
+
+
+def _run_gabor(shared, engines, thetas=None, freqs=None, backend=None, max_workers=None, pyramid=False,
+               output='responses', dtype=np.float64, grid=(4, 4)):
+    from .gabor_features import GaborBank, extract_gabor_features
+
+    gray = shared.gray
+    key = ('gabor', gray.shape,
+           None if thetas is None else tuple(thetas), None if freqs is None else tuple(freqs), pyramid)
+    bank = engines.get(key, lambda: GaborBank(gray.shape, thetas=thetas, freqs=freqs, pyramid=pyramid))
+    return extract_gabor_features(gray, bank=bank, backend=backend, max_workers=max_workers,
+                                  output=output, dtype=dtype, grid=tuple(grid))
+
+
+def _run_wavelet(shared, engines, wavelet='db1', decomposition_level=3, threshold_factor=0.01):
+    from .wavelet_features import extract_wavelet_features
+
+    return extract_wavelet_features(shared.gray, wavelet, decomposition_level, threshold_factor)
+
+
+EXTRACTORS = {
+    'canny': _run_canny,
+    'hog': _run_hog,
+    'lbp': _run_lbp,
+    'gabor': _run_gabor,
+    'wavelet': _run_wavelet,
+}
+
+# Intermediates each extractor reads (anything else only needs the grayscale image)
+_NEEDS = {
+    'canny': ('sobel',),
+    'hog': ('gray_float',),
+}
+
+
+def parse_extractors(extractors, available):
+    """
+    Normalises extractor configs to (key, name, params) steps.
+
+    Args:
+        extractors (list): Names, (name, params) tuples or (key, name, params) tuples.
+        available (dict): The supported extractor names.
+
+    Returns:
+        list: The (key, name, params) steps, in order.
+    """
+    steps = []
+    for config in extractors:
+        if isinstance(config, str):
+            key, name, params = config, config, {}
+        elif len(config) == 2:
+            name, params = config
+            key = name
+        else:
+            key, name, params = config
+        if name not in available:
+            raise ValueError(f"Unknown extractor '{name}'. Choose from {sorted(available)}.")
+        if any(key == existing for existing, _, _ in steps):
+            raise ValueError(f"Duplicate extractor key '{key}'; use a (key, name, params) config.")
+        steps.append((key, name, dict(params)))
+    return steps
+
+
+class FeaturePipeline:
+    """
+    Runs several extractors on the same image while sharing their preprocessing.
+
+    Grayscale conversion, uint8/float conversion and normalisation, and the Sobel
+    derivatives are computed once per image and handed to every extractor that needs
+    them. Only Canny reads the shared Sobel derivatives; HOG computes its own central
+    differences on the float image, as ``skimage.feature.hog`` does. HOG, LBP and Gabor
+    engines are built once per image shape and reused, and ``run`` may be called from
+    several threads at once.
+
+    All extractors see the same grayscale image (converted with ``cv2.cvtColor``), so
+    results on color input can differ slightly from the individual functions, which
+    each use their own conversion.
+
+    Args:
+        extractors (list): Extractor configs. Each item is a name, a (name, params) tuple,
+            or a (key, name, params) tuple when the same extractor is used more than once.
+            Names are 'canny', 'hog', 'lbp', 'gabor' and 'wavelet'; params are the keyword
+            arguments of the matching extractor.
+        color_order (str): Channel order of color input, 'rgb' or 'bgr'.
+    """
+
+    def __init__(self, extractors, color_order='rgb'):
+        if color_order not in ('rgb', 'bgr'):
+            raise ValueError("color_order must be 'rgb' or 'bgr'.")
+        self.color_order = color_order
+        self.steps = parse_extractors(extractors, EXTRACTORS)
+        self._engines = EngineCache()
+
+    def prepare(self, image_np):
+        """
+        Computes the shared intermediates the configured extractors need, ahead of ``run``.
+
+        This lets preprocessing run as its own stage, e.g. on another thread.
+
+        Args:
+            image_np (numpy.ndarray): The input image, grayscale (H, W) or color (H, W, 3).
+
+        Returns:
+            SharedIntermediates: The intermediates, to pass to ``run`` instead of the image.
+        """
+        shared = SharedIntermediates(image_np, self.color_order)
+        for _, name, _ in self.steps:
+            for intermediate in _NEEDS.get(name, ('gray',)):
+                getattr(shared, intermediate)
+        return shared
+
+    def run(self, image_np):
+        """
+        Extracts every configured feature from one image.
+
+        Args:
+            image_np (numpy.ndarray or SharedIntermediates): The input image, grayscale (H, W)
+                or color (H, W, 3), or the output of ``prepare``.
+
+        Returns:
+            dict: The features of each extractor, keyed by its config key.
+        """
+        if isinstance(image_np, SharedIntermediates):
+            shared = image_np
+        else:
+            shared = SharedIntermediates(image_np, self.color_order)
+        features = {}
+        for key, name, params in self.steps:
+            with stage('pipeline.' + key, extractor=name):
+                features[key] = EXTRACTORS[name](shared, self._engines, **params)
+        return features
+
+    def run_stream(self, images):
+        """
+        Extracts every configured feature from each image of an iterable.
+
+        Args:
+            images (iterable): Images, e.g. a (N, H, W[, C]) stack or a generator.
+
+        Yields:
+            dict: The features of each image, as returned by ``run``.
+        """
+        for image_np in images:
+            yield self.run(image_np)
@@ -0,0 +1,211 @@
+"""
+Feature extraction for many regions of interest (e.g. detected faces) of one image.
+
+Instead of cropping every box into a new image and running each extractor on it, the
+whole-image intermediates are computed once and shared by all boxes: the grayscale
+image, Sobel derivatives and Canny edges are sliced as views, LBP codes and Gabor
+magnitudes are pooled per box, and the crops that HOG needs at a canonical size are
+resized into one preallocated stack and described in a single engine batch.
+
+Boxes are (top, left, bottom, right) pixel coordinates, as returned by
+``sliding_window_hog``.
+"""
+import cv2
+import numpy as np
+
+from .instrumentation import count, stage
+from .pipeline import EngineCache, SharedIntermediates, parse_extractors
+
+
+def as_boxes(boxes, image_shape):
+    """
+    Validates boxes and clips them to an image.
+
+    Args:
+        boxes (array-like): (N, 4) boxes as (top, left, bottom, right).
+        image_shape (tuple): The image shape.
+
+    Returns:
+        numpy.ndarray: The clipped boxes as an (N, 4) int64 array.
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4).copy()
+    height, width = image_shape[:2]
+    np.clip(boxes[:, 0::2], 0, height, out=boxes[:, 0::2])
+    np.clip(boxes[:, 1::2], 0, width, out=boxes[:, 1::2])
+    if np.any(boxes[:, 2] <= boxes[:, 0]) or np.any(boxes[:, 3] <= boxes[:, 1]):
+        raise ValueError("Every box must overlap the image and have a positive size.")
+    return boxes
+
+
+def resize_boxes(image_np, boxes, size, out=None):
+    """
+    Resizes the boxes of an image into one (N, rows, cols[, C]) stack.
+
+    The crops are views of ``image_np``; each is resized straight into its slot of the
+    output, with area interpolation when shrinking and bilinear when enlarging.
+
+    Args:
+        image_np (numpy.ndarray): The image.
+        boxes (numpy.ndarray): (N, 4) boxes as returned by ``as_boxes``.
+        size (tuple): The (rows, cols) of every resized crop.
+        out (numpy.ndarray, optional): A preallocated output array.
+
+    Returns:
+        numpy.ndarray: The resized crops.
+    """
+    if out is None:
+        out = np.empty((len(boxes),) + tuple(size) + image_np.shape[2:], dtype=image_np.dtype)
+        count('roi.bytes', out.nbytes)
+    for i, (top, left, bottom, right) in enumerate(boxes):
+        shrink = bottom - top >= size[0] and right - left >= size[1]
+        cv2.resize(image_np[top:bottom, left:right], (size[1], size[0]), dst=out[i],
+                   interpolation=cv2.INTER_AREA if shrink else cv2.INTER_LINEAR)
+    return out
+
+
+def _roi_canny(shared, boxes, size, engines, t_lower=50, t_upper=300):
+    dx, dy = shared.sobel
+    edges = cv2.Canny(dx, dy, t_lower, t_upper)
+    return [edges[top:bottom, left:right] for top, left, bottom, right in boxes]
+
+
+def _roi_hog(shared, boxes, size, engines, orientations=9, pixels_per_cell=(8, 8), cells_per_block=(2, 2),
+             block_norm='L2-Hys'):
+    from .hog_features import HOGEngine
+
+    key = ('hog', tuple(size), orientations, tuple(pixels_per_cell), tuple(cells_per_block), block_norm)
+    engine = engines.get(key, lambda: HOGEngine(size, orientations, pixels_per_cell, cells_per_block, block_norm))
+    with stage('roi.resize', n_boxes=len(boxes)):
+        crops = resize_boxes(shared.gray_float, boxes, size)
+    return engine.compute_batch(crops)
+
+
+def _roi_lbp(shared, boxes, size, engines, radius=3, n_points=None, method='uniform', grid=(8, 8), normalize=True):
+    from .lbp_features import LBPEngine
+
+    gray = shared.gray
+    key = ('lbp', gray.shape, radius, n_points, method)
+    engine = engines.get(key, lambda: LBPEngine(gray.shape, radius, n_points, method, grid))
+    engine.check_histograms()
+    codes = engine.codes(gray)
+
+    n_cells = grid[0] * grid[1]
+    hist = np.empty((len(boxes), n_cells, engine.n_bins), dtype=np.float32)
+    with stage('lbp.histograms', n_boxes=len(boxes)):
+        for i, (top, left, bottom, right) in enumerate(boxes):
+            # Cells are spread over each box exactly as LBPEngine spreads them over an image
+            height, width = bottom - top, right - left
+            row_cells = np.searchsorted((np.arange(1, grid[0]) * height) // grid[0], np.arange(height), side='right')
+            col_cells = np.searchsorted((np.arange(1, grid[1]) * width) // grid[1], np.arange(width), side='right')
+            cells = row_cells[:, None] * grid[1] + col_cells[None, :]
+            index = cells * engine.n_bins + codes[top:bottom, left:right]
+            hist[i] = np.bincount(index.ravel(), minlength=n_cells * engine.n_bins).reshape(n_cells, -1)
+            if normalize:
+                hist[i] /= np.maximum(np.bincount(cells.ravel(), minlength=n_cells), 1)[:, None]
+    return hist.reshape(len(boxes), n_cells * engine.n_bins)
+
+
+def _roi_gabor(shared, boxes, size, engines, thetas=None, freqs=None, pyramid=False, grid=(4, 4)):
+    from .gabor_features import GaborBank, pooled_statistics
+
+    gray = shared.gray
+    key = ('gabor', gray.shape,
+           None if thetas is None else tuple(thetas), None if freqs is None else tuple(freqs), pyramid)
+    bank = engines.get(key, lambda: GaborBank(gray.shape, thetas=thetas, freqs=freqs, pyramid=pyramid))
+
+    out = np.empty((len(boxes), len(bank), grid[0], grid[1], 3))
+    with stage('gabor.filtering', n_boxes=len(boxes)):
+        spectrum = bank.image_fft(gray)
+        for i in range(len(bank)):
+            # Decimated (pyramid) responses are pooled at their own resolution
+            step = bank.decimations[i]
+            magnitude = bank.magnitude(spectrum, i, upsample=False)
+            for j, (top, left, bottom, right) in enumerate(boxes):
+                region = magnitude[top // step:-(-bottom // step), left // step:-(-right // step)]
+                out[j, i] = pooled_statistics(region, grid)
+    return out
+
+
+ROI_EXTRACTORS = {
+    'canny': _roi_canny,
+    'hog': _roi_hog,
+    'lbp': _roi_lbp,
+    'gabor': _roi_gabor,
+}
+
+
+class ROIPipeline:
+    """
+    Runs several extractors on many boxes of one image, sharing whole-image work between boxes.
+
+    Outputs per extractor, for N boxes:
+
+    - 'canny': a list of N edge-map views of the whole-image Canny edges.
+    - 'hog': (N, n_features) float32 descriptors of the box crops, resized to ``size``.
+    - 'lbp': (N, grid_rows * grid_cols * n_bins) float32 histograms of the whole-image
+      LBP codes inside each box (params radius, n_points, method, grid, normalize).
+    - 'gabor': (N, n_filters, grid_rows, grid_cols, 3) mean, variance and energy of the
+      whole-image Gabor magnitudes inside each box (params thetas, freqs, pyramid, grid).
+
+    Boxes with fewer rows or columns than the LBP or Gabor grid leave some cells without
+    pixels; those cells are 0 in both.
+
+    Because the intermediates are computed on the whole image, pixels near a box border
+    see their real neighbours rather than the zero or reflected padding of a separate crop,
+    so values there differ slightly from running the extractors on crops. Engines are
+    built once per image shape and reused, e.g. across the frames of a video.
+
+    Args:
+        extractors (list): Extractor configs, as for ``FeaturePipeline``; names are
+            'canny', 'hog', 'lbp' and 'gabor'.
+        size (tuple): The canonical (rows, cols) face size used by HOG.
+        color_order (str): Channel order of color input, 'rgb' or 'bgr'.
+    """
+
+    def __init__(self, extractors=('hog', 'lbp'), size=(64, 64), color_order='rgb'):
+        if color_order not in ('rgb', 'bgr'):
+            raise ValueError("color_order must be 'rgb' or 'bgr'.")
+        self.color_order = color_order
+        self.size = tuple(size)
+        self.steps = parse_extractors(extractors, ROI_EXTRACTORS)
+        self._engines = EngineCache()
+
+    def run(self, image_np, boxes):
+        """
+        Extracts every configured feature for every box.
+
+        Args:
+            image_np (numpy.ndarray or SharedIntermediates): The input image, grayscale (H, W)
+                or color (H, W, 3), or the output of ``FeaturePipeline.prepare``.
+            boxes (array-like): (N, 4) boxes as (top, left, bottom, right); clipped to the image.
+
+        Returns:
+            dict: The features of each extractor, keyed by its config key.
+        """
+        if isinstance(image_np, SharedIntermediates):
+            shared = image_np
+        else:
+            shared = SharedIntermediates(image_np, self.color_order)
+        boxes = as_boxes(boxes, shared.image.shape)
+        features = {}
+        for key, name, params in self.steps:
+            with stage('roi.' + key, extractor=name, n_boxes=len(boxes)):
+                features[key] = ROI_EXTRACTORS[name](shared, boxes, self.size, self._engines, **params)
+        return features
+
+
+def extract_roi_features(image_np, boxes, extractors=('hog', 'lbp'), size=(64, 64), color_order='rgb'):
+    """
+    Extracts features for many boxes (e.g. detected faces) of one image in one call.
+
+    Args:
+        image_np (numpy.ndarray): The input image, grayscale (H, W) or color (H, W, 3).
+        boxes (array-like): (N, 4) boxes as (top, left, bottom, right).
+        extractors (list): Extractor configs, see ``ROIPipeline``.
+        size (tuple): The canonical (rows, cols) face size used by HOG.
+        color_order (str): Channel order of color input, 'rgb' or 'bgr'.
+
+    Returns:
+        dict: The features of each extractor for all boxes, see ``ROIPipeline``.
+    """
+    return ROIPipeline(extractors, size, color_order).run(image_np, boxes)
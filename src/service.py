@@ -0,0 +1,360 @@
+"""
+A local asyncio feature-extraction service with request micro-batching.
+
+Requests are queued, grouped into micro-batches of the same extractor, parameters and
+image shape, and run through the extractors' batched code paths on a bounded thread or
+process pool. A batch is dispatched as soon as it is full or the oldest request in it
+has waited ``max_latency`` seconds, so light load keeps latency low and heavy load gets
+large, efficient batches. Everything runs offline on the standard library.
+
+In Python::
+
+    async with FeatureService(max_batch_size=32, max_latency=0.005) as service:
+        features = await service.extract(image, 'hog', orientations=9)
+
+Over HTTP (``python -m src.service --port 8765``)::
+
+    POST /extract/hog?orientations=12      body: an encoded image (PNG, JPEG, ...) or a .npy array
+    GET  /metrics                           queue depth, batch sizes and latency percentiles
+    GET  /health
+"""
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+from collections import deque
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+
+from .backends import ProcessBackend, ThreadBackend
+from .instrumentation import count
+
+_LATENCY_WINDOW = 10000
+_STOP = object()  # queued by close() to end the batching loop
+
+
+def _run_batch(name, params, images):
+    """Runs the batched variant of an extractor (on a pool thread or worker process)."""
+    from . import get_extractor
+
+    return get_extractor(name, 'batch')(images, batch_size=len(images), **params)
+
+
+def _split(result, n_items):
+    """Splits a batch result (an array or a tuple of arrays) into per-image results."""
+    if isinstance(result, tuple):
+        return [tuple(part[i] for part in result) for i in range(n_items)]
+    return [result[i] for i in range(n_items)]
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None}
+    p50, p90, p99 = np.percentile(np.asarray(values) * 1000, [50, 90, 99])
+    return {'p50': p50, 'p90': p90, 'p99': p99}
+
+
+class FeatureService:
+    """
+    Micro-batches concurrent extraction requests onto a bounded worker pool.
+
+    Requests that cannot share a batch (other extractor, parameters, image shape or dtype)
+    are batched separately. At most ``max_pending_batches`` batches run at once; while
+    they do, new requests keep accumulating, so batches grow with the load. When the
+    request queue is full, ``extract`` waits, which pushes back on the callers.
+
+    Args:
+        max_batch_size (int): Largest number of images per batch.
+        max_latency (float): Longest time in seconds a request waits for its batch to fill.
+        backend (str or backend): 'threads' (OpenCV, NumPy and SciPy release the GIL) or
+            'processes' for a pool owned by the service, or a backend instance.
+        max_workers (int, optional): Number of workers. Defaults to all cores.
+        max_queue_size (int): Largest number of queued requests.
+        max_pending_batches (int, optional): Largest number of batches in flight.
+            Defaults to the number of workers.
+    """
+
+    def __init__(self, max_batch_size=32, max_latency=0.005, backend='threads', max_workers=None,
+                 max_queue_size=1024, max_pending_batches=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        if isinstance(backend, str):
+            # A pool of its own: batched extractors such as Gabor use the shared pools
+            # internally and must not wait for a slot of the pool they are running on
+            if backend not in ('threads', 'processes'):
+                raise ValueError(f"Unknown backend '{backend}'. Choose from ['processes', 'threads'].")
+            backend = (ThreadBackend if backend == 'threads' else ProcessBackend)(max_workers)
+            self._owns_backend = True
+        else:
+            self._owns_backend = False
+        self.backend = backend
+        self.max_queue_size = max_queue_size
+        self.max_pending_batches = max_pending_batches or self.backend.max_workers
+        self._queue = None
+        self._batcher = None
+        self._closing = False
+        self._batches = set()
+        self._latencies = deque(maxlen=_LATENCY_WINDOW)
+        self._batch_seconds = deque(maxlen=_LATENCY_WINDOW)
+        self._stats = {'requests': 0, 'failed': 0, 'batches': 0, 'batched_images': 0}
+
+    async def start(self):
+        """Starts the batching loop on the running event loop."""
+        if self._batcher is None:
+            self._queue = asyncio.Queue(self.max_queue_size)
+            self._slots = asyncio.Semaphore(self.max_pending_batches)
+            self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+
+    async def close(self):
+        """Stops accepting requests, finishes the accepted ones, and shuts down an owned pool."""
+        if self._batcher is not None:
+            self._closing = True
+            if not self._batcher.done():
+                # The loop dispatches everything queued before the marker, then returns
+                await self._queue.put(_STOP)
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                item[3].cancel()
+        self._closing = False
+        if self._owns_backend:
+            self.backend.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def extract(self, image_np, extractor='hog', **params):
+        """
+        Extracts the features of one image, batched with concurrent requests.
+
+        Args:
+            image_np (numpy.ndarray): The input image.
+            extractor (str): A registered extractor name with a 'batch' variant.
+            **params: Keyword arguments of the batched extractor.
+
+        Returns:
+            The extractor's result for this image: a row (a view) of the batch result, or a
+            tuple of rows for extractors that return several arrays.
+        """
+        if self._closing:
+            raise RuntimeError("The service is closing.")
+        await self.start()
+        image_np = np.asarray(image_np)
+        key = (extractor, json.dumps(params, sort_keys=True, default=repr), image_np.shape, image_np.dtype.str)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((key, image_np, params, future, time.perf_counter()))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        item = None
+        while item is not _STOP:
+            groups = {}
+            item = await self._queue.get()
+            deadline = loop.time() + self.max_latency
+            while item is not _STOP:
+                key = item[0]
+                groups.setdefault(key, []).append(item)
+                if len(groups[key]) >= self.max_batch_size:
+                    await self._dispatch(groups.pop(key))
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            for group in groups.values():
+                await self._dispatch(group)
+
+    async def _dispatch(self, items):
+        # Waiting for a free slot here lets the queue fill up, so the next batches are larger
+        await self._slots.acquire()
+        task = asyncio.get_running_loop().create_task(self._run(items))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run(self, items):
+        (name, _, _, _), _, params, _, _ = items[0]
+        start = time.perf_counter()
+        try:
+            images = np.stack([image for _, image, _, _, _ in items])
+            result = await asyncio.wrap_future(self.backend.submit(_run_batch, name, params, images))
+            outputs = _split(result, len(items))
+        except Exception as exc:
+            self._stats['failed'] += len(items)
+            for _, _, _, future, _ in items:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._slots.release()
+
+        end = time.perf_counter()
+        self._stats['requests'] += len(items)
+        self._stats['batches'] += 1
+        self._stats['batched_images'] += len(items)
+        self._batch_seconds.append(end - start)
+        count('service.batch_size', len(items), extractor=name)
+        for (_, _, _, future, queued), output in zip(items, outputs):
+            self._latencies.append(end - queued)
+            if not future.done():  # the caller may have been cancelled
+                future.set_result(output)
+
+    def metrics(self):
+        """
+        Returns the service metrics.
+
+        Returns:
+            dict: Queue depth and capacity, batches in flight, request, failure and batch
+            counts, the mean batch size, and p50/p90/p99 request latency and batch run time
+            in milliseconds over the last 10000 requests and batches.
+        """
+        stats = self._stats
+        return {
+            'queue_depth': 0 if self._queue is None else self._queue.qsize(),
+            'max_queue_size': self.max_queue_size,
+            'batches_in_flight': len(self._batches),
+            'requests': stats['requests'],
+            'failed': stats['failed'],
+            'batches': stats['batches'],
+            'mean_batch_size': stats['batched_images'] / stats['batches'] if stats['batches'] else 0.0,
+            'latency_ms': _percentiles(self._latencies),
+            'batch_ms': _percentiles(self._batch_seconds),
+        }
+
+
+def _decode_body(body):
+    """Reads a .npy array, or decodes an image file to grayscale."""
+    if body.startswith(b'\x93NUMPY'):
+        return np.load(io.BytesIO(body), allow_pickle=False)
+    from .loading import decode_image
+
+    return decode_image(body)
+
+
+def _encode_result(result):
+    """Serialises a result as .npy, or as .npz when it is a tuple of arrays."""
+    buffer = io.BytesIO()
+    if isinstance(result, tuple):
+        np.savez(buffer, *result)
+        return 'application/x-npz', buffer.getvalue()
+    np.save(buffer, result, allow_pickle=False)
+    return 'application/x-npy', buffer.getvalue()
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class FeatureServer:
+    """
+    A minimal HTTP/1.1 front end (with keep-alive) for a ``FeatureService``.
+
+    Args:
+        service (FeatureService): The service that runs the requests.
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        """Serves requests until cancelled."""
+        async with self.service:
+            server = await asyncio.start_server(self._handle, host, port)
+            async with server:
+                await server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, content_type, payload = await self._respond(method, target, body)
+                writer.write(
+                    f'HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: {content_type}\r\n'
+                    f'Content-Length: {len(payload)}\r\n\r\n'.encode('latin-1') + payload
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass  # the server is shutting down; close the connection quietly
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, 'text/plain', b'ok'
+        if url.path == '/metrics':
+            return 200, 'application/json', json.dumps(self.service.metrics()).encode('utf-8')
+        if not url.path.startswith('/extract/'):
+            return 404, 'text/plain', b'not found'
+        if method != 'POST':
+            return 405, 'text/plain', b'use POST'
+
+        from .extract import parse_extractor
+
+        try:
+            name, params = parse_extractor(url.path[len('/extract/'):] + ':' + unquote(url.query).replace('&', ','))
+            image = await asyncio.to_thread(_decode_body, body)
+        except (ValueError, OSError) as exc:
+            return 400, 'text/plain', str(exc).encode('utf-8')
+        try:
+            result = await self.service.extract(image, name, **params)
+        except Exception as exc:
+            return 500, 'text/plain', f'{type(exc).__name__}: {exc}'.encode('utf-8')
+        content_type, payload = await asyncio.to_thread(_encode_result, result)
+        return 200, content_type, payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.service', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1).')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765).')
+    parser.add_argument('--max-batch-size', type=int, default=32, help='Largest batch (default: 32).')
+    parser.add_argument('--max-latency-ms', type=float, default=5.0,
+                        help='Longest wait for a batch to fill, in milliseconds (default: 5).')
+    parser.add_argument('--backend', choices=('threads', 'processes'), default='threads', help='Worker pool kind.')
+    parser.add_argument('--workers', type=int, help='Number of workers (default: all cores).')
+    parser.add_argument('--max-queue-size', type=int, default=1024, help='Largest number of queued requests.')
+    args = parser.parse_args(argv)
+
+    service = FeatureService(args.max_batch_size, args.max_latency_ms / 1000, args.backend, args.workers,
+                             args.max_queue_size)
+    print(f"Serving on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(FeatureServer(service).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
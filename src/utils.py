@@ -1,75 +1,46 @@
-import cv2
-import numpy as np
-import requests
-import matplotlib.pyplot as plt
-from io import BytesIO
-from PIL import Image
+import threading
+
+_loader = None
+_loader_lock = threading.Lock()
 
 def download_image(url, grayscale=True):
     """
     Downloads an image from a given URL and returns it as a NumPy array.
 
+    Requests go through a shared, pooled ``ImageLoader`` session with a timeout and
+    retries. Use ``loading.ImageLoader`` directly for caching and concurrent bulk loading.
+
+    The bytes are decoded with ``cv2.imdecode`` (see ``loading.decode_image``) rather than
+    PIL, so EXIF orientation is applied and JPEGs come out upright, and only the formats
+    of the installed OpenCV build can be read (GIF, for example, needs OpenCV 4.11 or
+    newer built with its GIF codec).
+
     Args:
         url (str): The URL of the image.
         grayscale (bool): If True, converts the image to grayscale. Defaults to True.
 
     Returns:
-        numpy.ndarray: The image as a NumPy array.
-    """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
-    }
-    response = requests.get(url, headers=headers)
-    response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
+        numpy.ndarray: The image as a NumPy array, uint8 grayscale (H, W) or RGB (H, W, 3).
 
-    image_bytes = BytesIO(response.content)
-    if grayscale:
-        pil_img = Image.open(image_bytes).convert('L') # Convert to grayscale
-    else:
-        pil_img = Image.open(image_bytes).convert('RGB') # Convert to RGB
-    
-    return np.array(pil_img)
-
-def plot_images(images, titles, figsize=(12, 6), cmap='gray'):
-    """
-    Plots a list of images using matplotlib.
-
-    Args:
-        images (list): A list of NumPy arrays representing the images.
-        titles (list): A list of strings for the titles of each image.
-        figsize (tuple): Figure size (width, height) in inches.
-        cmap (str): Colormap for displaying images. Defaults to 'gray'.
-    """
-    num_images = len(images)
-    if num_images == 0:
-        print("No images to plot.")
-        return
-
-    # Determine grid size for plotting
-    rows = int(np.ceil(num_images / 2)) if num_images > 1 else 1
-    cols = 2 if num_images > 1 else 1
-    if num_images == 1:
-        rows = 1
-        cols = 1
-
-    plt.figure(figsize=figsize)
-    for i, (img, title) in enumerate(zip(images, titles)):
-        plt.subplot(rows, cols, i + 1)
-        plt.title(title)
-        if img.ndim == 2: # Grayscale image
-            plt.imshow(img, cmap=cmap)
-        else: # Color image (assuming RGB)
-            plt.imshow(img)
-        plt.axis('off')
-    plt.tight_layout()
-    plt.show()
-
-def save_plot_as_image(filename):
-    """
-    Saves the current matplotlib plot as an image file.
-
-    Args:
-        filename (str): The name of the file to save the plot as.
+    Raises:
+        requests.RequestException: If the request fails, e.g. with an error status that
+            persists after the retries.
+        ValueError: If the downloaded bytes cannot be decoded as an image.
     """
-    plt.savefig(filename, bbox_inches='tight', pad_inches=0.1)
-    print(f"Plot saved as {filename}")
\ No newline at end of file
+    # Imported here, so importing utils does not load OpenCV and requests
+    from .loading import ImageLoader, decode_image
+
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = ImageLoader()
+    return decode_image(_loader.fetch(url), grayscale=grayscale)
+
+
+def __getattr__(name):
+    # The plotting helpers moved to ``plotting``; they are still importable from here,
+    # but matplotlib is only loaded when one of them is requested.
+    if name in ('plot_images', 'save_plot_as_image'):
+        from . import plotting
+        return getattr(plotting, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,216 @@
+"""
+Pipelined feature extraction for video files, cameras, image sequences and frame generators.
+
+Decoding, preprocessing and extraction run as overlapped stages: one thread decodes frames,
+one computes the shared intermediates of ``FeaturePipeline`` (grayscale conversion, Sobel
+derivatives, ...), and a pool of threads runs the extractors. The stages are connected by
+bounded queues, so a slow stage blocks the ones before it instead of letting frames pile up
+in memory. OpenCV, NumPy and SciPy release the GIL in their kernels, so the stages run in
+parallel on CPU cores.
+
+Example:
+    for index, features in process_frames('clip.mp4', ['canny', 'hog'], step=2):
+        ...
+"""
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from .instrumentation import count, stage
+from .loading import IMAGE_EXTENSIONS, ImageLoader
+from .pipeline import FeaturePipeline
+
+_END = object()
+_POLL_SECONDS = 0.1
+
+
+class _Failure:
+    """Carries an exception raised in a stage thread to the consumer."""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _is_video(source):
+    if isinstance(source, int):  # a camera index
+        return True
+    if not isinstance(source, (str, os.PathLike)):
+        return False
+    source = os.fspath(source)
+    return not os.path.isdir(source) and not source.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _read_video(source, step, max_frames):
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video source {source!r}.")
+    try:
+        index = n_frames = 0
+        while max_frames is None or n_frames < max_frames:
+            if index % step:
+                # Skipped frames are only grabbed, not converted to BGR
+                if not capture.grab():
+                    return
+            else:
+                with stage('video.decode'):
+                    ok, frame = capture.read()
+                if not ok:
+                    return
+                yield index, frame
+                n_frames += 1
+            index += 1
+    finally:
+        capture.release()
+
+
+def read_frames(source, step=1, max_frames=None):
+    """
+    Yields the frames of a video, camera, image sequence or frame iterable.
+
+    Args:
+        source: A video file path or URL (anything ``cv2.VideoCapture`` opens), a camera
+            index, an image file or directory (searched recursively, in sorted order), a
+            list of image paths, or any iterable of images (e.g. a generator).
+        step (int): Keep every ``step``-th frame; the others are skipped without decoding
+            where the source allows it.
+        max_frames (int, optional): Stop after this many frames.
+
+    Yields:
+        tuple: (index, frame), where ``index`` counts every frame of the source, skipped
+        ones included. Frames decoded from files are BGR.
+    """
+    if step < 1:
+        raise ValueError("step must be at least 1.")
+    if _is_video(source):
+        yield from _read_video(source, step, max_frames)
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        loader = ImageLoader()
+        source = list(loader.expand(source))
+        loader.close()
+    n_frames = 0
+    for index, frame in enumerate(source):
+        if max_frames is not None and n_frames >= max_frames:
+            return
+        if index % step:
+            continue
+        if isinstance(frame, (str, os.PathLike)):
+            with stage('video.decode'):
+                path, frame = frame, cv2.imread(os.fspath(frame), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError(f"Cannot read image {path!r}.")
+        yield index, frame
+        n_frames += 1
+
+
+def _put(q, item, stop):
+    """Blocks until ``item`` is queued or the pipeline is stopped; returns False if stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(q, stop):
+    """Yields the items of a stage queue until its end marker, re-raising stage failures."""
+    while not stop.is_set():
+        try:
+            item = q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is _END:
+            return
+        if isinstance(item, _Failure):
+            raise item.exc
+        yield item
+
+
+def _start_stage(items, function, maxsize, stop, drop=False):
+    """
+    Runs ``function`` over ``items`` on a daemon thread and returns the bounded queue of results.
+
+    With ``drop``, results that do not fit in the queue are discarded instead of blocking,
+    which keeps a live source from falling behind.
+    """
+    out = queue.Queue(maxsize)
+
+    def worker():
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                result = function(item)
+                if not drop:
+                    _put(out, result, stop)
+                    continue
+                try:
+                    out.put_nowait(result)
+                except queue.Full:
+                    count('video.dropped_frames', 1)
+        except BaseException as exc:
+            _put(out, _Failure(exc), stop)
+        finally:
+            if hasattr(items, 'close'):
+                items.close()  # e.g. releases the video capture when stopped early
+            _put(out, _END, stop)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return out
+
+
+def process_frames(source, extractors, step=1, max_frames=None, workers=2, queue_size=8, drop_frames=False,
+                   color_order='bgr'):
+    """
+    Extracts features from a stream of frames with overlapped decode, preprocess and extract stages.
+
+    Args:
+        source: Any source accepted by ``read_frames``.
+        extractors (list or FeaturePipeline): ``FeaturePipeline`` extractor configs, e.g.
+            ``['canny', ('lbp', {'radius': 2})]``, or a pipeline.
+        step (int): Process every ``step``-th frame of the source.
+        max_frames (int, optional): Stop after this many frames have been read (after skipping).
+        workers (int): Number of extraction threads.
+        queue_size (int): Capacity of each queue between stages, which bounds the number
+            of frames held in memory.
+        drop_frames (bool): If True, decoded frames are dropped while the later stages are
+            busy, instead of pausing the decoder. Use this for cameras and other live
+            sources, so results stay current when extraction cannot keep up.
+        color_order (str): Channel order of color frames, 'bgr' (as decoded by OpenCV) or
+            'rgb'. Ignored when ``extractors`` is a pipeline.
+
+    Yields:
+        tuple: (index, features) in frame order, where ``index`` is the frame's position in
+        the source and ``features`` is the dict returned by ``FeaturePipeline.run``.
+    """
+    if workers < 1 or queue_size < 1:
+        raise ValueError("workers and queue_size must be at least 1.")
+    pipeline = extractors if isinstance(extractors, FeaturePipeline) else FeaturePipeline(extractors, color_order)
+
+    stop = threading.Event()
+    frames = _start_stage(read_frames(source, step, max_frames), lambda item: item, queue_size, stop,
+                          drop=drop_frames)
+    prepared = _start_stage(_drain(frames, stop), lambda item: (item[0], pipeline.prepare(item[1])),
+                            queue_size, stop)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for index, shared in _drain(prepared, stop):
+            pending.append((index, executor.submit(pipeline.run, shared)))
+            if len(pending) >= workers + queue_size:
+                index, future = pending.popleft()
+                yield index, future.result()
+        while pending:
+            index, future = pending.popleft()
+            yield index, future.result()
+    finally:
+        # Also reached when the consumer stops early: unblock and end the stage threads
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
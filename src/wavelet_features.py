@@ -1,41 +1,92 @@
+import json
+import os
+from functools import lru_cache, partial
+
 import numpy as np
 import pywt
 from skimage import color
 
-def _apply_threshold(coeffs, threshold_factor):
-    """Apply threshold to wavelet coefficients, return filtered coeffs and count of retained."""
-    filtered_coeffs = []
+from .backends import SharedArray, get_backend
+from .batching import batch_length, collect, iter_batches
+from .instrumentation import count, stage
+
+
+def _band_slices(coeff_slices):
+    """Flattens ``pywt.coeffs_to_array`` slices into one slice tuple per subband."""
+    bands = [coeff_slices[0]]
+    for detail in coeff_slices[1:]:
+        bands.extend(detail.values())
+    return bands
+
+
+def _threshold_in_place(coeff_array, coeff_slices, threshold_factor):
+    """
+    Apply threshold to wavelet coefficients laid out by ``pywt.coeffs_to_array``, in place.
+
+    The threshold of every subband is ``threshold_factor`` times its largest magnitude,
+    taken separately for each index of the leading (image/channel) axes. The magnitudes
+    are computed once for the whole array and a single mask buffer is reused for every
+    subband.
+
+    Returns:
+        numpy.ndarray: The count of retained coefficients per leading index (a 0-d array if there are no leading axes).
+    """
+    magnitude = np.abs(coeff_array)
+    mask = np.empty(coeff_array.shape, dtype=bool)
     retained_count = 0
-    for coeff in coeffs:
-        if isinstance(coeff, np.ndarray):
-            # Single array (cA)
-            max_val = np.max(np.abs(coeff))
-            thresh = threshold_factor * max_val
-            mask = np.abs(coeff) > thresh
-            filtered_coeff = coeff * mask
-            retained_count += np.sum(mask)
-            filtered_coeffs.append(filtered_coeff)
-        else:
-            # Tuple of detail coefficients (cH, cV, cD)
-            filtered_detail = []
-            for detail in coeff:
-                max_val = np.max(np.abs(detail))
-                thresh = threshold_factor * max_val
-                mask = np.abs(detail) > thresh
-                filtered_detail.append(detail * mask)
-                retained_count += np.sum(mask)
-            filtered_coeffs.append(tuple(filtered_detail))
-    return filtered_coeffs, retained_count
-
-def extract_wavelet_features(image_np, wavelet='db1', decomposition_level=3, threshold_factor=0.01):
+
+    for band in _band_slices(coeff_slices):
+        band_magnitude = magnitude[band]
+        thresh = threshold_factor * band_magnitude.max(axis=(-2, -1), keepdims=True)
+        band_mask = mask[band]
+        np.greater(band_magnitude, thresh, out=band_mask)
+        np.multiply(coeff_array[band], band_mask, out=coeff_array[band])
+        retained_count = retained_count + np.count_nonzero(band_mask, axis=(-2, -1))
+    return np.asarray(retained_count)
+
+
+def _compress(data, wavelet, decomposition_level, threshold_factor):
+    """
+    Decomposes, thresholds and reconstructs ``data`` over its last two axes in one transform call.
+
+    Returns:
+        tuple: The original coefficients, the filtered coefficients, the reconstruction and
+        the retained counts per leading index.
+    """
+    with stage('wavelet.decomposition', level=decomposition_level):
+        coeffs = pywt.wavedec2(data, wavelet, level=decomposition_level, axes=(-2, -1))
+        coeff_array, coeff_slices = pywt.coeffs_to_array(coeffs, axes=(-2, -1))
+    count('wavelet.bytes', coeff_array.nbytes)
+    with stage('wavelet.thresholding'):
+        retained_counts = _threshold_in_place(coeff_array, coeff_slices, threshold_factor)
+    with stage('wavelet.reconstruction'):
+        filtered_coeffs = pywt.array_to_coeffs(coeff_array, coeff_slices, output_format='wavedec2')
+        reconstructed = pywt.waverec2(filtered_coeffs, wavelet, axes=(-2, -1))
+    return coeffs, filtered_coeffs, reconstructed, retained_counts
+
+
+def _split_channels(coeffs, n_channels):
+    """Turns channel-batched wavedec2 coefficients into one coefficient list per channel (as views)."""
+    return [
+        [coeffs[0][c]] + [tuple(detail[c] for detail in details) for details in coeffs[1:]]
+        for c in range(n_channels)
+    ]
+
+
+def extract_wavelet_features(image_np, wavelet='db1', decomposition_level=3, threshold_factor=0.01, dtype=np.float64):
     """
     Performs wavelet decomposition and reconstruction on an image, with optional thresholding.
 
+    All channels of a color image are transformed in a single ``wavedec2``/``waverec2`` call,
+    and the coefficients are thresholded in place in a flat ``coeffs_to_array`` layout.
+
     Args:
         image_np (numpy.ndarray): The input image as a NumPy array (RGB or grayscale).
         wavelet (str): Name of the wavelet to use (e.g., 'db1', 'haar').
         decomposition_level (int): Level of decomposition.
         threshold_factor (float): Factor to determine threshold for coefficients (e.g., 0.01 for 1% of max).
+        dtype (numpy.dtype): Floating point type of the transform. float32 halves memory use;
+            the reconstruction may then differ from float64 by rounding.
 
     Returns:
         tuple: A tuple containing:
@@ -44,57 +95,382 @@ def extract_wavelet_features(image_np, wavelet='db1', decomposition_level=3, thr
             - list: The original wavelet coefficients for each channel (if color) or image (if grayscale).
             - list: The filtered wavelet coefficients for each channel (if color) or image (if grayscale).
     """
-    original_coeffs = []
-    filtered_coeffs_list = []
-    retained_counts = []
-    
-    if image_np.ndim == 3: # Color image (RGB)
-        # Ensure image is float for wavelet transform
-        img_float = image_np.astype(float)
+    is_color = image_np.ndim == 3
+
+    # Ensure dimensions are suitable for wavelet transform
+    array_size = min(image_np.shape[:2]) - (min(image_np.shape[:2]) % (2**decomposition_level))
+    img_float = image_np[:array_size, :array_size].astype(dtype)
+    if is_color:
+        # Channels first, so every channel is transformed over the last two (spatial) axes at once
+        img_float = np.moveaxis(img_float, -1, 0)
+
+    coeffs, filtered_coeffs, reconstructed_image, retained_counts = _compress(
+        img_float, wavelet, decomposition_level, threshold_factor
+    )
+
+    if is_color:
+        n_channels = img_float.shape[0]
+        original_coeffs = _split_channels(coeffs, n_channels)
+        filtered_coeffs_list = _split_channels(filtered_coeffs, n_channels)
+        reconstructed_image = np.moveaxis(reconstructed_image, 0, -1)
+        avg_retained_count = retained_counts.mean()
+    else:
+        original_coeffs = [coeffs]
+        filtered_coeffs_list = [filtered_coeffs]
+        avg_retained_count = retained_counts.item()
+
+    reconstructed_image = np.clip(reconstructed_image, 0, 255).astype(np.uint8)
+
+    total_pixels = array_size * array_size
+    compression_ratio = avg_retained_count / total_pixels if total_pixels > 0 else 0
+
+    return reconstructed_image, compression_ratio, original_coeffs, filtered_coeffs_list
+
+
+def wavelet_threshold_sweep(image_np, threshold_factors, wavelet='db1', decomposition_level=3, reconstruct=False, dtype=np.float64):
+    """
+    Evaluates many threshold factors on one image with a single wavelet decomposition.
+
+    The image is decomposed once and the coefficient magnitudes of every subband are
+    sorted once, so the compression ratio of each threshold factor costs only a binary
+    search per subband. Reconstruction errors are computed only for the factors that
+    ask for them. The compression ratios match ``extract_wavelet_features``.
+
+    Args:
+        image_np (numpy.ndarray): The input image as a NumPy array (RGB or grayscale).
+        threshold_factors (list): The threshold factors to evaluate.
+        wavelet (str): Name of the wavelet to use (e.g., 'db1', 'haar').
+        decomposition_level (int): Level of decomposition.
+        reconstruct (bool or list): If True, also reconstruct the image for every factor and
+            measure its error. A list of indices into ``threshold_factors`` reconstructs only those.
+        dtype (numpy.dtype): Floating point type of the transform.
+
+    Returns:
+        numpy.ndarray or tuple: The compression ratio of each factor. If ``reconstruct`` is set,
+        a tuple containing:
+            - numpy.ndarray: The compression ratio of each factor.
+            - numpy.ndarray: The mean squared error of each reconstruction (NaN where not reconstructed).
+            - numpy.ndarray: The PSNR in dB of each reconstruction (NaN where not reconstructed).
+    """
+    threshold_factors = np.asarray(threshold_factors, dtype=np.float64)
+    is_color = image_np.ndim == 3
+
+    # Ensure dimensions are suitable for wavelet transform
+    array_size = min(image_np.shape[:2]) - (min(image_np.shape[:2]) % (2**decomposition_level))
+    cropped = image_np[:array_size, :array_size]
+    img_float = cropped.astype(dtype)
+    if is_color:
+        img_float = np.moveaxis(img_float, -1, 0)
+
+    coeffs = pywt.wavedec2(img_float, wavelet, level=decomposition_level, axes=(-2, -1))
+    coeff_array, coeff_slices = pywt.coeffs_to_array(coeffs, axes=(-2, -1))
+    magnitude = np.abs(coeff_array)
+    n_channels = img_float.shape[0] if is_color else 1
+
+    # Sort each subband once; retained counts for any threshold are then a binary search
+    retained_counts = np.zeros((len(threshold_factors), n_channels))
+    band_max_map = np.zeros(coeff_array.shape, dtype=magnitude.dtype)
+    for band in _band_slices(coeff_slices):
+        band_magnitude = magnitude[band].reshape(n_channels, -1)
+        band_max = band_magnitude.max(axis=-1)
+        band_max_map[band] = band_max.reshape((n_channels, 1, 1) if is_color else (1, 1))
+        for c, sorted_magnitude in enumerate(np.sort(band_magnitude, axis=-1)):
+            thresh = threshold_factors * band_max[c]
+            retained_counts[:, c] += sorted_magnitude.size - np.searchsorted(sorted_magnitude, thresh, side='right')
+
+    total_pixels = array_size * array_size
+    compression_ratios = retained_counts.mean(axis=1) / total_pixels if total_pixels > 0 else np.zeros(len(threshold_factors))
+    if reconstruct is False or reconstruct is None:
+        return compression_ratios
+
+    indices = range(len(threshold_factors)) if reconstruct is True else reconstruct
+    mse = np.full(len(threshold_factors), np.nan)
+    filtered_array = np.empty_like(coeff_array)
+    mask = np.empty(coeff_array.shape, dtype=bool)
+    reference = cropped.astype(np.float64)
+    for i in indices:
+        np.greater(magnitude, threshold_factors[i] * band_max_map, out=mask)
+        np.multiply(coeff_array, mask, out=filtered_array)
+        filtered_coeffs = pywt.array_to_coeffs(filtered_array, coeff_slices, output_format='wavedec2')
+        reconstructed = pywt.waverec2(filtered_coeffs, wavelet, axes=(-2, -1))
+        if is_color:
+            reconstructed = np.moveaxis(reconstructed, 0, -1)
+        reconstructed = np.clip(reconstructed, 0, 255).astype(np.uint8)
+        mse[i] = np.mean((reconstructed - reference) ** 2)
+
+    with np.errstate(divide='ignore'):
+        psnr = 10 * np.log10(255.0 ** 2 / mse)
+    return compression_ratios, mse, psnr
+
+
+def extract_wavelet_features_stream(images, wavelet='db1', decomposition_level=3, threshold_factor=0.01, batch_size=32, dtype=np.float64):
+    """
+    Performs wavelet decomposition, thresholding and reconstruction on a stream of images, batch by batch.
+
+    Every image and channel of a batch goes through a single ``wavedec2``/``waverec2`` call
+    over the spatial axes. Thresholds are still computed per image, channel and subband, so
+    the results match ``extract_wavelet_features``.
+
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W[, C]) stack or any iterable of images.
+        wavelet (str): Name of the wavelet to use (e.g., 'db1', 'haar').
+        decomposition_level (int): Level of decomposition.
+        threshold_factor (float): Factor to determine threshold for coefficients (e.g., 0.01 for 1% of max).
+        batch_size (int): Number of images processed per batch.
+        dtype (numpy.dtype): Floating point type of the transform.
+
+    Yields:
+        tuple: For each batch, a tuple containing:
+            - numpy.ndarray: The reconstructed images, of shape (B, S, S[, C]).
+            - numpy.ndarray: The compression ratio of each image, of shape (B,).
+    """
+    for batch in iter_batches(images, batch_size):
+        is_color = batch.ndim == 4
 
         # Ensure dimensions are suitable for wavelet transform
-        array_size = min(img_float.shape[:2]) - (min(img_float.shape[:2]) % (2**decomposition_level))
-        img_float = img_float[:array_size, :array_size]
-
-        channels = [img_float[:, :, i] for i in range(img_float.shape[2])]
-        
-        for channel in channels:
-            coeffs = pywt.wavedec2(channel, wavelet, level=decomposition_level)
-            original_coeffs.append(coeffs)
-            filtered_coeffs, retained_count = _apply_threshold(coeffs, threshold_factor)
-            filtered_coeffs_list.append(filtered_coeffs)
-            retained_counts.append(retained_count)
-        
-        # Reconstruct each channel
-        reconstructed_channels = []
-        for filtered_coeff in filtered_coeffs_list:
-            rec_channel = pywt.waverec2(filtered_coeff, wavelet)
-            reconstructed_channels.append(rec_channel)
-        
-        reconstructed_image = np.stack(reconstructed_channels, axis=-1)
-        reconstructed_image = np.clip(reconstructed_image, 0, 255).astype(np.uint8)
+        array_size = min(batch.shape[1:3]) - (min(batch.shape[1:3]) % (2**decomposition_level))
+        img_float = batch[:, :array_size, :array_size].astype(dtype)
+        if is_color:
+            # Channels first, so the transform runs over the last two (spatial) axes
+            img_float = np.moveaxis(img_float, -1, 1)
+
+        _, _, reconstructed, retained_counts = _compress(img_float, wavelet, decomposition_level, threshold_factor)
+        if is_color:
+            reconstructed = np.moveaxis(reconstructed, 1, -1)
+            retained_counts = retained_counts.mean(axis=1)
+        reconstructed = np.clip(reconstructed, 0, 255).astype(np.uint8)
 
         total_pixels = array_size * array_size
-        avg_retained_count = sum(retained_counts) / len(retained_counts)
-        compression_ratio = avg_retained_count / total_pixels if total_pixels > 0 else 0
+        compression_ratios = retained_counts / total_pixels if total_pixels > 0 else np.zeros(len(batch))
+        yield reconstructed, compression_ratios
 
-    else: # Grayscale image
-        img_float = image_np.astype(float)
-        
-        # Ensure dimensions are suitable for wavelet transform
-        array_size = min(img_float.shape[:2]) - (min(img_float.shape[:2]) % (2**decomposition_level))
-        img_float = img_float[:array_size, :array_size]
 
-        coeffs = pywt.wavedec2(img_float, wavelet, level=decomposition_level)
-        original_coeffs.append(coeffs)
-        filtered_coeffs, retained_count = _apply_threshold(coeffs, threshold_factor)
-        filtered_coeffs_list.append(filtered_coeffs)
-        retained_counts.append(retained_count)
+def extract_wavelet_features_batch(images, wavelet='db1', decomposition_level=3, threshold_factor=0.01, batch_size=32, dtype=np.float64):
+    """
+    Performs wavelet decomposition, thresholding and reconstruction on many same-sized images.
 
-        reconstructed_image = pywt.waverec2(filtered_coeffs_list[0], wavelet)
-        reconstructed_image = np.clip(reconstructed_image, 0, 255).astype(np.uint8)
+    Unlike ``extract_wavelet_features``, the coefficient lists are not returned, which keeps
+    memory bounded by the batch size.
 
-        total_pixels = array_size * array_size
-        compression_ratio = retained_counts[0] / total_pixels if total_pixels > 0 else 0
+    Args:
+        images (numpy.ndarray or iterable): A (N, H, W[, C]) stack or any iterable of images.
+        wavelet (str): Name of the wavelet to use (e.g., 'db1', 'haar').
+        decomposition_level (int): Level of decomposition.
+        threshold_factor (float): Factor to determine threshold for coefficients (e.g., 0.01 for 1% of max).
+        batch_size (int): Number of images processed per batch.
+        dtype (numpy.dtype): Floating point type of the transform.
+
+    Returns:
+        tuple: A tuple containing:
+            - numpy.ndarray: The reconstructed images, of shape (N, S, S[, C]).
+            - numpy.ndarray: The compression ratio of each image, of shape (N,).
+    """
+    stream = extract_wavelet_features_stream(images, wavelet, decomposition_level, threshold_factor, batch_size, dtype)
+    return collect(stream, batch_length(images))
+
+
+def _tile_grid(shape, tile_size):
+    """Returns the ((r0, r1), (c0, c1)) bounds of every tile, row by row."""
+    height, width = shape[:2]
+    return [
+        ((r, min(r + tile_size, height)), (c, min(c + tile_size, width)))
+        for r in range(0, height, tile_size)
+        for c in range(0, width, tile_size)
+    ]
+
+
+@lru_cache(maxsize=16)
+def _tile_layout(shape, wavelet, decomposition_level):
+    """Returns the ``coeffs_to_array`` shape and slices of a (padded) tile shape."""
+    coeffs = pywt.wavedec2(np.zeros(shape), wavelet, level=decomposition_level, axes=(-2, -1))
+    coeff_array, coeff_slices = pywt.coeffs_to_array(coeffs, axes=(-2, -1))
+    return coeff_array.shape, coeff_slices
+
+
+def _padded_tile_shape(rows, cols, step, n_channels):
+    (r0, r1), (c0, c1) = rows, cols
+    spatial = (r1 - r0 + (-(r1 - r0) % step), c1 - c0 + (-(c1 - c0) % step))
+    return spatial if n_channels is None else (n_channels,) + spatial
+
+
+def _compress_tile_task(image, rows, cols, **params):
+    """Pool task: compresses one tile of an image, given as an array or a ``SharedArray`` descriptor."""
+    if isinstance(image, str):
+        image = SharedArray.attach(image)
+    return _compress_tile(image, rows, cols, **params)
+
+
+def _compress_tile(image_np, rows, cols, wavelet, decomposition_level, threshold_factor, dtype, value_dtype):
+    """Decomposes and thresholds one tile; returns the flat indices and values of the retained coefficients."""
+    (r0, r1), (c0, c1) = rows, cols
+    tile = np.asarray(image_np[r0:r1, c0:c1], dtype=dtype)
+    if tile.ndim == 3:
+        tile = np.moveaxis(tile, -1, 0)
+
+    # Edge tiles are extended symmetrically to a multiple of 2**level, so no pixel is dropped
+    step = 2 ** decomposition_level
+    pad = [(0, 0)] * (tile.ndim - 2) + [(0, -tile.shape[-2] % step), (0, -tile.shape[-1] % step)]
+    if any(after for _, after in pad):
+        tile = np.pad(tile, pad, mode='symmetric')
+
+    coeffs = pywt.wavedec2(tile, wavelet, level=decomposition_level, axes=(-2, -1))
+    coeff_array, coeff_slices = pywt.coeffs_to_array(coeffs, axes=(-2, -1))
+    retained_counts = _threshold_in_place(coeff_array, coeff_slices, threshold_factor)
+    indices = np.flatnonzero(coeff_array)
+    return indices.astype(np.uint32), coeff_array.ravel()[indices].astype(value_dtype), retained_counts
+
+
+def compress_wavelet_tiled(image_np, path, wavelet='db1', decomposition_level=3, threshold_factor=0.01, tile_size=512,
+                           dtype=np.float64, value_dtype=np.float32, backend=None, max_workers=None):
+    """
+    Compresses a large image tile by tile into a sparse on-disk wavelet representation.
+
+    Each tile is read (e.g. from a ``numpy.memmap``), decomposed and thresholded like
+    ``extract_wavelet_features``, and only its retained coefficients (flat indices and values)
+    are appended to disk. Peak memory is bounded by the tile size, not the image size.
+    Edge tiles are extended symmetrically to a multiple of ``2**decomposition_level``, so
+    non-square images keep every pixel. Thresholds are computed per tile, channel and subband;
+    with a single tile the coefficients match ``extract_wavelet_features``.
+
+    Args:
+        image_np (numpy.ndarray): The input image (H, W) or (H, W, C); may be a ``numpy.memmap``.
+        path (str): Output directory. It holds ``meta.json``, ``indices.bin`` and ``values.bin``.
+        wavelet (str): Name of the wavelet to use (e.g., 'db1', 'haar').
+        decomposition_level (int): Level of decomposition.
+        threshold_factor (float): Factor to determine threshold for coefficients (e.g., 0.01 for 1% of max).
+        tile_size (int): Side length of the tiles, rounded up to a multiple of ``2**decomposition_level``.
+        dtype (numpy.dtype): Floating point type of the transform.
+        value_dtype (numpy.dtype): Storage type of the retained coefficients.
+        backend (str or backend, optional): 'threads', 'processes', a backend instance, or None
+            to run serially. Process workers open the image through a ``SharedArray``: a
+            memory-mapped ``.npy`` file is used as is, other arrays are copied into one once.
+        max_workers (int, optional): Worker cap when ``backend`` is given by name.
+
+    Returns:
+        float: The compression ratio (retained coefficients / total pixels, averaged over channels).
+    """
+    step = 2 ** decomposition_level
+    tile_size = -(-tile_size // step) * step
+    tiles = _tile_grid(image_np.shape, tile_size)
+    pool = None if backend is None else get_backend(backend, max_workers)
+    shared = SharedArray.from_array(image_np) if pool is not None and pool.kind == 'processes' else None
+    task = partial(_compress_tile_task, image_np if shared is None else shared.descriptor, wavelet=wavelet,
+                   decomposition_level=decomposition_level, threshold_factor=threshold_factor, dtype=dtype,
+                   value_dtype=value_dtype)
+    tile_rows, tile_cols = [rows for rows, _ in tiles], [cols for _, cols in tiles]
+
+    if pool is None:
+        results = map(task, tile_rows, tile_cols)
+    else:
+        # Tiles are submitted as they are written out, so at most two per worker are held
+        results = pool.map(task, tile_rows, tile_cols, max_pending=2 * pool.max_workers)
+
+    os.makedirs(path, exist_ok=True)
+    offsets = []
+    position = 0
+    retained = 0
+    try:
+        with stage('wavelet.tiles', n_tiles=len(tiles)), \
+                open(os.path.join(path, 'indices.bin'), 'wb') as index_file, \
+                open(os.path.join(path, 'values.bin'), 'wb') as value_file:
+            for indices, values, retained_counts in results:
+                index_file.write(indices.tobytes())
+                value_file.write(values.tobytes())
+                offsets.append([position, len(indices)])
+                position += len(indices)
+                retained += retained_counts
+                count('wavelet.bytes_written', indices.nbytes + values.nbytes)
+    finally:
+        if shared is not None:
+            shared.close()
+
+    total_pixels = image_np.shape[0] * image_np.shape[1]
+    compression_ratio = float(np.mean(retained)) / total_pixels if total_pixels > 0 else 0.0
+    meta = {
+        'shape': list(image_np.shape), 'tile_size': tile_size, 'wavelet': wavelet,
+        'decomposition_level': decomposition_level, 'threshold_factor': threshold_factor,
+        'value_dtype': np.dtype(value_dtype).str, 'compression_ratio': compression_ratio, 'offsets': offsets,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return compression_ratio
+
+
+class WaveletTileReader:
+    """
+    Reconstructs images written by ``compress_wavelet_tiled``, tile by tile on demand.
+
+    The coefficient files are memory-mapped, so opening a reader is cheap and reading a
+    tile only touches that tile's coefficients.
+
+    Args:
+        path (str): The directory written by ``compress_wavelet_tiled``.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.shape = tuple(meta['shape'])
+        self.tile_size = meta['tile_size']
+        self.wavelet = meta['wavelet']
+        self.decomposition_level = meta['decomposition_level']
+        self.compression_ratio = meta['compression_ratio']
+        self.tiles = _tile_grid(self.shape, self.tile_size)
+        self.grid = (-(-self.shape[0] // self.tile_size), -(-self.shape[1] // self.tile_size))
+        self._offsets = meta['offsets']
+        self._indices = self._map(os.path.join(path, 'indices.bin'), np.uint32)
+        self._values = self._map(os.path.join(path, 'values.bin'), np.dtype(meta['value_dtype']))
+
+    @staticmethod
+    def _map(filename, dtype):
+        # Empty files cannot be memory-mapped
+        if os.path.getsize(filename) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(filename, dtype=dtype, mode='r')
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def tile(self, row, col):
+        """
+        Reconstructs one tile.
+
+        Args:
+            row (int): Tile row in ``grid``.
+            col (int): Tile column in ``grid``.
+
+        Returns:
+            numpy.ndarray: The uint8 tile, of shape (h, w[, C]) with h, w <= ``tile_size``.
+        """
+        index = row * self.grid[1] + col
+        rows, cols = self.tiles[index]
+        n_channels = self.shape[2] if len(self.shape) == 3 else None
+        padded_shape = _padded_tile_shape(rows, cols, 2 ** self.decomposition_level, n_channels)
+        array_shape, coeff_slices = _tile_layout(padded_shape, self.wavelet, self.decomposition_level)
+
+        start, n_retained = self._offsets[index]
+        coeff_array = np.zeros(array_shape)
+        coeff_array.ravel()[self._indices[start:start + n_retained]] = self._values[start:start + n_retained]
+        coeffs = pywt.array_to_coeffs(coeff_array, coeff_slices, output_format='wavedec2')
+        reconstructed = pywt.waverec2(coeffs, self.wavelet, axes=(-2, -1))
+        reconstructed = reconstructed[..., :rows[1] - rows[0], :cols[1] - cols[0]]
+        if n_channels is not None:
+            reconstructed = np.moveaxis(reconstructed, 0, -1)
+        return np.clip(reconstructed, 0, 255).astype(np.uint8)
+
+    def reconstruct(self, out=None):
+        """
+        Reconstructs the whole image, one tile at a time.
+
+        Args:
+            out (numpy.ndarray, optional): A preallocated uint8 array (e.g. a memmap) of ``shape``.
+
+        Returns:
+            numpy.ndarray: The reconstructed image.
+        """
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        for index, ((r0, r1), (c0, c1)) in enumerate(self.tiles):
+            out[r0:r1, c0:c1] = self.tile(*divmod(index, self.grid[1]))
+        return out
 
-    return reconstructed_image, compression_ratio, original_coeffs, filtered_coeffs_list
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from src.batching import collect, iter_batches
+from src.canny_edge import apply_canny_edge_batch
+from src.gabor_features import extract_gabor_features_batch
+from src.hog_features import extract_hog_features_batch
+from src.lbp_features import extract_lbp_features_batch
+from src.wavelet_features import extract_wavelet_features_batch
+
+
+def as_tuple(result):
+    return result if isinstance(result, tuple) else (result,)
+
+
+class TestEmptyBatches(unittest.TestCase):
+    """An empty (0, H, W[, C]) stack gives (0, ...) results shaped like those of one image."""
+
+    def assertEmptyLike(self, extract, image_shape, dtype=np.uint8):
+        empty = as_tuple(extract(np.zeros((0,) + image_shape, dtype=dtype)))
+        one = as_tuple(extract(np.zeros((1,) + image_shape, dtype=dtype)))
+        self.assertEqual(len(empty), len(one))
+        for got, expected in zip(empty, one):
+            self.assertEqual(got.shape, (0,) + expected.shape[1:])
+            self.assertEqual(got.dtype, expected.dtype)
+
+    def test_canny(self):
+        self.assertEmptyLike(apply_canny_edge_batch, (48, 40))
+        self.assertEmptyLike(apply_canny_edge_batch, (48, 40, 3))
+
+    def test_hog(self):
+        self.assertEmptyLike(extract_hog_features_batch, (48, 40))
+        self.assertEmptyLike(extract_hog_features_batch, (48, 40, 3))
+
+    def test_lbp(self):
+        self.assertEmptyLike(extract_lbp_features_batch, (48, 40))
+        self.assertEmptyLike(extract_lbp_features_batch, (48, 40, 3))
+        self.assertEmptyLike(lambda images: extract_lbp_features_batch(images, histograms=True), (48, 40))
+
+    def test_gabor(self):
+        self.assertEmptyLike(extract_gabor_features_batch, (48, 40), np.float64)
+        for output in ('fused', 'pooled'):
+            self.assertEmptyLike(lambda images: extract_gabor_features_batch(images, output=output), (48, 40),
+                                 np.float64)
+
+    def test_wavelet(self):
+        self.assertEmptyLike(extract_wavelet_features_batch, (48, 40))
+        self.assertEmptyLike(extract_wavelet_features_batch, (48, 40, 3))
+
+    def test_empty_iterable_without_shape_raises(self):
+        with self.assertRaises(ValueError):
+            extract_hog_features_batch(iter([]))
+        with self.assertRaises(ValueError):
+            collect(iter_batches([]), n_items=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
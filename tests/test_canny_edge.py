@@ -0,0 +1,49 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from src.canny_edge import apply_canny_edge_tiled
+
+
+def blob_image(shape, seed=0):
+    """Smoothed noise: long, winding edges of varying strength that cross many tiles."""
+    noise = np.random.default_rng(seed).random(shape).astype(np.float32)
+    smooth = cv2.GaussianBlur(noise, (0, 0), 4)
+    smooth = (smooth - smooth.min()) / (smooth.max() - smooth.min())
+    return (smooth * 255).astype(np.uint8)
+
+
+class TestTiledCanny(unittest.TestCase):
+    def setUp(self):
+        # Not a multiple of any tile size below
+        self.image = blob_image((97, 131))
+
+    def assertMatchesCanny(self, image, tile_size, t_lower, t_upper):
+        expected = cv2.Canny(image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY),
+                             t_lower, t_upper)
+        self.assertGreater(np.count_nonzero(expected), 0)
+        edges = apply_canny_edge_tiled(image, t_lower, t_upper, tile_size=tile_size)
+        np.testing.assert_array_equal(edges, expected)
+
+    def test_matches_whole_image_canny(self):
+        for tile_size in (1, 2, 7, 16, 50, 1024):
+            # Tiny tiles on a crop, to keep the number of tiles down
+            image = self.image[:41, :53] if tile_size < 7 else self.image
+            for t_lower, t_upper in ((20, 60), (40, 120)):
+                with self.subTest(tile_size=tile_size, thresholds=(t_lower, t_upper)):
+                    self.assertMatchesCanny(image, tile_size, t_lower, t_upper)
+
+    def test_color_input(self):
+        image = np.stack([blob_image((70, 45), seed) for seed in range(3)], axis=-1)
+        self.assertMatchesCanny(image, 16, 20, 60)
+
+    def test_serial_backend_and_out(self):
+        out = np.full(self.image.shape, 7, dtype=np.uint8)
+        edges = apply_canny_edge_tiled(self.image, 20, 60, tile_size=13, backend=None, out=out)
+        self.assertIs(edges, out)
+        np.testing.assert_array_equal(out, cv2.Canny(self.image, 20, 60))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from src import extract
+from src.backends import shutdown_backends
+
+SHAPES = [(40, 48), (50, 30), (40, 48), (36, 36), (40, 48), (64, 40), (40, 48)]
+
+
+class InterruptingBar:
+    """A progress bar that interrupts the job, like Ctrl-C, after the first checkpoint."""
+
+    def __init__(self, total, description):
+        pass
+
+    def update(self, n):
+        raise KeyboardInterrupt
+
+    def close(self):
+        pass
+
+
+class TestExtractCLI(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(shutdown_backends)
+        self.tmp = tmp.name
+        self.images = os.path.join(tmp.name, 'images')
+        os.makedirs(self.images)
+        rng = np.random.default_rng(0)
+        for i, shape in enumerate(SHAPES):
+            cv2.imwrite(os.path.join(self.images, f'{i}.png'), rng.integers(0, 256, shape, dtype=np.uint8))
+
+    def main(self, output, *args):
+        argv = [self.images, '--output', os.path.join(self.tmp, output), '-e', 'hog',
+                '-e', 'lbp:histograms=True', '--workers', '1', '--chunk-size', '2', '--shard-size', '4', *args]
+        with contextlib.redirect_stderr(io.StringIO()):
+            return extract.main(argv)
+
+    def load(self, output):
+        output = os.path.join(self.tmp, output)
+        with open(os.path.join(output, extract.INDEX_FILE)) as f:
+            index = json.load(f)
+        features = {
+            key: np.concatenate([np.load(os.path.join(output, shard)) for shard in feature['shards']])
+            for key, feature in index['features'].items()
+        }
+        return index, np.load(os.path.join(output, extract.STATUS_FILE)), features
+
+    def test_resume_after_interrupt(self):
+        with mock.patch.object(extract, 'progress_bar', InterruptingBar):
+            with self.assertRaises(KeyboardInterrupt):
+                self.main('interrupted', '--size', '32', '32')
+        _, status, _ = self.load('interrupted')
+        self.assertEqual(status.tolist(), [extract.DONE] * 2 + [extract.PENDING] * 5)
+
+        self.assertEqual(self.main('interrupted', '--size', '32', '32'), 0)
+        self.assertEqual(self.main('uninterrupted', '--size', '32', '32'), 0)
+        _, status, features = self.load('interrupted')
+        _, _, expected = self.load('uninterrupted')
+        self.assertEqual(status.tolist(), [extract.DONE] * len(SHAPES))
+        for key in ('hog', 'lbp'):
+            np.testing.assert_array_equal(features[key], expected[key])
+
+    def test_without_size_other_shapes_fail(self):
+        self.assertEqual(self.main('native'), 1)
+        index, status, features = self.load('native')
+        self.assertIsNone(index['config']['size'])
+        self.assertEqual(index['image_size'], [40, 48])
+        same_size = [shape == SHAPES[0] for shape in SHAPES]
+        self.assertEqual(status.tolist(), [extract.DONE if same else extract.FAILED for same in same_size])
+
+        # The images that fit are stored unresized
+        image = cv2.imread(os.path.join(self.images, '2.png'), cv2.IMREAD_GRAYSCALE)
+        pipeline = extract.FeaturePipeline([('hog', {})])
+        np.testing.assert_array_equal(features['hog'][2], pipeline.run(image)['hog'])
+
+    def test_resume_rejects_other_settings(self):
+        with mock.patch.object(extract, 'progress_bar', InterruptingBar):
+            with self.assertRaises(KeyboardInterrupt):
+                self.main('job', '--size', '32', '32')
+        for args in (['--size', '48', '48'], [], ['--size', '32', '32', '--color']):
+            with self.subTest(args=args), self.assertRaisesRegex(ValueError, 'different job'):
+                self.main('job', *args)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from src.feature_store import FeatureStore
+from src.gabor_features import GaborBank
+from tests.test_import import run_python
+
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.image = np.arange(48, dtype=np.uint8).reshape(6, 8)
+
+    def test_key_stability(self):
+        store = FeatureStore(self.root)
+        key = store.key(self.image, 'hog', {'orientations': 9, 'pixels_per_cell': (8, 8)})
+        # Equal pixels give equal keys, whatever the memory layout and the parameter order
+        self.assertEqual(store.key(np.asfortranarray(self.image), 'hog', {'pixels_per_cell': (8, 8), 'orientations': 9}),
+                         key)
+        self.assertNotEqual(store.key(self.image, 'hog', {'orientations': 8, 'pixels_per_cell': (8, 8)}), key)
+        self.assertNotEqual(store.key(self.image.astype(np.uint16), 'hog', {'orientations': 9, 'pixels_per_cell': (8, 8)}),
+                            key)
+        self.assertNotEqual(store.key(self.image.reshape(8, 6), 'hog', {'orientations': 9, 'pixels_per_cell': (8, 8)}),
+                            key)
+        # Engines are keyed by their configuration, not their identity
+        self.assertEqual(store.key(self.image, 'gabor', {'bank': GaborBank((6, 8))}),
+                         store.key(self.image, 'gabor', {'bank': GaborBank((6, 8))}))
+
+        # Keys do not depend on the process (e.g. on hash randomisation)
+        other = run_python(
+            "import json, numpy as np\n"
+            "from src.feature_store import FeatureStore\n"
+            f"store = FeatureStore({self.root!r})\n"
+            "image = np.arange(48, dtype=np.uint8).reshape(6, 8)\n"
+            "print(json.dumps(store.key(image, 'hog', {'orientations': 9, 'pixels_per_cell': (8, 8)})))"
+        )
+        self.assertEqual(other, key)
+
+    def test_get_returns_read_only_memory_maps(self):
+        store = FeatureStore(self.root)
+        features = np.random.default_rng(0).random((5, 7))
+        store.put('a' * 64, features)
+        value = store.get('a' * 64)
+        self.assertIsInstance(value, np.memmap)
+        self.assertFalse(value.flags.writeable)
+        np.testing.assert_array_equal(value, features)
+
+        nested = (features, {'ratio': 0.5, 'coeffs': [np.zeros((2, 2)), np.ones(3)]})
+        store.put('b' * 64, nested)
+        responses, rest = store.get('b' * 64)
+        self.assertIsInstance(responses, np.memmap)
+        np.testing.assert_array_equal(responses, features)
+        self.assertEqual(rest['ratio'], 0.5)
+        np.testing.assert_array_equal(rest['coeffs'][1], np.ones(3))
+        self.assertIsNone(store.get('c' * 64))
+
+    def test_evicts_least_recently_used(self):
+        entry = np.zeros(1000, dtype=np.uint8)
+        size = FeatureStore(os.path.join(self.root, 'probe')).put('0' * 64, entry)
+        store = FeatureStore(os.path.join(self.root, 'store'), max_bytes=int(3.5 * size))
+
+        keys = [str(i) * 64 for i in range(4)]
+        for i, key in enumerate(keys[:3]):
+            store.put(key, entry)
+            os.utime(store._path(key) + '.npy', (1000 + i, 1000 + i))
+        store.get(keys[0])  # Now the most recently used
+
+        store.put(keys[3], entry)
+        self.assertEqual([key in store for key in keys], [True, False, True, True])
+        self.assertEqual(store.size_bytes(), 3 * size)
+
+    def test_overwrite_does_not_grow_the_size_estimate(self):
+        store = FeatureStore(self.root, max_bytes=10 ** 9)
+        for _ in range(3):
+            store.put('a' * 64, np.zeros(100))
+        self.assertEqual(store._size, store.size_bytes())
+
+    def test_concurrent_put(self):
+        store = FeatureStore(self.root, max_bytes=10 ** 9)
+        values = [np.full(50, i, dtype=np.float64) for i in range(8)]
+        barrier = threading.Barrier(16)
+
+        def put(i):
+            barrier.wait()
+            store.put(f'{i:064x}', values[i])
+            store.put('f' * 64, (values[i], values[i]))  # The same key from every thread
+
+        threads = [threading.Thread(target=put, args=(i % 8,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i in range(8):
+            np.testing.assert_array_equal(store.get(f'{i:064x}'), values[i])
+        first, second = store.get('f' * 64)
+        np.testing.assert_array_equal(first, second)
+        leftovers = [name for _, _, names in os.walk(self.root) for name in names if name.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+        self.assertEqual(store._size, store.size_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
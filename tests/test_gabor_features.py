@@ -0,0 +1,122 @@
+import unittest
+
+import numpy as np
+from skimage.filters import gabor
+
+from src.gabor_features import GaborBank, extract_gabor_features, extract_gabor_features_batch, pooled_statistics
+
+
+def reference_magnitudes(image, bank):
+    """Magnitude responses of ``skimage.filters.gabor`` for every filter of ``bank``."""
+    return np.stack([
+        np.hypot(*gabor(image, freq, theta=theta, bandwidth=1, n_stds=3, mode='reflect'))
+        for theta, freq in bank.params
+    ])
+
+
+class TestGaborBank(unittest.TestCase):
+    def setUp(self):
+        # An odd, non-square shape exercises the padding and FFT sizes
+        self.image = np.random.default_rng(0).random((40, 53))
+        self.bank = GaborBank(self.image.shape)
+        self.expected = reference_magnitudes(self.image, self.bank)
+
+    def test_magnitudes_match_skimage(self):
+        np.testing.assert_allclose(self.bank.magnitudes(self.image), self.expected, rtol=0, atol=1e-12)
+
+    def test_responses_output_matches_skimage(self):
+        responses, fused = extract_gabor_features(self.image, output='responses')
+        np.testing.assert_allclose(np.stack(responses), self.expected, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(fused, self.expected.mean(axis=0), rtol=0, atol=1e-12)
+
+    def test_fused_output_matches_skimage(self):
+        fused = extract_gabor_features(self.image, output='fused')
+        np.testing.assert_allclose(fused, self.expected.mean(axis=0), rtol=0, atol=1e-12)
+
+    def test_pooled_output_matches_skimage(self):
+        pooled = extract_gabor_features(self.image, output='pooled', grid=(4, 4))
+        expected = np.stack([pooled_statistics(magnitude, (4, 4)) for magnitude in self.expected])
+        np.testing.assert_allclose(pooled, expected, rtol=0, atol=1e-12)
+
+
+
+class TestGaborOutputs(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.default_rng(2).random((30, 41))
+        self.bank = GaborBank(self.image.shape)
+        self.n = len(self.bank)
+        self.responses, self.fused = extract_gabor_features(self.image, bank=self.bank)
+
+    def test_shapes(self):
+        self.assertEqual(len(self.responses), self.n)
+        self.assertEqual(np.stack(self.responses).shape, (self.n, 30, 41))
+        self.assertEqual(self.fused.shape, (30, 41))
+        self.assertEqual(extract_gabor_features(self.image, bank=self.bank, output='fused').shape, (30, 41))
+        pooled = extract_gabor_features(self.image, bank=self.bank, output='pooled', grid=(2, 3))
+        self.assertEqual(pooled.shape, (self.n, 2, 3, 3))
+
+        images = np.stack([self.image, self.image[::-1]])
+        responses, fused = extract_gabor_features_batch(images, bank=self.bank, dtype=np.float32)
+        self.assertEqual((responses.shape, responses.dtype), ((2, self.n, 30, 41), np.float32))
+        self.assertEqual((fused.shape, fused.dtype), ((2, 30, 41), np.float32))
+
+    def test_fused_is_the_mean_of_the_responses(self):
+        np.testing.assert_allclose(self.fused, np.mean(self.responses, axis=0), rtol=0, atol=1e-12)
+
+    def test_float32_rounds_only_the_outputs(self):
+        responses, fused = extract_gabor_features(self.image, bank=self.bank, dtype=np.float32)
+        self.assertEqual(fused.dtype, np.float32)
+        np.testing.assert_array_equal(np.stack(responses), np.stack(self.responses).astype(np.float32))
+        # The fused map is summed in float64 and rounded once, not summed from rounded responses
+        np.testing.assert_array_equal(fused, self.fused.astype(np.float32))
+        fused_only = extract_gabor_features(self.image, bank=self.bank, output='fused', dtype=np.float32)
+        np.testing.assert_array_equal(fused_only, self.fused.astype(np.float32))
+
+    def test_out(self):
+        out = np.empty((self.n, 30, 41), dtype=np.float32)
+        responses, fused = extract_gabor_features(self.image, bank=self.bank, out=out)
+        self.assertTrue(all(np.shares_memory(response, out) for response in responses))
+        np.testing.assert_array_equal(out, np.stack(self.responses).astype(np.float32))
+        np.testing.assert_array_equal(fused, self.fused.astype(np.float32))
+
+        out = np.empty((30, 41))
+        self.assertIs(extract_gabor_features(self.image, bank=self.bank, output='fused', out=out), out)
+        np.testing.assert_allclose(out, self.fused, rtol=0, atol=1e-12)
+
+        out = np.empty((self.n, 4, 4, 3))
+        self.assertIs(extract_gabor_features(self.image, bank=self.bank, output='pooled', out=out), out)
+
+        with self.assertRaises(ValueError):
+            extract_gabor_features(self.image, bank=self.bank, output='fused', out=np.empty((30, 40)))
+
+
+class TestPyramid(unittest.TestCase):
+    """Pins the pyramid-mode errors stated in the ``GaborBank`` docstring, with some headroom."""
+
+    def errors(self, max_decimation):
+        image = np.random.default_rng(1).random((96, 150))
+        exact = GaborBank(image.shape).magnitudes(image)
+        bank = GaborBank(image.shape, pyramid=True, max_decimation=max_decimation)
+        approx = bank.magnitudes(image)
+        decimated = np.array(bank.decimations) > 1
+        self.assertTrue(decimated.any())
+        peaks = exact[decimated].max(axis=(1, 2))[:, None, None]
+        error = np.abs(approx[decimated] - exact[decimated]) / peaks
+        fused = np.abs(approx.mean(axis=0) - exact.mean(axis=0)).max() / exact.mean(axis=0).max()
+        return error.mean(), error.max(), fused
+
+    def test_half_resolution(self):
+        mean, worst, fused = self.errors(2)
+        self.assertLess(mean, 0.01)
+        self.assertLess(worst, 0.1)
+        self.assertLess(fused, 0.005)
+
+    def test_quarter_resolution(self):
+        mean, worst, fused = self.errors(4)
+        self.assertLess(mean, 0.02)
+        self.assertLess(worst, 0.3)
+        self.assertLess(fused, 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
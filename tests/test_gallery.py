@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.gallery import GalleryIndex
+
+
+class TestGalleryIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.descriptors = rng.random((500, 32), dtype=np.float32)
+        self.probes = rng.random((7, 32), dtype=np.float32)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'gallery')
+
+    def test_search_matches_brute_force(self):
+        index = GalleryIndex(32, metric='l2')
+        index.add(self.descriptors)
+        distances, ids = index.search(self.probes, k=5, block_size=64)
+
+        expected = ((self.probes[:, None, :] - self.descriptors[None]) ** 2).sum(axis=-1)
+        np.testing.assert_array_equal(ids, np.argsort(expected, axis=1)[:, :5])
+        np.testing.assert_allclose(distances, np.sort(expected, axis=1)[:, :5], rtol=1e-4, atol=1e-4)
+
+    def test_save_load_round_trip_in_place(self):
+        index = GalleryIndex(32)
+        index.add(self.descriptors, labels=[f'person-{i % 50}' for i in range(500)])
+        index.save(self.path)
+        expected = index.search(self.probes, k=3)
+
+        # Saving a memory-mapped gallery back to its own directory must not truncate the map
+        loaded = GalleryIndex.load(self.path, mmap=True)
+        loaded.save(self.path)
+        reloaded = GalleryIndex.load(self.path)
+
+        self.assertEqual(len(reloaded), 500)
+        np.testing.assert_array_equal(reloaded.descriptors, self.descriptors)
+        self.assertEqual(reloaded.labels([0, 499]), ['person-0', 'person-49'])
+        for actual, wanted in zip(reloaded.search(self.probes, k=3), expected):
+            np.testing.assert_array_equal(actual, wanted)
+        self.assertEqual(sorted(os.listdir(self.path)), ['descriptors.npy', 'ids.npy', 'meta.json'])
+
+    def test_removed_entries_are_dropped_on_save(self):
+        index = GalleryIndex(32)
+        ids = index.add(self.descriptors)
+        index.remove(ids[:100])
+        index.save(self.path)
+        loaded = GalleryIndex.load(self.path)
+        self.assertEqual(len(loaded), 400)
+        self.assertEqual(loaded.ids[0], 100)
+        self.assertEqual(loaded.add(self.descriptors[:1])[0], 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
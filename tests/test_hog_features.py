@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+from skimage.feature import hog
+
+from src.hog_features import HOGEngine, dense_hog_windows, sliding_window_hog
+
+BLOCK_NORMS = ['L1', 'L1-sqrt', 'L2', 'L2-Hys']
+
+# Shapes that are not multiples of the 8x8 cell size, so the engine must crop like skimage
+SHAPES = [(67, 45), (50, 77)]
+
+
+class TestHOGEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.images = {shape: rng.random((3,) + shape) for shape in SHAPES}
+
+    def test_matches_skimage(self):
+        for shape in SHAPES:
+            for block_norm in BLOCK_NORMS:
+                with self.subTest(shape=shape, block_norm=block_norm):
+                    engine = HOGEngine(shape, block_norm=block_norm, dtype=np.float64)
+                    expected = np.stack([
+                        hog(image, orientations=9, pixels_per_cell=(8, 8), cells_per_block=(2, 2),
+                            block_norm=block_norm, feature_vector=True)
+                        for image in self.images[shape]
+                    ])
+                    # skimage accumulates cell histograms in single precision; a pixel voting
+                    # into the wrong bin or cell would be off by orders of magnitude more
+                    np.testing.assert_allclose(engine.compute_batch(self.images[shape]), expected,
+                                               rtol=0, atol=1e-6)
+
+    def test_single_image_matches_batch(self):
+        engine = HOGEngine(SHAPES[0])
+        images = self.images[SHAPES[0]]
+        np.testing.assert_array_equal(engine.compute(images[1]), engine.compute_batch(images)[1])
+
+    def test_empty_batch(self):
+        engine = HOGEngine(SHAPES[0])
+        descriptors = engine.compute_batch(np.zeros((0,) + SHAPES[0]))
+        self.assertEqual(descriptors.shape, (0, engine.n_features))
+        self.assertEqual(descriptors.dtype, np.float32)
+
+
+
+class TestDenseHOG(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.default_rng(1).random((101, 157))
+
+    def assertInteriorMatchesCrops(self, image, windows, window_size, stride):
+        engine = HOGEngine(window_size)
+        for i in range(windows.shape[0]):
+            for j in range(windows.shape[1]):
+                top, left = i * stride[0], j * stride[1]
+                crop = image[top:top + window_size[0], left:left + window_size[1]]
+                expected = engine.block_grid(engine.cell_histograms(crop[None]))[0]
+                # Blocks of the window's border cells see gradients across the border; all others are exact
+                np.testing.assert_array_equal(windows[i, j][1:-1, 1:-1], expected[1:-1, 1:-1])
+
+    def test_interior_blocks_match_engine_on_crop(self):
+        for window_size, stride in (((64, 64), (8, 8)), ((48, 32), (16, 24))):
+            with self.subTest(window_size=window_size, stride=stride):
+                windows = dense_hog_windows(self.image, window_size, stride)
+                self.assertEqual(windows.shape[:2], ((101 - window_size[0]) // stride[0] + 1,
+                                                     (157 - window_size[1]) // stride[1] + 1))
+                self.assertInteriorMatchesCrops(self.image, windows, window_size, stride)
+
+    def test_sliding_window_levels(self):
+        levels = list(sliding_window_hog(self.image, window_size=(48, 32), stride=(8, 8), scale=1.3))
+        self.assertGreater(len(levels), 1)
+        factor, windows, _ = levels[0]
+        self.assertEqual(factor, 1.0)
+        self.assertInteriorMatchesCrops(self.image, windows, (48, 32), (8, 8))
+
+        for factor, windows, boxes in levels:
+            with self.subTest(factor=factor):
+                self.assertEqual(boxes.shape, windows.shape[:2] + (4,))
+                top, left, bottom, right = np.moveaxis(boxes, -1, 0)
+                self.assertTrue((top >= 0).all() and (left >= 0).all())
+                self.assertTrue((bottom <= 101).all() and (right <= 157).all())
+                # Boxes keep the window's size in original-image pixels
+                np.testing.assert_allclose(bottom - top, 48 * factor, atol=1.5)
+                np.testing.assert_allclose(right - left, 32 * factor, atol=1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
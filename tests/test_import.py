@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('numpy', 'cv2', 'scipy', 'skimage', 'pywt', 'requests', 'matplotlib')
+
+
+def run_python(code):
+    """Runs ``code`` in a fresh interpreter from the repository root and returns its JSON output."""
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True,
+                            check=True)
+    return json.loads(result.stdout)
+
+
+def loaded_modules_code(setup):
+    """Code that runs ``setup`` and prints which of the heavy modules it loaded."""
+    return f"import json, sys\n{setup}\nprint(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+
+
+class TestPackageImport(unittest.TestCase):
+    def test_import_does_not_load_heavy_modules(self):
+        loaded = run_python(loaded_modules_code("import src"))
+        self.assertEqual(loaded, [])
+
+    def test_import_is_fast(self):
+        seconds = run_python(
+            "import json, time\n"
+            "start = time.perf_counter()\n"
+            "import src\n"
+            "print(json.dumps(time.perf_counter() - start))"
+        )
+        # Generous, so slow or busy machines do not fail it; the heavy-module test above is the precise check
+        self.assertLess(seconds, 1.0)
+
+    def test_extractor_lookup_never_loads_plotting(self):
+        loaded = run_python(loaded_modules_code("import src\nsrc.get_extractor('canny', 'batch')"))
+        self.assertIn('cv2', loaded)
+        self.assertNotIn('matplotlib', loaded)
+        self.assertNotIn('requests', loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+from skimage.feature import local_binary_pattern
+
+from src.lbp_features import (LBPEngine, extract_lbp_features, extract_lbp_features_batch,
+                              extract_lbp_histograms)
+
+METHODS = ['default', 'ror', 'uniform', 'nri_uniform']
+
+# (n_points, radius) pairs, including counts above the lookup-table limit
+POINTS = [(8, 1), (16, 2), (24, 3)]
+
+
+class TestLBPEngine(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.default_rng(0).integers(0, 256, (37, 42), dtype=np.uint8)
+
+    def test_codes_match_skimage(self):
+        for n_points, radius in POINTS:
+            for method in METHODS:
+                with self.subTest(n_points=n_points, method=method):
+                    engine = LBPEngine(self.image.shape, radius, n_points, method)
+                    expected = local_binary_pattern(self.image, n_points, radius, method)
+                    np.testing.assert_array_equal(engine.codes(self.image), expected)
+
+    def test_batch_codes_match_single_image(self):
+        images = np.random.default_rng(1).integers(0, 256, (3,) + self.image.shape, dtype=np.uint8)
+        engine = LBPEngine(self.image.shape, 2, 16, 'nri_uniform')
+        codes = engine.codes(images)
+        for image, image_codes in zip(images, codes):
+            np.testing.assert_array_equal(image_codes, engine.codes(image))
+
+
+class TestLBPAPIs(unittest.TestCase):
+    """The single-image and batch functions see the same uint8 gray levels."""
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.color = rng.integers(0, 256, (3, 40, 40, 3), dtype=np.uint8)
+        self.float_gray = rng.random((3, 40, 40))
+
+    def test_codes_agree(self):
+        for images in (self.color, self.float_gray):
+            for method in ('uniform', 'var'):
+                with self.subTest(dtype=images.dtype, method=method):
+                    batch = extract_lbp_features_batch(images, method=method)
+                    for image, codes in zip(images, batch):
+                        np.testing.assert_array_equal(codes, extract_lbp_features(image, method=method))
+
+    def test_histograms_agree(self):
+        for images in (self.color, self.float_gray):
+            with self.subTest(dtype=images.dtype):
+                batch = extract_lbp_features_batch(images, histograms=True)
+                for image, histogram in zip(images, batch):
+                    np.testing.assert_array_equal(histogram, extract_lbp_histograms(image))
+
+
+if __name__ == '__main__':
+    unittest.main()
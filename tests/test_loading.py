@@ -0,0 +1,129 @@
+import functools
+import os
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import requests
+
+from src.loading import ImageLoader
+
+
+class Handler(SimpleHTTPRequestHandler):
+    """Serves a directory; paths under /flaky/ answer 503 once before serving the file."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests[self.path] += 1
+            attempt = server.requests[self.path]
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            # A short delay, so concurrent requests overlap and can finish out of order
+            time.sleep(server.delay * (hash(self.path) % 3))
+            if self.path.startswith('/flaky/') and attempt == 1:
+                self.send_error(503)
+                return
+            self.path = self.path.replace('/flaky/', '/', 1)
+            super().do_GET()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestImageLoader(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, 'www')
+        self.cache_dir = os.path.join(tmp.name, 'cache')
+        os.makedirs(self.root)
+        for i in range(10):
+            cv2.imwrite(os.path.join(self.root, f'{i}.png'), np.full((8, 8), 20 * i, dtype=np.uint8))
+        with open(os.path.join(self.root, 'corrupt.png'), 'wb') as f:
+            f.write(b'not an image')
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Handler, directory=self.root))
+        self.server.lock = threading.Lock()
+        self.server.requests = Counter()
+        self.server.active = self.server.max_active = 0
+        self.server.delay = 0.0
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def loader(self, **kwargs):
+        loader = ImageLoader(**kwargs)
+        self.addCleanup(loader.close)
+        return loader
+
+    def test_retries_server_errors(self):
+        image = self.loader().load(self.base + '/flaky/3.png')
+        np.testing.assert_array_equal(image, np.full((8, 8), 60, dtype=np.uint8))
+        self.assertEqual(self.server.requests['/flaky/3.png'], 2)
+
+    def test_missing_image_is_not_retried(self):
+        with self.assertRaises(requests.HTTPError):
+            self.loader().fetch(self.base + '/missing.png')
+        self.assertEqual(self.server.requests['/missing.png'], 1)
+
+    def test_cache_hit_skips_the_request(self):
+        loader = self.loader(cache_dir=self.cache_dir)
+        url = self.base + '/5.png'
+        first = loader.fetch(url)
+        self.assertTrue(os.path.exists(loader.cache_path(url)))
+        self.assertEqual(loader.fetch(url), first)
+        self.assertEqual(self.server.requests['/5.png'], 1)
+
+        # A fresh loader on the same directory reads the cache too
+        self.assertEqual(self.loader(cache_dir=self.cache_dir).fetch(url), first)
+        self.assertEqual(self.server.requests['/5.png'], 1)
+
+    def test_load_many_keeps_order_with_a_bounded_window(self):
+        self.server.delay = 0.02
+        consumed = []
+
+        def sources():
+            for i in range(10):
+                consumed.append(i)
+                yield f'{self.base}/{i}.png'
+
+        loader = self.loader(max_concurrency=2)
+        results = loader.load_many(sources())
+        source, image = next(results)
+        self.assertEqual(source, self.base + '/0.png')
+        # Sources are read lazily: only a window of 2 * max_concurrency before the first yield
+        self.assertEqual(len(consumed), 2 * 2)
+
+        rest = list(results)
+        self.assertEqual([source for source, _ in rest], [f'{self.base}/{i}.png' for i in range(1, 10)])
+        for i, (_, image) in enumerate(rest, 1):
+            self.assertEqual(image[0, 0], 20 * i)
+        self.assertLessEqual(self.server.max_active, 2)
+
+    def test_corrupt_bytes(self):
+        loader = self.loader()
+        with self.assertRaises(ValueError):
+            loader.load(self.base + '/corrupt.png')
+
+        urls = [self.base + '/1.png', self.base + '/corrupt.png', self.base + '/2.png']
+        with self.assertRaises(ValueError):
+            list(loader.load_many(urls))
+        loaded = [source for source, _ in loader.load_many(urls, errors='skip')]
+        self.assertEqual(loaded, [urls[0], urls[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.montage import render_montage, save_montage, to_uint8
+
+
+class TestMontage(unittest.TestCase):
+    def test_mixed_channel_layouts(self):
+        images = [
+            np.full((8, 8), 0.5),                              # float grayscale in [0, 1]
+            np.zeros((8, 8, 1), dtype=np.uint8),               # single channel
+            np.full((8, 8, 3), 200, dtype=np.uint8),           # RGB
+            np.full((8, 8, 4), (10, 20, 30, 0), dtype=np.uint8),  # RGBA
+        ]
+        canvas = render_montage(images, labels=['a', 'b', 'c', 'd'], columns=4, padding=0)
+        self.assertEqual(canvas.dtype, np.uint8)
+        self.assertEqual(canvas.shape[1], 32)
+        np.testing.assert_array_equal(canvas[0, 24], (10, 20, 30))
+        np.testing.assert_array_equal(canvas[0, 16], (200, 200, 200))
+
+    def test_rejects_other_channel_counts(self):
+        with self.assertRaises(ValueError):
+            to_uint8(np.zeros((8, 8, 2), dtype=np.uint8))
+
+    def test_save_png(self):
+        images = np.random.default_rng(0).random((6, 16, 16))
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'sheet.png')
+            canvas = save_montage(filename, images, columns=3, cmap='viridis')
+            written = cv2.cvtColor(cv2.imread(filename), cv2.COLOR_BGR2RGB)
+        np.testing.assert_array_equal(written, canvas)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+import numpy as np
+
+from src.canny_edge import apply_canny_edge
+from src.gabor_features import extract_gabor_features
+from src.hog_features import extract_hog_features
+from src.lbp_features import extract_lbp_features, extract_lbp_histograms
+from src.pipeline import EngineCache, FeaturePipeline
+from src.wavelet_features import extract_wavelet_features
+
+
+class TestFeaturePipeline(unittest.TestCase):
+    """On a uint8 grayscale image every step matches the individual extractor."""
+
+    def setUp(self):
+        self.image = np.random.default_rng(0).integers(0, 256, (64, 72), dtype=np.uint8)
+        self.features = FeaturePipeline([
+            'canny', 'hog', 'lbp', ('lbp_histograms', 'lbp', {'histograms': True}), 'gabor', 'wavelet',
+        ]).run(self.image)
+
+    def test_canny(self):
+        np.testing.assert_array_equal(self.features['canny'], apply_canny_edge(self.image))
+
+    def test_hog(self):
+        # The individual function runs skimage.feature.hog, which sums cell histograms in single precision
+        np.testing.assert_allclose(self.features['hog'], extract_hog_features(self.image), rtol=0, atol=1e-6)
+
+    def test_lbp(self):
+        np.testing.assert_array_equal(self.features['lbp'], extract_lbp_features(self.image))
+        np.testing.assert_array_equal(self.features['lbp_histograms'], extract_lbp_histograms(self.image))
+
+    def test_gabor(self):
+        responses, fused = self.features['gabor']
+        expected_responses, expected_fused = extract_gabor_features(self.image)
+        np.testing.assert_array_equal(np.stack(responses), np.stack(expected_responses))
+        np.testing.assert_array_equal(fused, expected_fused)
+
+    def test_wavelet(self):
+        reconstructed, ratio = self.features['wavelet'][:2]
+        expected_reconstructed, expected_ratio = extract_wavelet_features(self.image)[:2]
+        np.testing.assert_array_equal(reconstructed, expected_reconstructed)
+        self.assertEqual(ratio, expected_ratio)
+
+
+class TestEngineCache(unittest.TestCase):
+    def test_builds_each_engine_once_across_threads(self):
+        cache = EngineCache()
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def build():
+            calls.append(1)
+            return object()
+
+        def get():
+            barrier.wait()
+            results.append(cache.get('key', build))
+
+        results = []
+        threads = [threading.Thread(target=get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
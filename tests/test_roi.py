@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from src.gabor_features import GaborBank
+from src.pipeline import FeaturePipeline
+from src.roi import extract_roi_features
+
+EXTRACTORS = ['canny', 'hog', 'lbp', 'gabor']
+
+
+class TestROIFeatures(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+
+    def test_no_boxes(self):
+        # e.g. a photo in which the detector found no faces
+        features = extract_roi_features(self.image, np.zeros((0, 4)), EXTRACTORS)
+        self.assertEqual(len(features['canny']), 0)
+        self.assertEqual(features['hog'].shape[0], 0)
+        self.assertEqual(features['lbp'].shape[0], 0)
+        self.assertEqual(features['gabor'].shape[0], 0)
+
+        one_box = extract_roi_features(self.image, [[0, 0, 32, 32]], EXTRACTORS)
+        self.assertEqual(features['hog'].shape[1:], one_box['hog'].shape[1:])
+        self.assertEqual(features['lbp'].shape[1:], one_box['lbp'].shape[1:])
+        self.assertEqual(features['gabor'].shape[1:], one_box['gabor'].shape[1:])
+
+    def test_whole_image_box_matches_pipeline(self):
+        features = extract_roi_features(self.image, [[0, 0, 64, 64]], ['canny', 'hog'])
+        expected = FeaturePipeline(['canny', 'hog']).run(self.image)
+        np.testing.assert_array_equal(features['canny'][0], expected['canny'])
+        np.testing.assert_allclose(features['hog'][0], expected['hog'], atol=1e-6)
+
+    def test_whole_image_box_matches_pipeline_lbp_and_gabor(self):
+        features = extract_roi_features(self.image, [[0, 0, 64, 64]], ['lbp', 'gabor'])
+        expected = FeaturePipeline([('lbp', {'histograms': True}), ('gabor', {'output': 'pooled'})]).run(self.image)
+        np.testing.assert_array_equal(features['lbp'][0], expected['lbp'])
+        np.testing.assert_allclose(features['gabor'][0], expected['gabor'], rtol=1e-12, atol=1e-12)
+
+    def test_boxes_smaller_than_the_grid(self):
+        box = [10, 20, 13, 22]  # 3 x 2 pixels, for 8 x 8 LBP and 4 x 4 Gabor grids
+        features = extract_roi_features(self.image, [box], ['lbp', 'gabor'])
+        lbp = features['lbp'].reshape(8, 8, -1)
+        self.assertEqual(np.count_nonzero(lbp.sum(axis=-1)), 3 * 2)
+
+        gabor = features['gabor'][0]
+        magnitudes = GaborBank((64, 64)).magnitudes(FeaturePipeline(['gabor']).prepare(self.image).gray)
+        crop = magnitudes[:, 10:13, 20:22]
+        # Like LBP, the pixels land in the last cells of each axis and the other cells are 0
+        np.testing.assert_allclose(gabor[:, 1:, [1, 3], 0].reshape(len(crop), -1), crop.reshape(len(crop), -1),
+                                   rtol=1e-12, atol=1e-12)
+        self.assertEqual(np.count_nonzero(gabor[:, 0]), 0)
+        self.assertEqual(np.count_nonzero(gabor[:, :, [0, 2]]), 0)
+
+    def test_rejects_oversized_lbp_histograms(self):
+        with self.assertRaises(ValueError):
+            extract_roi_features(self.image, [[0, 0, 32, 32]], [('lbp', {'method': 'default'})])
+
+
+if __name__ == '__main__':
+    unittest.main()
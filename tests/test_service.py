@@ -0,0 +1,31 @@
+import asyncio
+import unittest
+
+import numpy as np
+
+from src.service import FeatureService
+
+
+class TestFeatureService(unittest.IsolatedAsyncioTestCase):
+    async def test_close_finishes_accepted_requests(self):
+        # With a long deadline the requests are still waiting in the batcher when close() runs
+        service = FeatureService(max_latency=5, max_workers=1)
+        images = np.random.default_rng(0).integers(0, 256, (3, 64, 64), dtype=np.uint8)
+        tasks = [asyncio.create_task(service.extract(image, 'canny')) for image in images]
+        await asyncio.sleep(0.2)
+
+        await asyncio.wait_for(service.close(), 10)
+        results = await asyncio.wait_for(asyncio.gather(*tasks), 1)
+        self.assertEqual([result.shape for result in results], [(64, 64)] * 3)
+        self.assertEqual(service.metrics()['requests'], 3)
+
+    async def test_batches_concurrent_requests(self):
+        images = np.random.default_rng(1).integers(0, 256, (8, 64, 64), dtype=np.uint8)
+        async with FeatureService(max_batch_size=8, max_latency=1) as service:
+            results = await asyncio.gather(*(service.extract(image, 'hog') for image in images))
+        self.assertEqual(len(results), 8)
+        self.assertEqual(service.metrics()['batches'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import itertools
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from src.pipeline import FeaturePipeline
+from src.video import process_frames
+
+
+def frame(i, shape=(32, 48)):
+    """A BGR frame whose content identifies ``i``."""
+    image = np.zeros(shape + (3,), dtype=np.uint8)
+    image[:, :i % shape[1] + 1] = 255
+    image[..., 0] = 10 * i % 256
+    return image
+
+
+def wait_for(condition, seconds=3):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+class TestProcessFrames(unittest.TestCase):
+    def test_order_with_several_workers(self):
+        frames = [frame(i) for i in range(20)]
+        results = list(process_frames(iter(frames), ['canny', 'hog'], workers=4, queue_size=2))
+        self.assertEqual([index for index, _ in results], list(range(20)))
+        pipeline = FeaturePipeline(['canny', 'hog'], color_order='bgr')
+        for (_, features), image in zip(results, frames):
+            expected = pipeline.run(image)
+            np.testing.assert_array_equal(features['canny'], expected['canny'])
+            np.testing.assert_array_equal(features['hog'], expected['hog'])
+
+    def test_step_and_max_frames_on_a_generator(self):
+        frames = (frame(i) for i in range(20))
+        results = list(process_frames(frames, ['canny'], step=3, max_frames=4))
+        self.assertEqual([index for index, _ in results], [0, 3, 6, 9])
+
+    def test_step_and_max_frames_on_a_video_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'clip.avi')
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (48, 32))
+            if not writer.isOpened():
+                self.skipTest('OpenCV was built without an MJPG writer')
+            for i in range(10):
+                writer.write(np.full((32, 48, 3), 20 * i, dtype=np.uint8))
+            writer.release()
+
+            results = list(process_frames(path, ['wavelet'], step=2, max_frames=3))
+        self.assertEqual([index for index, _ in results], [0, 2, 4])
+        for index, features in results:
+            # The reconstruction of a flat frame is flat; MJPG only shifts its level slightly
+            self.assertAlmostEqual(features['wavelet'][0].mean(), 20 * index, delta=4)
+
+    def test_reader_exceptions_propagate(self):
+        def frames():
+            yield frame(0)
+            yield frame(1)
+            raise RuntimeError('camera unplugged')
+
+        with self.assertRaisesRegex(RuntimeError, 'camera unplugged'):
+            list(process_frames(frames(), ['canny'], workers=2))
+
+    def test_early_break_stops_the_threads(self):
+        baseline = threading.active_count()
+        produced = itertools.count()
+
+        def frames():
+            for i in produced:
+                yield frame(i)
+
+        results = process_frames(frames(), ['canny'], workers=3, queue_size=2)
+        for index, _ in itertools.islice(results, 3):
+            pass
+        self.assertEqual(index, 2)
+        results.close()
+
+        self.assertTrue(wait_for(lambda: threading.active_count() == baseline))
+        # The decoder stopped reading the (endless) source
+        read = next(produced)
+        time.sleep(0.2)
+        self.assertEqual(next(produced), read + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
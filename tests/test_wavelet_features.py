@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.backends import shutdown_backends
+from src.wavelet_features import WaveletTileReader, compress_wavelet_tiled, extract_wavelet_features
+
+
+def read_files(path):
+    contents = {}
+    for name in ('meta.json', 'indices.bin', 'values.bin'):
+        with open(os.path.join(path, name), 'rb') as f:
+            contents[name] = f.read()
+    return contents
+
+
+class TestTiledWavelet(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        rng = np.random.default_rng(0)
+        self.gray = rng.integers(0, 256, (64, 64), dtype=np.uint8)
+        self.color = rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+        # Not a multiple of the 32-pixel tiles (level 3 rounds tiles to multiples of 8)
+        self.large = rng.integers(0, 256, (70, 45), dtype=np.uint8)
+
+    def compress(self, image, name, **kwargs):
+        path = os.path.join(self.tmp, name)
+        ratio = compress_wavelet_tiled(image, path, **kwargs)
+        return ratio, WaveletTileReader(path)
+
+    def test_single_tile_matches_extract_wavelet_features(self):
+        for image in (self.gray, self.color):
+            with self.subTest(shape=image.shape):
+                ratio, reader = self.compress(image, f'single{image.ndim}', tile_size=64, value_dtype=np.float64)
+                expected, expected_ratio, _, _ = extract_wavelet_features(image)
+                self.assertEqual(len(reader), 1)
+                np.testing.assert_array_equal(reader.tile(0, 0), expected)
+                self.assertAlmostEqual(ratio, expected_ratio)
+
+    def test_edge_tiles_keep_every_pixel(self):
+        # With nothing thresholded away, the padded edge tiles reconstruct the image; the
+        # uint8 conversion truncates, as in extract_wavelet_features, so e.g. 11.9999... gives 11
+        _, reader = self.compress(self.large, 'lossless', tile_size=32, threshold_factor=0, value_dtype=np.float64)
+        self.assertEqual(reader.grid, (3, 2))
+        np.testing.assert_allclose(reader.reconstruct(), self.large, rtol=0, atol=1)
+        self.assertEqual(reader.tile(2, 1).shape, (6, 13))
+
+    def test_interior_tile_matches_extract_wavelet_features(self):
+        _, reader = self.compress(self.large, 'tiles', tile_size=32, value_dtype=np.float64)
+        expected = extract_wavelet_features(self.large[32:64, :32])[0]
+        np.testing.assert_array_equal(reader.tile(1, 0), expected)
+
+    def test_backends_write_identical_files(self):
+        self.addCleanup(shutdown_backends)
+        self.compress(self.large, 'serial', tile_size=16)
+        expected = read_files(os.path.join(self.tmp, 'serial'))
+        for backend in ('threads', 'processes'):
+            with self.subTest(backend=backend):
+                self.compress(self.large, backend, tile_size=16, backend=backend, max_workers=2)
+                self.assertEqual(read_files(os.path.join(self.tmp, backend)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()